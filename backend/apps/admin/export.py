@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator
+
+from apps.users import crud
+
+# Export formats
+NDJSON = "ndjson"
+CSV = "csv"
+
+# Columns included in exports; tokens and password hashes are never exported
+EXPORT_FIELDS = ["id", "email", "created_at", "updated_at", "is_verified", "version", "last_login_at", "last_seen_at"]
+
+MEDIA_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv",
+}
+
+def ndjson_lines(rows) -> str:
+    lines = []
+    for row in rows:
+        record = {field: row[field] for field in EXPORT_FIELDS}
+        lines.append(json.dumps(record, default=lambda value: value.isoformat()))
+    return "\n".join(lines) + "\n"
+
+def csv_lines(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow([
+            row[field].isoformat() if hasattr(row[field], "isoformat") else row[field]
+            for field in EXPORT_FIELDS
+        ])
+    return buffer.getvalue()
+
+async def export_users(
+    format: str = NDJSON,
+    gzip: bool = False,
+    chunk_size: int = 1000,
+    **filters,
+) -> AsyncIterator[bytes]:
+    """
+    Stream matching users as NDJSON or CSV.
+
+    Rows are read in keyset chunks and each chunk is encoded (and compressed)
+    as soon as it is read, so memory use does not grow with the table.
+
+    Args:
+        format: NDJSON or CSV
+        gzip: Compress the output with gzip
+        chunk_size: Rows read and encoded at a time
+        **filters: Filters accepted by `crud.iterate_users`
+
+    Yields:
+        bytes: Consecutive pieces of the export
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    encode = ndjson_lines if format == NDJSON else csv_lines
+
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    if format == CSV:
+        yield emit(csv_lines([], header=True))
+
+    chunk = []
+    async for row in crud.iterate_users(chunk_size=chunk_size, **filters):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            data = emit(encode(chunk))
+            chunk = []
+            if data:
+                yield data
+    if chunk:
+        data = emit(encode(chunk))
+        if data:
+            yield data
+
+    if compressor:
+        yield compressor.flush()
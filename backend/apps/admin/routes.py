@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+from apps.admin.views import router as admin_router
+
+# Create a router for admin routes
+router = APIRouter()
+
+# Include admin endpoints
+router.include_router(admin_router, tags=["admin"])
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from apps.users.schemas import UserChange
+
+# Profile Response Schema
+class ProfileResponse(BaseModel):
+    file: str = Field(..., description="Path the collapsed-stack profile will be written to")
+    seconds: int = Field(..., description="How long stacks are sampled for")
+    interval_ms: int = Field(..., description="Sampling interval in milliseconds")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "file": "/app/profiles/profile-20240601T120000-1.txt",
+                "seconds": 10,
+                "interval_ms": 5
+            }
+        }
+    }
+
+# User Page Schema
+class UserPage(BaseModel):
+    users: List[UserChange] = Field(..., description="Users ordered by creation time")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "users": [
+                    {
+                        "id": 1,
+                        "email": "user@example.com",
+                        "created_at": "2023-06-01T12:00:00",
+                        "is_verified": True,
+                        "version": 42,
+                        "updated_at": "2023-06-01T12:05:00"
+                    }
+                ],
+                "next_cursor": "WyIyMDIzLTA2LTAxVDEyOjAwOjAwIiwgMV0"
+            }
+        }
+    }
+
+# Audit Event Schema
+class AuditEvent(BaseModel):
+    id: int = Field(..., description="Event id, increasing in write order")
+    created_at: datetime = Field(..., description="When the event happened (UTC)")
+    event: str = Field(..., description="login, login_failed, register, email_verified, email_verification_failed, password_reset_requested, password_reset or password_reset_failed")
+    user_id: Optional[int] = Field(None, description="User the event concerns, when known")
+    email: Optional[str] = Field(None, description="Email address given or concerned, when known")
+    ip_address: Optional[str] = Field(None, description="Address of the client")
+    detail: Optional[str] = Field(None, description="Outcome message, for verification and reset events")
+
+# Audit Page Schema
+class AuditPage(BaseModel):
+    events: List[AuditEvent] = Field(..., description="Events ordered by time")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "events": [
+                    {
+                        "id": 7,
+                        "created_at": "2023-06-01T12:00:00",
+                        "event": "login_failed",
+                        "user_id": None,
+                        "email": "user@example.com",
+                        "ip_address": "203.0.113.9",
+                        "detail": None
+                    }
+                ],
+                "next_cursor": "WyIyMDIzLTA2LTAxVDEyOjAwOjAwIiwgN10"
+            }
+        }
+    }
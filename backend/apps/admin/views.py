@@ -0,0 +1,182 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+
+from apps.admin import schemas
+from apps.admin.export import CSV, MEDIA_TYPES, NDJSON, export_users
+from apps.admin.services import decode_cursor, encode_cursor
+from apps.users import audit, crud, serializers
+from common.dependencies import get_current_admin
+from config.database import database
+from common.profiler import profiler, ProfilerBusy
+from config.settings import PROFILE_MAX_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/profile",
+    response_model=schemas.ProfileResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Capture a sampling profile",
+    description="""
+    Sample the stacks of every thread in this worker for a number of seconds and write
+    them to a file in collapsed-stack format (for flamegraph.pl or speedscope).
+    
+    - Requires an admin account (listed in `ADMIN_EMAILS`).
+    - Returns immediately; the file is written when sampling ends.
+    - Only one profile can run at a time per worker.
+    """
+)
+async def start_profile(
+    seconds: int = Query(10, ge=1, le=PROFILE_MAX_SECONDS, description="Seconds to sample for"),
+    interval_ms: int = Query(5, ge=1, le=1000, description="Sampling interval in milliseconds"),
+    admin: dict = Depends(get_current_admin),
+):
+    """Start the sampling profiler."""
+    try:
+        path = profiler.start(seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already being captured"
+        )
+    
+    logger.info("Profiling for %ds requested by %s", seconds, admin["email"])
+    return {"file": path, "seconds": seconds, "interval_ms": interval_ms}
+
+@router.get(
+    "/users/export",
+    response_class=StreamingResponse,
+    summary="Export users",
+    description="""
+    Download every matching user as NDJSON (one object per line) or CSV.
+    
+    - Requires an admin account (listed in `ADMIN_EMAILS`).
+    - Accepts the same filters as the user listing.
+    - The export is streamed in chunks, optionally gzipped, without loading the table into memory.
+    - Password hashes and tokens are never included.
+    """
+)
+async def export_users_view(
+    format: str = Query(NDJSON, pattern=f"^({NDJSON}|{CSV})$", description="Output format: ndjson or csv"),
+    gzip: bool = Query(False, description="Compress the output with gzip"),
+    verified: Optional[bool] = Query(None, description="Only verified (true) or unverified (false) users"),
+    created_from: Optional[datetime] = Query(None, description="Only users created at or after this time (UTC)"),
+    created_to: Optional[datetime] = Query(None, description="Only users created before this time (UTC)"),
+    email_prefix: Optional[str] = Query(None, min_length=1, description="Only users whose email starts with this"),
+    admin: dict = Depends(get_current_admin),
+):
+    """Stream a user export."""
+    logger.info("User export (%s) requested by %s", format, admin["email"])
+    filename = f"users-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    
+    return StreamingResponse(
+        export_users(
+            format,
+            gzip=gzip,
+            verified=verified,
+            created_from=created_from,
+            created_to=created_to,
+            email_prefix=email_prefix,
+        ),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers=headers,
+    )
+
+@router.get(
+    "/users",
+    response_model=None,
+    responses={200: {"model": schemas.UserPage}},
+    summary="List and search users",
+    description="""
+    List users ordered by creation time, with keyset pagination.
+    
+    - Requires an admin account (listed in `ADMIN_EMAILS`).
+    - Filter by verification status, creation time range and email prefix.
+    - Pass the returned `next_cursor` as `cursor` to fetch the next page; pages
+      cost the same however deep you go.
+    - The response is streamed as it is read from the database.
+    """
+)
+async def list_users(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of users to return"),
+    verified: Optional[bool] = Query(None, description="Only verified (true) or unverified (false) users"),
+    created_from: Optional[datetime] = Query(None, description="Only users created at or after this time (UTC)"),
+    created_to: Optional[datetime] = Query(None, description="Only users created before this time (UTC)"),
+    email_prefix: Optional[str] = Query(None, min_length=1, description="Only users whose email starts with this"),
+    admin: dict = Depends(get_current_admin),
+):
+    """List users a page at a time."""
+    # Fetch one extra row to tell whether another page follows
+    query = crud.list_users_query(
+        limit + 1,
+        after=decode_cursor(cursor),
+        verified=verified,
+        created_from=created_from,
+        created_to=created_to,
+        email_prefix=email_prefix,
+    )
+    
+    async def stream_page():
+        yield b'{"users":['
+        last = None
+        count = 0
+        next_cursor = "null"
+        async for row in database.iterate(query):
+            if count == limit:
+                next_cursor = f'"{encode_cursor(last)}"'
+                break
+            if count:
+                yield b","
+            yield serializers.user_change(row)
+            last = row
+            count += 1
+        yield f'],"next_cursor":{next_cursor}}}'.encode()
+    
+    return StreamingResponse(stream_page(), media_type="application/json")
+
+@router.get(
+    "/audit",
+    response_model=schemas.AuditPage,
+    summary="Query the auth audit log",
+    description="""
+    List logins, failed logins, registrations, verifications and password resets
+    ordered by time, with keyset pagination.
+    
+    - Requires an admin account (listed in `ADMIN_EMAILS`).
+    - Filter by event, user id, email and time range; each has an index together with the time.
+    - Events are written in batches, so the latest ones appear within `AUDIT_FLUSH_INTERVAL_MS` of happening.
+    - Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
+)
+async def list_audit_events(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of events to return"),
+    event: Optional[str] = Query(None, description="Only events of this kind, e.g. login_failed"),
+    user_id: Optional[int] = Query(None, description="Only events concerning this user"),
+    email: Optional[str] = Query(None, min_length=1, description="Only events for this email address"),
+    created_from: Optional[datetime] = Query(None, description="Only events at or after this time (UTC)"),
+    created_to: Optional[datetime] = Query(None, description="Only events before this time (UTC)"),
+    admin: dict = Depends(get_current_admin),
+):
+    """List audit events a page at a time."""
+    # Fetch one extra row to tell whether another page follows
+    rows = await audit.list_events(
+        limit + 1,
+        after=decode_cursor(cursor),
+        event=event,
+        user_id=user_id,
+        email=email,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"events": [dict(row) for row in rows[:limit]], "next_cursor": next_cursor}
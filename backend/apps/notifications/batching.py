@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from apps.notifications.schemas import Notification
+from config.settings import (
+    NOTIFICATION_BATCH_ENABLED,
+    NOTIFICATION_BATCH_WINDOW_MS,
+    NOTIFICATION_BATCH_MAX_EVENTS,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Frame type of a batch of NEW_USER notifications
+BATCH_TYPE = "NEW_USERS"
+
+class NotificationBatcher:
+    """
+    Coalesces bursts of NEW_USER notifications into a single NEW_USERS frame.
+
+    Events are logged (and get their sequence ids) as soon as they arrive, but
+    are only fanned out when the window closes or `max_events` are pending.
+    The window opens with the first pending event, so no event waits longer
+    than `window_ms` before it is sent. A window holding a single event is
+    sent as that event, unchanged.
+    """
+
+    def __init__(
+        self,
+        manager,
+        enabled: bool = NOTIFICATION_BATCH_ENABLED,
+        window_ms: int = NOTIFICATION_BATCH_WINDOW_MS,
+        max_events: int = NOTIFICATION_BATCH_MAX_EVENTS,
+    ):
+        self.manager = manager
+        self.enabled = enabled
+        self.window = window_ms / 1000
+        self.max_events = max_events
+        self._pending: List[Notification] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, notification: Notification):
+        """Log a notification and queue it for the next batched frame."""
+        await self.manager.event_log.append(notification)
+        self._pending.append(notification)
+
+        if len(self._pending) >= self.max_events:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        """Send everything pending now."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+        # Take the pending events before yielding so new ones start a fresh window
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        if len(pending) == 1:
+            await self.manager.fanout(pending[0])
+            return
+
+        frame = Notification(
+            type=BATCH_TYPE,
+            message=f"{len(pending)} new users have registered",
+            data={
+                "users": [dict(event.data, seq=event.seq) for event in pending],
+                "count": len(pending),
+            },
+            seq=pending[-1].seq,
+        )
+        await self.manager.fanout(frame)
+
+    async def _flush_later(self):
+        """Flush once the current window closes."""
+        await asyncio.sleep(self.window)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Error flushing notification batch: %s", e)
@@ -0,0 +1,63 @@
+from typing import Tuple, Union
+
+from fastapi import WebSocket
+
+from apps.notifications.schemas import Notification
+
+# MessagePack is optional; without it only JSON is offered
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Supported wire formats
+JSON = "json"
+MSGPACK = "msgpack"
+SSE = "sse"
+
+def available_encodings() -> Tuple[str, ...]:
+    """Return the WebSocket wire formats this server can produce."""
+    if msgpack is None:
+        return (JSON,)
+    return (JSON, MSGPACK)
+
+def encode_notification(notification: Notification, encoding: str = JSON) -> Union[str, bytes]:
+    """
+    Encode a notification for the wire.
+    
+    Payloads are cached on the notification, so each format is encoded at most
+    once however many clients and transports it is delivered to. Only call this
+    once the notification is final (i.e. after it got its sequence id).
+
+    Args:
+        notification: Notification to encode
+        encoding: Wire format, `json` (text frame), `msgpack` (binary frame)
+            or `sse` (a complete Server-Sent Events message)
+
+    Returns:
+        Union[str, bytes]: Text payload for JSON and SSE, bytes for binary formats
+    """
+    payload = notification._encoded.get(encoding)
+    if payload is not None:
+        return payload
+    
+    if encoding == MSGPACK:
+        payload = msgpack.packb(notification.model_dump(), use_bin_type=True)
+    elif encoding == SSE:
+        data = encode_notification(notification, JSON)
+        if notification.seq is None:
+            payload = f"data: {data}\n\n"
+        else:
+            payload = f"id: {notification.seq}\ndata: {data}\n\n"
+    else:
+        payload = notification.model_dump_json()
+    
+    notification._encoded[encoding] = payload
+    return payload
+
+async def send_payload(websocket: WebSocket, payload: Union[str, bytes]):
+    """Send an encoded payload as a text or binary frame."""
+    if isinstance(payload, bytes):
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
@@ -0,0 +1,180 @@
+import json
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, List
+
+import sqlalchemy
+
+from apps.notifications.models import notification_events
+from apps.notifications.schemas import Notification
+from common.context import ContextProxy
+from config.database import database
+from config.settings import (
+    NOTIFICATION_LOG_SIZE,
+    NOTIFICATION_LOG_PERSIST,
+    NOTIFICATION_LOG_RETENTION,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# How many appends happen between pruning passes on the persisted log
+PRUNE_INTERVAL = 1000
+
+class ReplayGap(Exception):
+    """Raised when the requested history is no longer available."""
+
+class EventLog:
+    """
+    Bounded, indexed log of broadcast notifications.
+
+    Every notification gets a monotonic sequence id. The most recent events
+    are kept in an in-memory ring buffer; when persistence is enabled they are
+    also written to the `notification_events` table so reconnecting clients
+    can be served beyond the ring and across restarts.
+    """
+
+    def __init__(self, capacity: int = NOTIFICATION_LOG_SIZE, persist: bool = NOTIFICATION_LOG_PERSIST):
+        self.capacity = capacity
+        self.persist = persist
+        self._events: Deque[Notification] = deque(maxlen=capacity)
+        # Without persistence, start from a time-based base so sequence ids
+        # keep increasing across restarts and stale clients are detected.
+        self._last_seq = 0 if persist else time.time_ns() // 1000
+        self._appends_since_prune = 0
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence id of the most recent event."""
+        return self._last_seq
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence id of the oldest event held in memory."""
+        if self._events:
+            return self._events[0].seq
+        return self._last_seq + 1
+
+    async def load(self):
+        """Restore the sequence counter and ring buffer from the persisted log."""
+        if not self.persist:
+            return
+
+        last_seq = await database.fetch_val(
+            sqlalchemy.select([sqlalchemy.func.max(notification_events.c.seq)])
+        )
+        self._last_seq = last_seq or 0
+
+        query = (
+            notification_events.select()
+            .order_by(notification_events.c.seq.desc())
+            .limit(self.capacity)
+        )
+        rows = await database.fetch_all(query)
+        self._events.clear()
+        self._events.extend(self._from_row(row) for row in reversed(rows))
+        logger.info("Restored notification log at seq %d (%d events in memory)", self._last_seq, len(self._events))
+
+    async def append(self, notification: Notification) -> Notification:
+        """Assign the next sequence id to a notification and record it."""
+        self._last_seq += 1
+        notification.seq = self._last_seq
+        self._events.append(notification)
+
+        if self.persist:
+            await database.execute(
+                notification_events.insert().values(
+                    seq=notification.seq,
+                    type=notification.type,
+                    message=notification.message,
+                    data=json.dumps(notification.data),
+                )
+            )
+            self._appends_since_prune += 1
+            if self._appends_since_prune >= PRUNE_INTERVAL:
+                self._appends_since_prune = 0
+                await self._prune()
+
+        return notification
+
+    async def replay(self, last_seq: int, upto: int, batch_size: int) -> AsyncIterator[List[Notification]]:
+        """
+        Yield batches of events with `last_seq < seq <= upto`.
+
+        Raises:
+            ReplayGap: If part of the requested range is no longer available
+        """
+        if last_seq > upto:
+            # The client saw events this log never issued (e.g. a wiped database)
+            raise ReplayGap()
+        if last_seq == upto:
+            return
+
+        cursor = last_seq
+
+        # Serve the part that fell out of the ring buffer from the database
+        if cursor + 1 < self.first_seq:
+            if not self.persist:
+                raise ReplayGap()
+
+            oldest = await database.fetch_val(
+                sqlalchemy.select([sqlalchemy.func.min(notification_events.c.seq)])
+            )
+            if oldest is None or cursor + 1 < oldest:
+                raise ReplayGap()
+
+            while cursor + 1 < self.first_seq and cursor < upto:
+                query = (
+                    notification_events.select()
+                    .where(
+                        (notification_events.c.seq > cursor) &
+                        (notification_events.c.seq <= upto)
+                    )
+                    .order_by(notification_events.c.seq)
+                    .limit(batch_size)
+                )
+                rows = await database.fetch_all(query)
+                if not rows:
+                    break
+                batch = [self._from_row(row) for row in rows]
+                cursor = batch[-1].seq
+                yield batch
+
+        # Then the rest straight from memory
+        if cursor + 1 < self.first_seq:
+            raise ReplayGap()
+
+        batch = []
+        for event in list(self._events):
+            if event.seq <= cursor:
+                continue
+            if event.seq > upto:
+                break
+            batch.append(event)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _prune(self):
+        """Drop persisted events beyond the retention window."""
+        cutoff = self._last_seq - NOTIFICATION_LOG_RETENTION
+        if cutoff > 0:
+            await database.execute(
+                notification_events.delete().where(notification_events.c.seq <= cutoff)
+            )
+
+    @staticmethod
+    def _from_row(row) -> Notification:
+        """Build a notification from a persisted row."""
+        return Notification(
+            type=row["type"],
+            message=row["message"],
+            data=json.loads(row["data"]) if row["data"] else {},
+            seq=row["seq"],
+        )
+
+# Event log of the running app
+event_log = ContextProxy("event_log")
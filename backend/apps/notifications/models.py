@@ -0,0 +1,26 @@
+import sqlalchemy
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy.sql import functions
+
+from config.database import Base, metadata
+
+# Notification event log table
+notification_events = sqlalchemy.Table(
+    "notification_events",
+    metadata,
+    sqlalchemy.Column("seq", sqlalchemy.Integer, primary_key=True, autoincrement=False),
+    sqlalchemy.Column("type", sqlalchemy.String),
+    sqlalchemy.Column("message", sqlalchemy.String),
+    sqlalchemy.Column("data", sqlalchemy.Text),
+    sqlalchemy.Column("created_at", sqlalchemy.DateTime, default=func.now()),
+)
+
+# SQLAlchemy ORM model
+class NotificationEvent(Base):
+    __tablename__ = "notification_events"
+    
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+    type = Column(String)
+    message = Column(String)
+    data = Column(Text)
+    created_at = Column(DateTime, default=functions.now())
@@ -1,20 +1,30 @@
+from typing import Optional
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException, status
 from jose import jwt, JWTError
 
+from apps.notifications.encoding import JSON, available_encodings
+from apps.notifications.views import router as notification_views_router
 from apps.notifications.websocket import manager
 from config.settings import SECRET_KEY, JWT_ALGORITHM
 from apps.users import crud
+from apps.users.activity import activity_tracker
 
 # Create a router for notification routes
 router = APIRouter()
 
+# Include Server-Sent Events and long-poll endpoints
+router.include_router(notification_views_router, tags=["notifications"])
+
 @router.websocket(
     "/ws",
     name="notifications_websocket",
 )
 async def websocket_endpoint(
     websocket: WebSocket,
-    token: str = Query(None)
+    token: str = Query(None),
+    last_seq: Optional[int] = Query(None, description="Sequence id of the last notification the client received"),
+    encoding: str = Query(JSON, description="Wire format: `json` (text frames) or `msgpack` (binary frames)")
 ):
     """
     WebSocket endpoint for real-time notifications.
@@ -29,12 +39,42 @@ async def websocket_endpoint(
         "message": "A new user has registered",
         "data": {
             "email": "user@example.com"
-        }
+        },
+        "seq": 42
     }
     ```
     
+    Every notification carries a monotonic `seq`. A reconnecting client can pass the
+    last `seq` it received as `last_seq` to get the events it missed, delivered as
+    `REPLAY` frames (`data.events` holds up to a batch of notifications). Live
+    notifications may interleave with the replay, so clients should order and
+    de-duplicate by `seq`. If the history is no longer available a single `RESYNC`
+    frame is sent instead and the client should refetch its state.
+    
+    When notification batching is enabled, a burst of registrations is delivered as a
+    single `NEW_USERS` frame whose `data.users` lists each user's `email` and `seq`.
+    
+    Frames are JSON text by default. Pass `encoding=msgpack` to receive the same
+    objects as MessagePack binary frames instead. Independently of the format, the
+    server negotiates permessage-deflate compression with clients that offer it.
+    
+    Before a restart the server sends a `RECONNECT` frame: close the socket and
+    reconnect (with `last_seq`) after `data.retry_after_ms`. The delay differs per
+    client so reconnects are spread out. New connections are refused with close
+    code 1013 while the server drains.
+    
     To connect, use the WebSocket protocol: `ws://localhost:8000/api/notifications/ws?token=your_jwt_token`
     """
+    # Turn new clients away while draining for a restart
+    if manager.draining:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Server is restarting")
+        return
+    
+    # Validate the requested wire format
+    if encoding not in available_encodings():
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unsupported encoding")
+        return
+    
     # Validate the token
     if not token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Missing authentication token")
@@ -48,6 +88,7 @@ async def websocket_endpoint(
         if not user_id:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token payload")
             return
+        activity_tracker.seen(int(user_id))
         
         # Optionally verify user exists in database
         # Note: Skip DB check for performance if not needed
@@ -56,17 +97,25 @@ async def websocket_endpoint(
         #     await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="User not found")
         #     return
         
-    except JWTError:
+    except (JWTError, ValueError):
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid authentication token")
         return
         
     # Connect the authenticated client
-    await manager.connect(websocket)
+    upto = await manager.connect(websocket, encoding)
     
     try:
+        # Catch up a reconnecting client on the events it missed
+        if last_seq is not None:
+            await manager.replay(websocket, last_seq, upto)
+        
         while True:
-            # Wait for any messages (client ping)
-            await websocket.receive_text()
+            # Wait for any messages (client ping), text or binary
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
     except WebSocketDisconnect:
-        # Disconnect the client when websocket is closed
+        pass
+    finally:
+        # Never leave a dead socket in the fan-out, whatever ended the connection
         await manager.disconnect(websocket)
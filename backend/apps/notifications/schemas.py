@@ -1,11 +1,15 @@
-from pydantic import BaseModel, Field
-from typing import Dict, Any
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Dict, Any, List, Optional
 
 class Notification(BaseModel):
     """Notification schema for sending real-time notifications."""
     type: str = Field(..., description="Type of notification, e.g., 'NEW_USER'")
     message: str = Field(..., description="Human-readable notification message")
     data: Dict[str, Any] = Field(..., description="Additional notification data")
+    seq: Optional[int] = Field(None, description="Monotonic sequence id assigned by the event log")
+    
+    # Wire payloads by format, filled on first send so every transport shares them
+    _encoded: Dict[str, Any] = PrivateAttr(default_factory=dict)
     
     model_config = {
         "json_schema_extra": {
@@ -14,7 +18,31 @@ class Notification(BaseModel):
                 "message": "A new user has registered",
                 "data": {
                     "email": "user@example.com"
-                }
+                },
+                "seq": 42
+            }
+        }
+    }
+
+class PollResponse(BaseModel):
+    """Long-poll response with the notifications a client missed."""
+    events: List[Notification] = Field(..., description="Notifications since `last_seq`, oldest first")
+    last_seq: int = Field(..., description="Sequence id to pass as `last_seq` on the next poll")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "events": [
+                    {
+                        "type": "NEW_USER",
+                        "message": "A new user has registered",
+                        "data": {
+                            "email": "user@example.com"
+                        },
+                        "seq": 42
+                    }
+                ],
+                "last_seq": 42
             }
         }
     }
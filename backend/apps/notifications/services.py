@@ -0,0 +1,56 @@
+import random
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+
+from apps.notifications.websocket import manager
+from config.settings import SECRET_KEY, JWT_ALGORITHM, NOTIFICATION_RECONNECT_MIN_MS, NOTIFICATION_RECONNECT_MAX_MS
+
+# OAuth2 scheme that lets the token come from the query string instead
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+async def get_subscriber_id(
+    token: Optional[str] = Query(None, description="JWT access token, for clients that cannot set headers"),
+    bearer_token: Optional[str] = Depends(optional_oauth2_scheme),
+) -> str:
+    """
+    Authenticate a notification subscriber.
+    
+    EventSource cannot send an Authorization header, so the token may also be
+    passed as the `token` query parameter, like for the WebSocket endpoint.
+    Like the WebSocket endpoint, this only checks the token and skips the
+    database lookup.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    token = token or bearer_token
+    if not token:
+        raise credentials_exception
+    
+    try:
+        # Decode JWT token
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        user_id: str = payload.get("sub")
+    except JWTError:
+        raise credentials_exception
+    
+    if user_id is None:
+        raise credentials_exception
+    
+    return user_id
+
+async def reject_while_draining():
+    """Turn new subscribers away while the server drains, before any token is decoded."""
+    if manager.draining:
+        retry_after = random.randint(NOTIFICATION_RECONNECT_MIN_MS, NOTIFICATION_RECONNECT_MAX_MS) // 1000 + 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is restarting, please reconnect",
+            headers={"Retry-After": str(retry_after)},
+        )
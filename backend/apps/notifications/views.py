@@ -0,0 +1,151 @@
+import asyncio
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import Response, StreamingResponse
+
+from apps.notifications import schemas
+from apps.notifications.encoding import JSON, SSE, encode_notification
+from apps.notifications.event_log import event_log, ReplayGap
+from apps.notifications.schemas import Notification
+from apps.notifications.services import get_subscriber_id, reject_while_draining
+from apps.notifications.websocket import manager, StreamSubscriber
+from config.settings import (
+    NOTIFICATION_REPLAY_BATCH_SIZE,
+    NOTIFICATION_STREAM_KEEPALIVE_SECONDS,
+    NOTIFICATION_POLL_TIMEOUT_SECONDS,
+)
+
+router = APIRouter()
+
+def resync_notification() -> Notification:
+    """Build the frame telling a client its missed events are gone."""
+    return Notification(
+        type="RESYNC",
+        message="Missed notifications are no longer available",
+        data={"last_seq": event_log.last_seq},
+    )
+
+async def event_stream(last_seq: Optional[int]):
+    """Yield Server-Sent Events: missed events first, then live ones."""
+    # Subscribed here rather than in the endpoint, so a client gone before the
+    # first event is never left subscribed
+    subscriber: Optional[StreamSubscriber] = None
+    try:
+        subscriber = manager.subscribe()
+
+        # Ask EventSource to wait a little before reconnecting
+        yield "retry: 3000\n\n"
+
+        if last_seq is not None:
+            try:
+                async for batch in event_log.replay(last_seq, subscriber.upto, NOTIFICATION_REPLAY_BATCH_SIZE):
+                    yield "".join(encode_notification(event, SSE) for event in batch)
+            except ReplayGap:
+                yield encode_notification(resync_notification(), SSE)
+
+        while not (subscriber.overflowed and subscriber.queue.empty()):
+            try:
+                notification = await asyncio.wait_for(
+                    subscriber.queue.get(), NOTIFICATION_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Comment line that keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            if notification is None:
+                # The server is shutting down
+                break
+            if notification.type == "RECONNECT":
+                # EventSource waits `retry` ms before reconnecting, which spreads the reconnects out
+                yield f"retry: {notification.data['retry_after_ms']}\n"
+                yield encode_notification(notification, SSE)
+                break
+            yield encode_notification(notification, SSE)
+    finally:
+        if subscriber is not None:
+            manager.unsubscribe(subscriber)
+
+@router.get(
+    "/stream",
+    dependencies=[Depends(reject_while_draining)],
+    summary="Stream notifications with Server-Sent Events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+    description="""
+    Receive the same notifications as the WebSocket endpoint over Server-Sent Events,
+    for clients behind proxies that break WebSockets.
+
+    - Each event's `data` is a notification in the WebSocket JSON format, and its `id` is the notification's `seq`.
+    - On reconnect, missed events are replayed from `Last-Event-ID` (sent automatically by EventSource) or `last_seq`.
+    - If the missed events are no longer available, a `RESYNC` notification is sent instead.
+    - `EventSource` cannot set headers, so the token may be passed as the `token` query parameter.
+    - When the server restarts, a `RECONNECT` event ends the stream and its `retry` field spreads out the reconnects.
+    """
+)
+async def stream_notifications(
+    last_seq: Optional[int] = Query(None, description="Sequence id of the last notification the client received"),
+    last_event_id: Optional[str] = Header(None, description="Set by EventSource when reconnecting"),
+    user_id: str = Depends(get_subscriber_id),
+):
+    """Stream notifications as Server-Sent Events."""
+    if last_seq is None and last_event_id and last_event_id.isdigit():
+        last_seq = int(last_event_id)
+
+    return StreamingResponse(
+        event_stream(last_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def collect_events(last_seq: int) -> List[Notification]:
+    """Return the first batch of logged events after `last_seq`."""
+    try:
+        async for batch in event_log.replay(last_seq, event_log.last_seq, NOTIFICATION_REPLAY_BATCH_SIZE):
+            return batch
+    except ReplayGap:
+        return [resync_notification()]
+    return []
+
+@router.get(
+    "/poll",
+    response_model=schemas.PollResponse,
+    dependencies=[Depends(reject_while_draining)],
+    summary="Long-poll for notifications",
+    description="""
+    Wait for notifications newer than `last_seq`, for clients that can use neither
+    WebSockets nor Server-Sent Events.
+
+    - Returns immediately if notifications after `last_seq` are available, otherwise waits up to `timeout` seconds.
+    - Without `last_seq`, returns no events and the current `last_seq` to start polling from.
+    - Poll again with the returned `last_seq`. Events are served from the notification log, never from the users table.
+    - If the missed events are no longer available, a `RESYNC` notification is returned instead.
+    """
+)
+async def poll_notifications(
+    last_seq: Optional[int] = Query(None, description="Sequence id of the last notification the client received"),
+    timeout: int = Query(
+        NOTIFICATION_POLL_TIMEOUT_SECONDS, ge=0, le=60, description="Seconds to wait for a notification"
+    ),
+    user_id: str = Depends(get_subscriber_id),
+):
+    """Long-poll for notifications."""
+    events: List[Notification] = []
+    if last_seq is not None:
+        events = await collect_events(last_seq)
+        if not events and await manager.wait_for_events(timeout):
+            events = await collect_events(last_seq)
+
+    next_seq = last_seq if last_seq is not None else event_log.last_seq
+    for event in events:
+        if event.seq is not None:
+            next_seq = event.seq
+        elif event.type == "RESYNC":
+            next_seq = event_log.last_seq
+
+    # Reuse the JSON already encoded for WebSocket clients
+    content = '{"events":[%s],"last_seq":%d}' % (
+        ",".join(encode_notification(event, JSON) for event in events),
+        next_seq,
+    )
+    return Response(content=content, media_type="application/json")
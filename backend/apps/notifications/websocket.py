@@ -1,74 +1,300 @@
-import json
+import asyncio
 import logging
+import random
+import time
 from typing import Dict, List
 
 from fastapi import WebSocket, WebSocketDisconnect
 
+from apps.notifications.encoding import JSON, encode_notification, send_payload
+from apps.notifications.event_log import EventLog, ReplayGap
 from apps.notifications.schemas import Notification
+from common.context import ContextProxy
+from common.log import Sampler, log_sampled
+from common.metrics import Counter, Gauge, Histogram
+from common.tracing import span
+from config.settings import (
+    NOTIFICATION_REPLAY_BATCH_SIZE,
+    NOTIFICATION_STREAM_QUEUE_SIZE,
+    NOTIFICATION_DRAIN_SECONDS,
+    NOTIFICATION_RECONNECT_MIN_MS,
+    NOTIFICATION_RECONNECT_MAX_MS,
+    LOG_SAMPLE_EVERY,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Connected WebSocket clients
-connected_clients: List[WebSocket] = []
+# Per-client failures can fire once per client per event, so only a sample is logged
+send_error_sampler = Sampler(LOG_SAMPLE_EVERY)
+
+class StreamSubscriber:
+    """A Server-Sent Events client fed through a bounded queue."""
+    
+    def __init__(self, maxsize: int = NOTIFICATION_STREAM_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # Last event logged before the client joined; later ones arrive on the queue
+        self.upto = 0
+        # Set when the client fell too far behind and must reconnect
+        self.overflowed = False
+
+# Notification delivery metrics
+NOTIFICATION_FANOUT_SECONDS = Histogram(
+    "notification_fanout_seconds", "Time spent fanning a notification out to all clients"
+)
+NOTIFICATION_SEND_ERRORS = Counter(
+    "notification_send_errors", "Notifications that could not be delivered to a WebSocket client"
+)
+Gauge("websocket_connections", "Connected WebSocket clients", function=lambda: len(manager.clients))
+Gauge("sse_connections", "Connected Server-Sent Events clients", function=lambda: len(manager.subscribers))
+Gauge("long_poll_waiters", "Long-poll requests waiting for a notification", function=lambda: len(manager.poll_waiters))
 
 class ConnectionManager:
-    """WebSocket connection manager."""
+    """Connection manager fanning notifications out to WebSocket, SSE and long-poll clients."""
     
-    async def connect(self, websocket: WebSocket):
-        """Connect a new client."""
-        logger.info(f"New WebSocket client connected. Total clients: {len(connected_clients) + 1}")
+    def __init__(self, event_log: EventLog):
+        self.event_log = event_log
+        # Connected WebSocket clients
+        self.clients: List[WebSocket] = []
+        # Wire format negotiated by each connected client
+        self.encodings: Dict[WebSocket, str] = {}
+        # Connected Server-Sent Events clients
+        self.subscribers: List[StreamSubscriber] = []
+        # Long-poll requests waiting for the next event
+        self.poll_waiters: List[asyncio.Future] = []
+        # Set once shutdown starts; new clients are turned away
+        self.draining = False
+    
+    async def connect(self, websocket: WebSocket, encoding: str = JSON) -> int:
+        """
+        Connect a new client.
+        
+        Args:
+            websocket: Client socket
+            encoding: Wire format the client asked for at handshake
+        
+        Returns:
+            int: Sequence id of the last event logged before the client joined.
+            Everything after it is delivered live.
+        """
         await websocket.accept()
-        connected_clients.append(websocket)
+        # Register and read the log position without yielding to the event loop,
+        # so no event can fall between replay and live delivery
+        self.clients.append(websocket)
+        self.encodings[websocket] = encoding
+        logger.debug("WebSocket client connected. Total clients: %d", len(self.clients))
+        return self.event_log.last_seq
+    
+    async def send(self, websocket: WebSocket, notification: Notification):
+        """Send a single notification to one client in its wire format."""
+        encoding = self.encodings.get(websocket, JSON)
+        await send_payload(websocket, encode_notification(notification, encoding))
+    
+    async def replay(self, websocket: WebSocket, last_seq: int, upto: int):
+        """Send a reconnecting client the events it missed, in batches."""
+        try:
+            async for batch in self.event_log.replay(last_seq, upto, NOTIFICATION_REPLAY_BATCH_SIZE):
+                frame = Notification(
+                    type="REPLAY",
+                    message="Missed notifications",
+                    data={
+                        "events": [event.dict() for event in batch],
+                        "from_seq": batch[0].seq,
+                        "to_seq": batch[-1].seq,
+                    },
+                )
+                await self.send(websocket, frame)
+        except ReplayGap:
+            # History is gone; tell the client to refetch its state instead
+            frame = Notification(
+                type="RESYNC",
+                message="Missed notifications are no longer available",
+                data={"last_seq": upto},
+            )
+            await self.send(websocket, frame)
     
     async def disconnect(self, websocket: WebSocket):
         """Disconnect a client."""
-        if websocket in connected_clients:
-            connected_clients.remove(websocket)
-            logger.info(f"WebSocket client disconnected. Remaining clients: {len(connected_clients)}")
+        if websocket in self.clients:
+            self.clients.remove(websocket)
+            self.encodings.pop(websocket, None)
+            logger.debug("WebSocket client disconnected. Remaining clients: %d", len(self.clients))
     
-    async def broadcast(self, notification: Notification):
-        """Broadcast a message to all connected clients."""
-        logger.info(f"Broadcasting notification to {len(connected_clients)} clients: {notification.dict()}")
+    def reconnect_notification(
+        self,
+        min_ms: int = NOTIFICATION_RECONNECT_MIN_MS,
+        max_ms: int = NOTIFICATION_RECONNECT_MAX_MS,
+    ) -> Notification:
+        """Build a RECONNECT frame with a randomized delay, different for every client."""
+        return Notification(
+            type="RECONNECT",
+            message="Server is restarting, please reconnect",
+            data={
+                "retry_after_ms": random.randint(min_ms, max_ms),
+                "last_seq": self.event_log.last_seq,
+            },
+        )
+    
+    async def drain(self, timeout: float = NOTIFICATION_DRAIN_SECONDS):
+        """
+        Ask every client to reconnect elsewhere and wait for them to leave.
         
-        if not connected_clients:
-            logger.warning("No connected clients to broadcast to!")
+        New connections are refused from here on. Each WebSocket and SSE client
+        gets a RECONNECT frame with its own random delay, so reconnects are
+        spread over the backoff window instead of arriving all at once. Returns
+        when every client has left or `timeout` has passed; clients still
+        connected then are closed by the regular shutdown.
+        """
+        if self.draining:
             return
-            
-        for client in connected_clients:
+        self.draining = True
+        logger.info(
+            "Draining %d WebSocket and %d SSE clients (deadline %ss)",
+            len(self.clients), len(self.subscribers), timeout,
+        )
+        
+        for client in list(self.clients):
             try:
-                data = notification.dict()
-                logger.info(f"Sending notification data to client: {data}")
-                await client.send_json(data)
-                logger.info("Successfully sent notification to client")
+                await self.send(client, self.reconnect_notification())
             except Exception as e:
-                logger.error(f"Error broadcasting to client: {str(e)}")
+                logger.debug("Error sending reconnect frame: %s", e)
+                await self.disconnect(client)
+        
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(self.reconnect_notification())
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+        
+        # Long-polls return at once; their next poll is refused and retried by the client
+        for waiter in self.poll_waiters:
+            if not waiter.done():
+                waiter.set_result(True)
+        self.poll_waiters.clear()
+        
+        deadline = time.monotonic() + timeout
+        while (self.clients or self.subscribers) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        
+        if self.clients or self.subscribers:
+            logger.warning(
+                "Drain deadline passed with %d WebSocket and %d SSE clients still connected",
+                len(self.clients), len(self.subscribers),
+            )
+        else:
+            logger.info("All notification clients drained")
+    
+    async def close_all(self, code: int = 1001, reason: str = "Server shutting down"):
+        """Close every WebSocket and end every SSE stream and long-poll."""
+        for client in list(self.clients):
+            try:
+                await client.close(code=code, reason=reason)
+            except Exception as e:
+                logger.debug("Error closing WebSocket client: %s", e)
+            await self.disconnect(client)
+        
+        for subscriber in list(self.subscribers):
+            subscriber.overflowed = True
+            try:
+                # Wake the stream so it ends now rather than at the next keepalive
+                subscriber.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+            self.unsubscribe(subscriber)
+        
+        for waiter in self.poll_waiters:
+            if not waiter.done():
+                waiter.set_result(False)
+        self.poll_waiters.clear()
+    
+    def subscribe(self) -> StreamSubscriber:
+        """
+        Register a Server-Sent Events client.
+        
+        Returns:
+            StreamSubscriber: Subscriber whose queue receives every fanned-out notification
+        """
+        subscriber = StreamSubscriber()
+        self.subscribers.append(subscriber)
+        subscriber.upto = self.event_log.last_seq
+        return subscriber
+    
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        """Remove a Server-Sent Events client."""
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+    
+    async def wait_for_events(self, timeout: float) -> bool:
+        """
+        Wait until the next notification is fanned out.
+        
+        Returns:
+            bool: True if a notification arrived, False on timeout
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self.poll_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self.poll_waiters:
+                self.poll_waiters.remove(waiter)
+    
+    async def broadcast(self, notification: Notification):
+        """Record a notification in the event log and broadcast it to all connected clients."""
+        await self.event_log.append(notification)
+        await self.fanout(notification)
+    
+    async def fanout(self, notification: Notification):
+        """Send a notification frame to all connected clients without recording it in the event log."""
+        with span("notification.fanout", NOTIFICATION_FANOUT_SECONDS):
+            await self._fanout(notification)
+    
+    async def _fanout(self, notification: Notification):
+        # Wake long-poll requests; they read what they missed from the event log
+        for waiter in self.poll_waiters:
+            if not waiter.done():
+                waiter.set_result(True)
+        self.poll_waiters.clear()
+        
+        # Hand the notification to Server-Sent Events clients without blocking
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(notification)
+            except asyncio.QueueFull:
+                # Drop slow consumers; they resume from Last-Event-ID on reconnect
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+        
+        logger.debug("Broadcasting %s notification seq=%s to %d clients", notification.type, notification.seq, len(self.clients))
+        
+        # Payloads are encoded once per wire format and shared between clients
+        for client in list(self.clients):
+            try:
+                payload = encode_notification(notification, self.encodings.get(client, JSON))
+                await send_payload(client, payload)
+            except Exception as e:
+                NOTIFICATION_SEND_ERRORS.inc()
+                log_sampled(logger, logging.WARNING, send_error_sampler, "Error broadcasting to client: %s", e)
                 # Remove client if sending fails
                 await self.disconnect(client)
 
-# Create connection manager instance
-manager = ConnectionManager()
+# Connection manager, batcher and event log of the running app
+manager = ContextProxy("manager")
+batcher = ContextProxy("batcher")
 
 async def broadcast_new_user(email: str):
     """Broadcast a notification about a new user."""
-    logger.info(f"========== BROADCAST NEW USER ==========")
-    logger.info(f"Broadcasting new user notification for email: {email}")
-    logger.info(f"Current number of connected WebSocket clients: {len(connected_clients)}")
-    
-    # Debug: print client details
-    if connected_clients:
-        for i, client in enumerate(connected_clients):
-            logger.info(f"Connected client {i+1}: {client}")
-    else:
-        logger.warning("No WebSocket clients are currently connected!")
-    
     notification = Notification(
         type="NEW_USER",
         message="A new user has registered",
         data={"email": email}
     )
     
-    logger.info(f"Created notification object: {notification.dict()}")
-    await manager.broadcast(notification)
-    logger.info("Broadcast operation completed")
-    logger.info(f"========== END BROADCAST ==========")
+    if batcher.enabled:
+        await batcher.add(notification)
+    else:
+        await manager.broadcast(notification)
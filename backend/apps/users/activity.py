@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import DateTime, bindparam, func
+
+from apps.users.models import users
+from common.context import ContextProxy
+from common.metrics import Counter, Gauge, Histogram
+from common.statements import register
+from config.database import database
+from config.settings import (
+    ACTIVITY_TRACKING_ENABLED,
+    ACTIVITY_FLUSH_SECONDS,
+    ACTIVITY_SEEN_RESOLUTION_SECONDS,
+    ACTIVITY_MAX_PENDING,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Activity updates by outcome (buffered, coalesced, skipped, written, failed)
+USER_ACTIVITY_UPDATES = Counter("user_activity_updates", "Last login and last seen updates", ["result"])
+USER_ACTIVITY_FLUSH_SECONDS = Histogram("user_activity_flush_seconds", "Time spent writing one batch of activity updates")
+Gauge("user_activity_pending", "Users with activity not written yet", function=lambda: activity_tracker.pending)
+
+# Never moves a timestamp backwards, and leaves last_login_at alone when only
+# last_seen_at changed; version is not bumped, this is not a change to sync
+_login_at = bindparam("login_at", type_=DateTime())
+_seen_at = bindparam("seen_at", type_=DateTime())
+UPDATE_ACTIVITY = register("update_user_activity", users.update().where(users.c.id == bindparam("user_id")).values(
+    last_login_at=func.coalesce(func.max(func.coalesce(users.c.last_login_at, _login_at), _login_at), users.c.last_login_at),
+    last_seen_at=func.max(func.coalesce(users.c.last_seen_at, _seen_at), _seen_at),
+))
+
+class ActivityTracker:
+    """
+    Write-behind buffer for users' last login and last seen times.
+
+    Logins and requests only update an in-memory map of user id to latest
+    timestamps; a background task writes the map every `flush_seconds`, one
+    UPDATE per user in a single transaction, however many requests the user
+    made in between. Larger intervals mean fewer writes and staler values.
+    A user's last seen time is also written at most once per
+    `seen_resolution_seconds`; logins are always written. Pending updates
+    are written when the app stops, so only a crash loses them.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = ACTIVITY_TRACKING_ENABLED,
+        flush_seconds: float = ACTIVITY_FLUSH_SECONDS,
+        seen_resolution_seconds: float = ACTIVITY_SEEN_RESOLUTION_SECONDS,
+        max_pending: int = ACTIVITY_MAX_PENDING,
+    ):
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.seen_resolution = seen_resolution_seconds
+        self.max_pending = max_pending
+        # user id -> [last login or None, last seen]
+        self._pending: Dict[int, list] = {}
+        # user id -> monotonic time its last seen update was buffered, oldest first
+        self._seen_at: Dict[int, float] = {}
+        # Created on first use so they belong to the running event loop
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _init_sync(self):
+        if self._flush_lock is None:
+            self._wake = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of users with activity not written yet."""
+        return len(self._pending)
+
+    def login(self, user_id: int):
+        """Record a login, which also counts as being seen."""
+        if self.enabled:
+            self._buffer(user_id, datetime.utcnow(), login=True)
+
+    def seen(self, user_id: int):
+        """Record an authenticated request or connection."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if user_id not in self._pending:
+            last = self._seen_at.get(user_id)
+            if last is not None and now - last < self.seen_resolution:
+                USER_ACTIVITY_UPDATES.labels(result="skipped").inc()
+                return
+        self._buffer(user_id, datetime.utcnow(), login=False)
+
+    def _buffer(self, user_id: int, at: datetime, login: bool):
+        entry = self._pending.get(user_id)
+        if entry is None:
+            self._pending[user_id] = [at if login else None, at]
+            USER_ACTIVITY_UPDATES.labels(result="buffered").inc()
+        else:
+            if login:
+                entry[0] = at
+            entry[1] = at
+            USER_ACTIVITY_UPDATES.labels(result="coalesced").inc()
+
+        # Re-inserting keeps the dict ordered by time, oldest first
+        self._seen_at.pop(user_id, None)
+        self._seen_at[user_id] = time.monotonic()
+        while len(self._seen_at) > self.max_pending:
+            del self._seen_at[next(iter(self._seen_at))]
+
+        if len(self._pending) >= self.max_pending and self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        """Start the background writer."""
+        if self.enabled and self._writer is None:
+            self._init_sync()
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and write whatever is still pending."""
+        if self._writer is not None:
+            # Not cancelled, which could lose a batch being written
+            self._stopping = True
+            self._wake.set()
+            await self._writer
+            self._writer = None
+            self._stopping = False
+        await self.flush()
+        if self._pending:
+            logger.warning("Shutting down with activity of %d users not written", len(self._pending))
+
+    async def _run(self):
+        """Flush every interval, or early once too many users are pending."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Error writing user activity: %s", e)
+
+    async def flush(self) -> int:
+        """
+        Write all pending activity in one transaction.
+
+        If the write fails the updates are merged back into the buffer, keeping
+        anything newer recorded meanwhile, and retried on the next flush.
+
+        Returns:
+            int: Number of users updated
+        """
+        self._init_sync()
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            try:
+                async with database.transaction():
+                    for user_id, (login_at, seen_at) in batch.items():
+                        await database.execute(UPDATE_ACTIVITY.bind(user_id=user_id, login_at=login_at, seen_at=seen_at))
+            except Exception as e:
+                for user_id, (login_at, seen_at) in batch.items():
+                    entry = self._pending.setdefault(user_id, [login_at, seen_at])
+                    if entry[0] is None:
+                        entry[0] = login_at
+                USER_ACTIVITY_UPDATES.labels(result="failed").inc(len(batch))
+                logger.error("Could not write activity of %d users: %s", len(batch), e)
+                return 0
+            USER_ACTIVITY_FLUSH_SECONDS.observe(time.perf_counter() - start)
+            USER_ACTIVITY_UPDATES.labels(result="written").inc(len(batch))
+            return len(batch)
+
+# Activity tracker of the active app context
+activity_tracker = ContextProxy("activity")
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+import sqlalchemy
+from fastapi import Request
+
+from apps.users.models import auth_audit_events
+from common.context import ContextProxy
+from common.metrics import Counter, Gauge, Histogram
+from config.database import database
+from config.settings import (
+    AUDIT_LOG_ENABLED,
+    AUDIT_FLUSH_INTERVAL_MS,
+    AUDIT_BATCH_SIZE,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_OVERFLOW_POLICY,
+    AUDIT_BLOCK_TIMEOUT_MS,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Audited events
+LOGIN = "login"
+LOGIN_FAILED = "login_failed"
+REGISTER = "register"
+EMAIL_VERIFIED = "email_verified"
+EMAIL_VERIFICATION_FAILED = "email_verification_failed"
+PASSWORD_RESET_REQUESTED = "password_reset_requested"
+PASSWORD_RESET = "password_reset"
+PASSWORD_RESET_FAILED = "password_reset_failed"
+
+# What to do with a new event when the queue is full
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+# Audit events by outcome (queued, dropped, block_timeout, written, failed)
+AUDIT_EVENTS = Counter("audit_events", "Auth audit events", ["result"])
+AUDIT_FLUSH_SECONDS = Histogram("audit_flush_seconds", "Time spent writing one batch of audit events")
+Gauge("audit_queue_depth", "Audit events waiting to be written", function=lambda: audit_log.pending)
+
+# SQLite allows 999 bound variables per statement in older versions
+_ROWS_PER_INSERT = 999 // (len(auth_audit_events.c) - 1)
+
+def client_ip(request: Request) -> Optional[str]:
+    """Address of the client that sent a request."""
+    return request.client.host if request.client else None
+
+class AuditLog:
+    """
+    Append-only log of authentication events, written with group commit.
+
+    `record` only queues an event in memory. A background writer drains the
+    queue every `flush_interval_ms`, or as soon as `batch_size` events are
+    waiting, writing each batch with multi-row INSERTs in one transaction, so
+    a burst of logins costs a few writes instead of one per login. When the
+    queue is full, `overflow` decides between dropping the oldest queued
+    event, dropping the new one, or making the caller wait for the writer.
+    A caller waits at most `block_timeout_ms`, and not at all while the
+    writer is not running; the oldest event is dropped instead. Events
+    still queued are written when the app stops.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = AUDIT_LOG_ENABLED,
+        flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        max_queue: int = AUDIT_QUEUE_SIZE,
+        overflow: str = AUDIT_OVERFLOW_POLICY,
+        block_timeout_ms: int = AUDIT_BLOCK_TIMEOUT_MS,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy {overflow!r}; use one of {', '.join(OVERFLOW_POLICIES)}")
+        self.enabled = enabled
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.block_timeout = block_timeout_ms / 1000
+        self._queue: Deque[dict] = deque()
+        # Created on first use so they belong to the running event loop
+        self._wake: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _init_sync(self):
+        if self._flush_lock is None:
+            self._wake = asyncio.Event()
+            self._space = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of events not written yet."""
+        return len(self._queue)
+
+    async def record(
+        self,
+        event: str,
+        user_id: Optional[int] = None,
+        email: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        detail: Optional[str] = None,
+    ):
+        """Queue an event; returns at once unless the queue is full and the policy is to block."""
+        if not self.enabled:
+            return
+
+        self._init_sync()
+        if len(self._queue) >= self.max_queue:
+            if self.overflow == DROP_NEWEST:
+                AUDIT_EVENTS.labels(result="dropped").inc()
+                return
+            if self.overflow == BLOCK and not await self._wait_for_space():
+                AUDIT_EVENTS.labels(result="block_timeout").inc()
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                AUDIT_EVENTS.labels(result="dropped").inc()
+
+        self._queue.append({
+            "created_at": datetime.utcnow(),
+            "event": event,
+            "user_id": user_id,
+            "email": email,
+            "ip_address": ip_address,
+            "detail": detail,
+        })
+        AUDIT_EVENTS.labels(result="queued").inc()
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    async def _wait_for_space(self) -> bool:
+        """Wait for the writer to make room; False if it is not running or took too long."""
+        if self._writer is None or self._writer.done() or self._stopping:
+            return False
+        self._wake.set()
+        deadline = time.monotonic() + self.block_timeout
+        while len(self._queue) >= self.max_queue:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._space.clear()
+            try:
+                await asyncio.wait_for(self._space.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def start(self):
+        """Start the background writer."""
+        if self.enabled and self._writer is None:
+            self._init_sync()
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and write whatever is still queued."""
+        if self._writer is not None:
+            # Not cancelled, which could lose a batch being written
+            self._stopping = True
+            self._wake.set()
+            await self._writer
+            self._writer = None
+            self._stopping = False
+        await self.flush()
+        if self._queue:
+            logger.warning("Shutting down with %d audit events not written", len(self._queue))
+
+    async def _run(self):
+        """Flush every interval, or early once a batch is waiting."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Error writing audit events: %s", e)
+
+    async def flush(self) -> int:
+        """
+        Write every queued event now, `batch_size` events per transaction.
+
+        A batch that fails is put back at the front of the queue, as far as
+        there is room, and retried on the next flush.
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        self._init_sync()
+        async with self._flush_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._space.set()
+                start = time.perf_counter()
+                try:
+                    async with database.transaction():
+                        for i in range(0, len(batch), _ROWS_PER_INSERT):
+                            await database.execute(auth_audit_events.insert().values(batch[i:i + _ROWS_PER_INSERT]))
+                except Exception as e:
+                    room = max(self.max_queue - len(self._queue), 0)
+                    requeue = batch[-room:] if room else []
+                    self._queue.extendleft(reversed(requeue))
+                    AUDIT_EVENTS.labels(result="failed").inc(len(batch) - len(requeue))
+                    logger.error("Could not write %d audit events: %s", len(batch), e)
+                    break
+                AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - start)
+                AUDIT_EVENTS.labels(result="written").inc(len(batch))
+                written += len(batch)
+        return written
+
+def audit_filters(
+    event: Optional[str] = None,
+    user_id: Optional[int] = None,
+    email: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> list:
+    """Build WHERE clauses for querying audit events."""
+    clauses = []
+    if event is not None:
+        clauses.append(auth_audit_events.c.event == event)
+    if user_id is not None:
+        clauses.append(auth_audit_events.c.user_id == user_id)
+    if email is not None:
+        clauses.append(auth_audit_events.c.email == email)
+    if created_from is not None:
+        clauses.append(auth_audit_events.c.created_at >= created_from)
+    if created_to is not None:
+        clauses.append(auth_audit_events.c.created_at < created_to)
+    return clauses
+
+def list_events_query(limit: int, after: Optional[Tuple[datetime, int]] = None, **filters):
+    """
+    Query a page of audit events ordered by (created_at, id).
+
+    Args:
+        limit: Maximum number of rows
+        after: (created_at, id) of the last row of the previous page
+        **filters: Arguments for `audit_filters`
+    """
+    clauses = audit_filters(**filters)
+    if after is not None:
+        clauses.append(
+            sqlalchemy.tuple_(auth_audit_events.c.created_at, auth_audit_events.c.id) > sqlalchemy.tuple_(*after)
+        )
+    query = auth_audit_events.select()
+    for clause in clauses:
+        query = query.where(clause)
+    return query.order_by(auth_audit_events.c.created_at, auth_audit_events.c.id).limit(limit)
+
+async def list_events(limit: int, after: Optional[Tuple[datetime, int]] = None, **filters) -> List:
+    """
+    Get a page of written audit events.
+
+    Queued events are not flushed first, which would cost a write per query;
+    they show up once the writer's next flush, within `flush_interval_ms`.
+    """
+    return await database.fetch_all(list_events_query(limit, after, **filters))
+
+# Audit log of the active app context
+audit_log = ContextProxy("audit")
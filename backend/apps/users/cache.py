@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from apps.users import serializers
+from common.context import ContextProxy
+from common.metrics import Counter
+from config.settings import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES
+
+# Cache lookups by result (hit/miss)
+USER_CACHE_REQUESTS = Counter("user_cache_requests", "Serialized user response cache lookups", ["result"])
+
+class CachedUser(NamedTuple):
+    """Serialized `User` response and its entity tag."""
+
+    etag: str
+    body: bytes
+    expires: float
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an `If-None-Match` header matches `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class UserResponseCache:
+    """
+    LRU cache of serialized `User` responses keyed by user id.
+
+    Entries are dropped by `invalidate` whenever crud updates the row. The TTL
+    bounds how stale an entry can get when the row is changed by another
+    process (a second worker, or a maintenance script).
+    """
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl_seconds: int = USER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[int, CachedUser]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        """Return the cached response for a user, if present and fresh."""
+        entry = self._entries.get(user_id)
+        if entry is None or entry.expires < time.monotonic():
+            USER_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+        self._entries.move_to_end(user_id)
+        USER_CACHE_REQUESTS.labels(result="hit").inc()
+        return entry
+
+    def set(self, user) -> CachedUser:
+        """Serialize a user row, cache it and return the entry."""
+        body = serializers.user(user)
+        etag = '"{}-{}"'.format(user["id"], user["version"])
+        entry = CachedUser(etag, body, time.monotonic() + self.ttl)
+        if self.ttl > 0:
+            self._entries[user["id"]] = entry
+            self._entries.move_to_end(user["id"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id: int):
+        """Drop the cached response for a user."""
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every cached response."""
+        self._entries.clear()
+
+# User response cache of the active app context
+user_cache = ContextProxy("user_cache")
@@ -0,0 +1,135 @@
+import logging
+import time
+from typing import Dict
+
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from apps.users.models import email_cooldowns
+from common.context import ContextProxy
+from common.metrics import Counter
+from common.statements import register
+from config.database import database
+from config.settings import EMAIL_COOLDOWN_SECONDS, EMAIL_COOLDOWN_MAX_ENTRIES, EMAIL_COOLDOWN_PERSIST
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Email kinds with their own cooldown
+VERIFICATION = "verification"
+PASSWORD_RESET = "password_reset"
+
+# Send attempts by kind and outcome (claimed, suppressed)
+EMAIL_COOLDOWN_REQUESTS = Counter("email_cooldown_requests", "Per-recipient email send attempts", ["kind", "result"])
+
+# How many claims happen between purges of expired entries
+PURGE_INTERVAL = 1000
+
+GET_COOLDOWN = register(
+    "email_cooldown.get",
+    email_cooldowns.select().where(email_cooldowns.c.key == bindparam("key")),
+)
+# SQLite-only upsert (INSERT ... ON CONFLICT DO UPDATE)
+_upsert_cooldown = sqlite_insert(email_cooldowns).values(key=bindparam("new_key"), expires_at=bindparam("new_expires_at"))
+SET_COOLDOWN = register(
+    "email_cooldown.set",
+    _upsert_cooldown.on_conflict_do_update(
+        index_elements=["key"], set_={"expires_at": _upsert_cooldown.excluded.expires_at}
+    ),
+)
+DELETE_COOLDOWN = register(
+    "email_cooldown.delete",
+    email_cooldowns.delete().where(email_cooldowns.c.key == bindparam("key")),
+)
+PURGE_COOLDOWNS = register(
+    "email_cooldown.purge",
+    email_cooldowns.delete().where(email_cooldowns.c.expires_at <= bindparam("now")),
+)
+
+class RecipientCooldown:
+    """
+    Rate limit for emails to one recipient: at most one of each kind per window.
+
+    State is an expiring map of "<kind>:<recipient>" to the Unix time the
+    cooldown ends, so checking a recipient in cooldown costs a dict lookup.
+    With persistence enabled the map is also written to the `email_cooldowns`
+    table and read through on a miss, so cooldowns survive restarts and are
+    shared, on a best-effort basis, between workers. Persistence uses SQLite's
+    INSERT ... ON CONFLICT, so it needs a SQLite DATABASE_URL.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = EMAIL_COOLDOWN_SECONDS,
+        max_entries: int = EMAIL_COOLDOWN_MAX_ENTRIES,
+        persist: bool = EMAIL_COOLDOWN_PERSIST,
+    ):
+        self.window = window_seconds
+        self.max_entries = max_entries
+        self.persist = persist
+        self._until: Dict[str, float] = {}
+        self._claims_since_purge = 0
+
+    async def claim(self, kind: str, recipient: str) -> bool:
+        """
+        Reserve the right to email `recipient` now.
+
+        Returns:
+            bool: True if the caller should send; False while a previous send's
+                cooldown is still running
+        """
+        key = f"{kind}:{recipient.lower()}"
+        now = time.time()
+        until = self._until.get(key)
+        if until is not None and until > now:
+            EMAIL_COOLDOWN_REQUESTS.labels(kind=kind, result="suppressed").inc()
+            return False
+
+        # Claimed in memory before any await, so concurrent requests see it
+        self._set(key, now + self.window)
+
+        if self.persist:
+            try:
+                row = await database.fetch_one(GET_COOLDOWN.bind(key=key))
+                if row is not None and row["expires_at"] > now:
+                    self._set(key, row["expires_at"])
+                    EMAIL_COOLDOWN_REQUESTS.labels(kind=kind, result="suppressed").inc()
+                    return False
+                await database.execute(SET_COOLDOWN.bind(new_key=key, new_expires_at=now + self.window))
+            except Exception:
+                # Not claimed after all, or the recipient would be locked out for the window
+                self._until.pop(key, None)
+                raise
+
+        EMAIL_COOLDOWN_REQUESTS.labels(kind=kind, result="claimed").inc()
+        self._claims_since_purge += 1
+        if self._claims_since_purge >= PURGE_INTERVAL:
+            self._claims_since_purge = 0
+            await self._purge(now)
+        return True
+
+    async def release(self, kind: str, recipient: str):
+        """Give a claim back when nothing was sent, so the next request may send."""
+        key = f"{kind}:{recipient.lower()}"
+        self._until.pop(key, None)
+        if self.persist:
+            await database.execute(DELETE_COOLDOWN.bind(key=key))
+
+    def _set(self, key: str, until: float):
+        # Re-inserting keeps the dict ordered by claim time, oldest first
+        self._until.pop(key, None)
+        self._until[key] = until
+        while len(self._until) > self.max_entries:
+            del self._until[next(iter(self._until))]
+
+    async def _purge(self, now: float):
+        """Drop expired entries from memory and, when persisted, from the table."""
+        expired = [key for key, until in self._until.items() if until <= now]
+        for key in expired:
+            del self._until[key]
+        if self.persist:
+            await database.execute(PURGE_COOLDOWNS.bind(now=now))
+        logger.debug("Purged %d expired email cooldowns", len(expired))
+
+# Cooldowns of the active app context
+email_cooldown = ContextProxy("email_cooldown")
@@ -1,49 +1,229 @@
 import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 import logging
 
+import sqlalchemy
+from sqlalchemy import bindparam, func
+
+from apps.users import tokens
+from apps.users.cache import user_cache
 from apps.users.models import users
+from common.metrics import Histogram
+from common.statements import register
+from common.tracing import span
 from config.database import database
-from config.security import get_password_hash, verify_password
-from config.settings import VERIFICATION_TOKEN_EXPIRE_HOURS, RESET_PASSWORD_TOKEN_EXPIRE_HOURS
+from config.security import get_password_hash_async, verify_and_update_password_async
+from config.settings import (
+    VERIFICATION_TOKEN_EXPIRE_HOURS,
+    RESET_PASSWORD_TOKEN_EXPIRE_HOURS,
+    EMAIL_TOKEN_REUSE_MIN_SECONDS,
+    STATELESS_EMAIL_TOKENS,
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Database query latency
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "Time spent in database queries", ["query"])
+
+def _reusable(token: Optional[str], expires: Optional[datetime]) -> bool:
+    """Whether a stored token stays valid long enough to be emailed again."""
+    return bool(token) and expires is not None and expires > datetime.utcnow() + timedelta(seconds=EMAIL_TOKEN_REUSE_MIN_SECONDS)
+
+def _bump_version() -> dict:
+    """
+    Column values marking a row as changed.
+    
+    `version` is one more than the highest version in the table, computed in
+    the same statement so it stays monotonic across the whole table.
+    `updated_at` is bound as `changed_at` when the statement runs.
+    """
+    next_version = sqlalchemy.select([func.coalesce(func.max(users.c.version), 0) + 1]).scalar_subquery()
+    return {"version": next_version, "updated_at": bindparam("changed_at")}
+
+# Statements compiled once and reused with new values; bind parameters in
+# VALUES and SET clauses are prefixed with new_ since column names are reserved there
+GET_USER_BY_EMAIL = register("get_user_by_email", users.select().where(users.c.email == bindparam("email")))
+GET_USER = register("get_user", users.select().where(users.c.id == bindparam("user_id")))
+CREATE_USER = register("create_user", users.insert().values(
+    email=bindparam("new_email"),
+    created_at=bindparam("new_created_at"),
+    hashed_password=bindparam("new_hashed_password"),
+    is_verified=bindparam("new_is_verified"),
+    verification_token=bindparam("new_verification_token"),
+    verification_token_expires=bindparam("new_verification_token_expires"),
+    **_bump_version()
+))
+GET_USER_CHANGES = register("get_user_changes", (
+    users.select()
+    .where(users.c.version > bindparam("since"))
+    .order_by(users.c.version)
+    .limit(bindparam("limit"))
+))
+UPDATE_PASSWORD_HASH = register("update_password_hash", users.update().where(users.c.id == bindparam("user_id")).values(
+    hashed_password=bindparam("new_hashed_password"),
+    **_bump_version()
+))
+VERIFY_EMAIL_LOOKUP = register("verify_email.lookup", users.select().where(users.c.verification_token == bindparam("token")))
+VERIFY_EMAIL_RECENT = register("verify_email.recent", users.select().where(
+    (users.c.is_verified == True) &
+    (users.c.verification_token.is_(None))
+))
+VERIFY_EMAIL_UPDATE = register("verify_email.update", users.update().where(users.c.id == bindparam("user_id")).values(
+    is_verified=True,
+    verification_token=None,
+    verification_token_expires=None,
+    **_bump_version()
+))
+VERIFICATION_TOKEN_UPDATE = register("verification_token.update", users.update().where(users.c.id == bindparam("user_id")).values(
+    verification_token=bindparam("new_token"),
+    verification_token_expires=bindparam("new_expires"),
+    **_bump_version()
+))
+RESET_TOKEN_UPDATE = register("reset_token.update", users.update().where(users.c.id == bindparam("user_id")).values(
+    reset_password_token=bindparam("new_token"),
+    reset_password_token_expires=bindparam("new_expires"),
+    **_bump_version()
+))
+RESET_PASSWORD_LOOKUP = register("reset_password.lookup", users.select().where(users.c.reset_password_token == bindparam("token")))
+RESET_PASSWORD_UPDATE = register("reset_password.update", users.update().where(users.c.id == bindparam("user_id")).values(
+    hashed_password=bindparam("new_hashed_password"),
+    reset_password_token=None,
+    reset_password_token_expires=None,
+    **_bump_version()
+))
+
 async def get_user_by_email(email: str) -> Optional[dict]:
     """Get user by email."""
-    query = users.select().where(users.c.email == email)
-    return await database.fetch_one(query)
+    query = GET_USER_BY_EMAIL.bind(email=email)
+    with span("db.get_user_by_email", DB_QUERY_SECONDS.labels(query="get_user_by_email")):
+        return await database.fetch_one(query)
 
 async def create_user(email: str, password: str, is_verified: bool = False) -> dict:
     """Create a new user."""
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     
-    # Generate verification token if user is not pre-verified
+    # Generate verification token if user is not pre-verified; signed tokens
+    # are issued when the email is sent and nothing is stored
     verification_token = None
     verification_token_expires = None
     
-    if not is_verified:
+    if not is_verified and not STATELESS_EMAIL_TOKENS:
         verification_token = secrets.token_urlsafe(32)
         verification_token_expires = datetime.utcnow() + timedelta(hours=VERIFICATION_TOKEN_EXPIRE_HOURS)
     
-    query = users.insert().values(
-        email=email,
-        hashed_password=hashed_password,
-        is_verified=is_verified,
-        verification_token=verification_token,
-        verification_token_expires=verification_token_expires
+    # Set in Python rather than by the database so every row stores the same
+    # timestamp format, which keyset comparisons on created_at rely on
+    now = datetime.utcnow()
+    query = CREATE_USER.bind(
+        new_email=email,
+        new_created_at=now,
+        new_hashed_password=hashed_password,
+        new_is_verified=is_verified,
+        new_verification_token=verification_token,
+        new_verification_token_expires=verification_token_expires,
+        changed_at=now,
     )
-    user_id = await database.execute(query)
+    with span("db.create_user", DB_QUERY_SECONDS.labels(query="create_user")):
+        user_id = await database.execute(query)
     
     # Fetch and return the created user
     return await get_user(user_id)
 
+def verification_token(user) -> Optional[str]:
+    """Token to email to a new user: the stored one, or a signed one in stateless mode."""
+    if user["is_verified"]:
+        return None
+    if STATELESS_EMAIL_TOKENS:
+        return tokens.issue(tokens.VERIFY_EMAIL, user, timedelta(hours=VERIFICATION_TOKEN_EXPIRE_HOURS))
+    return user["verification_token"]
+
 async def get_user(user_id: int) -> Optional[dict]:
     """Get user by ID."""
-    query = users.select().where(users.c.id == user_id)
-    return await database.fetch_one(query)
+    query = GET_USER.bind(user_id=user_id)
+    with span("db.get_user", DB_QUERY_SECONDS.labels(query="get_user")):
+        return await database.fetch_one(query)
+
+async def get_user_changes(since: int, limit: int) -> List:
+    """Get users changed after version `since`, oldest change first."""
+    query = GET_USER_CHANGES.bind(since=since, limit=limit)
+    with span("db.get_user_changes", DB_QUERY_SECONDS.labels(query="get_user_changes")):
+        return await database.fetch_all(query)
+
+def user_filters(
+    verified: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    email_prefix: Optional[str] = None,
+) -> list:
+    """Build WHERE clauses for listing users."""
+    clauses = []
+    if verified is not None:
+        clauses.append(users.c.is_verified == verified)
+    if created_from is not None:
+        clauses.append(users.c.created_at >= created_from)
+    if created_to is not None:
+        clauses.append(users.c.created_at < created_to)
+    if email_prefix:
+        # A range rather than LIKE, so SQLite can use the email index
+        clauses.append(users.c.email >= email_prefix)
+        clauses.append(users.c.email < email_prefix + "\uffff")
+    return clauses
+
+def list_users_query(limit: int, after: Optional[Tuple[datetime, int]] = None, **filters):
+    """
+    Query a page of users ordered by (created_at, id).
+    
+    Args:
+        limit: Maximum number of rows
+        after: (created_at, id) of the last row of the previous page
+        **filters: Arguments for `user_filters`
+    """
+    clauses = user_filters(**filters)
+    if after is not None:
+        clauses.append(sqlalchemy.tuple_(users.c.created_at, users.c.id) > sqlalchemy.tuple_(*after))
+    query = users.select()
+    for clause in clauses:
+        query = query.where(clause)
+    return query.order_by(users.c.created_at, users.c.id).limit(limit)
+
+async def iterate_users(chunk_size: int = 1000, **filters) -> AsyncIterator:
+    """
+    Yield every matching user in (created_at, id) order.
+    
+    Reads one keyset page at a time, so memory stays constant and no read
+    transaction is held open between chunks.
+    """
+    after = None
+    while True:
+        with span("db.iterate_users", DB_QUERY_SECONDS.labels(query="iterate_users")):
+            rows = await database.fetch_all(list_users_query(chunk_size, after, **filters))
+        for row in rows:
+            yield row
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+async def get_user_chunk(limit: int, after_id: int = 0, **filters) -> List:
+    """Get the next `limit` matching users with id above `after_id`, in id order."""
+    query = users.select().where(users.c.id > after_id)
+    for clause in user_filters(**filters):
+        query = query.where(clause)
+    query = query.order_by(users.c.id).limit(limit)
+    with span("db.get_user_chunk", DB_QUERY_SECONDS.labels(query="get_user_chunk")):
+        return await database.fetch_all(query)
+
+async def delete_users(user_ids: List[int]) -> int:
+    """Delete users by id. Returns the number of ids given."""
+    if not user_ids:
+        return 0
+    query = users.delete().where(users.c.id.in_(user_ids))
+    with span("db.delete_users", DB_QUERY_SECONDS.labels(query="delete_users")):
+        await database.execute(query)
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    return len(user_ids)
 
 async def authenticate_user(email: str, password: str) -> Optional[dict]:
     """Authenticate a user by email and password."""
@@ -52,16 +232,30 @@ async def authenticate_user(email: str, password: str) -> Optional[dict]:
     if not user:
         return None
     
-    if not verify_password(password, user["hashed_password"]):
+    verified, new_hash = await verify_and_update_password_async(password, user["hashed_password"])
+    if not verified:
         return None
     
     # Check if user is verified
     if not user["is_verified"]:
         return None
     
+    # Upgrade hashes made with an older scheme or cost while we have the password;
+    # not before verification, since signed verification tokens cover the hash
+    if new_hash:
+        await update_password_hash(user["id"], new_hash)
+    
     return user
 
-async def verify_email(token: str) -> Tuple[bool, str]:
+async def update_password_hash(user_id: int, hashed_password: str):
+    """Store a rehashed password for a user."""
+    query = UPDATE_PASSWORD_HASH.bind(user_id=user_id, new_hashed_password=hashed_password, changed_at=datetime.utcnow())
+    with span("db.update_password_hash", DB_QUERY_SECONDS.labels(query="update_password_hash")):
+        await database.execute(query)
+    user_cache.invalidate(user_id)
+    logger.info("Rehashed password for user %s with the current hashing policy", user_id)
+
+async def verify_email(token: str) -> Tuple[bool, str, Optional[dict]]:
     """
     Verify a user's email using the verification token.
     
@@ -69,60 +263,95 @@ async def verify_email(token: str) -> Tuple[bool, str]:
         token: Verification token
         
     Returns:
-        Tuple[bool, str]: (success, message)
+        Tuple[bool, str, Optional[dict]]: (success, message, user the token
+            belongs to, if it belongs to one)
     """
     # Add debug logging
-    logger.info(f"Verifying email with token: {token[:10]}...")
+    logger.debug("Verifying email with token: %s...", token[:10])
+    
+    if tokens.is_signed(token):
+        return await _verify_email_signed(token)
     
     # Find user with this token
-    query = users.select().where(users.c.verification_token == token)
-    user = await database.fetch_one(query)
+    query = VERIFY_EMAIL_LOOKUP.bind(token=token)
+    with span("db.verify_email.lookup", DB_QUERY_SECONDS.labels(query="verify_email.lookup")):
+        user = await database.fetch_one(query)
     
     if not user:
         # The token might have been valid but already used in a previous request
         # Check for recently verified users (within the last minute)
-        logger.info(f"Token not found, checking if it was recently used...")
+        logger.debug("Token not found, checking if it was recently used...")
         
         # Get recently verified users (we can't check by token since it's cleared after verification)
         # This is a heuristic approach since we can't know for certain which token was used
         one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-        recent_query = users.select().where(
-            (users.c.is_verified == True) & 
-            (users.c.verification_token.is_(None))
-        )
-        recent_verified_users = await database.fetch_all(recent_query)
+        recent_query = VERIFY_EMAIL_RECENT.bind()
+        with span("db.verify_email.recent", DB_QUERY_SECONDS.labels(query="verify_email.recent")):
+            recent_verified_users = await database.fetch_all(recent_query)
         
         if recent_verified_users:
-            recent_emails = [user['email'] for user in recent_verified_users]
-            logger.info(f"Found recently verified users: {', '.join(recent_emails)}")
-            return True, "Your email has already been verified. You can now log in."
+            logger.debug("Found %d recently verified users", len(recent_verified_users))
+            return True, "Your email has already been verified. You can now log in.", None
         
-        logger.warning(f"Invalid verification token: {token[:10]}... - No matching user found")
-        return False, "Invalid verification token."
+        logger.warning("Invalid verification token: %s... - No matching user found", token[:10])
+        return False, "Invalid verification token.", None
     
-    logger.info(f"Token found for user: {user['email']}")
+    logger.debug("Token found for user: %s", user["email"])
     
     # Check if token is expired
     current_time = datetime.utcnow()
     if user["verification_token_expires"] < current_time:
-        logger.warning(f"Token expired for user {user['email']}. Expired at: {user['verification_token_expires']}, Current time: {current_time}")
-        return False, "Verification token has expired."
+        logger.warning("Token expired for user %s. Expired at: %s, Current time: %s", user["email"], user["verification_token_expires"], current_time)
+        return False, "Verification token has expired.", user
     
     # Check if already verified
     if user["is_verified"]:
-        logger.info(f"User {user['email']} is already verified")
-        return True, "Email is already verified."
+        logger.debug("User %s is already verified", user["email"])
+        return True, "Email is already verified.", user
     
     # Mark user as verified and clear token
-    update_query = users.update().where(users.c.id == user["id"]).values(
-        is_verified=True,
-        verification_token=None,
-        verification_token_expires=None
-    )
-    await database.execute(update_query)
-    logger.info(f"Successfully verified user {user['email']}")
+    update_query = VERIFY_EMAIL_UPDATE.bind(user_id=user["id"], changed_at=datetime.utcnow())
+    with span("db.verify_email.update", DB_QUERY_SECONDS.labels(query="verify_email.update")):
+        await database.execute(update_query)
+    user_cache.invalidate(user["id"])
+    logger.info("Successfully verified user %s", user["email"])
+    
+    return True, "Email verification successful. You can now log in.", user
+
+async def _signed_token_user(claims: tokens.SignedToken) -> Optional[dict]:
+    """Get the user a signed token was issued to, if their email and password have not changed since."""
+    user = await get_user(claims.user_id)
+    if user and tokens.matches(claims, user):
+        return user
+    return None
+
+async def _verify_email_signed(token: str) -> Tuple[bool, str, Optional[dict]]:
+    """Verify an email with a signed token: a signature check and primary key lookups only."""
+    try:
+        claims = tokens.read(token, tokens.VERIFY_EMAIL)
+    except tokens.ExpiredToken as e:
+        logger.warning("Signed verification token expired: %s...", token[:10])
+        return False, "Verification token has expired.", await _signed_token_user(e.claims)
+    except tokens.InvalidToken:
+        logger.warning("Invalid signed verification token: %s...", token[:10])
+        return False, "Invalid verification token.", None
+    
+    user = await _signed_token_user(claims)
+    if not user:
+        logger.warning("Signed verification token %s... does not match a current user", token[:10])
+        return False, "Invalid verification token.", None
+    
+    if user["is_verified"]:
+        logger.debug("User %s is already verified", user["email"])
+        return True, "Email is already verified.", user
     
-    return True, "Email verification successful. You can now log in."
+    update_query = VERIFY_EMAIL_UPDATE.bind(user_id=user["id"], changed_at=datetime.utcnow())
+    with span("db.verify_email.update", DB_QUERY_SECONDS.labels(query="verify_email.update")):
+        await database.execute(update_query)
+    user_cache.invalidate(user["id"])
+    logger.info("Successfully verified user %s", user["email"])
+    
+    return True, "Email verification successful. You can now log in.", user
 
 async def generate_new_verification_token(email: str) -> Tuple[bool, str, Optional[str]]:
     """
@@ -142,16 +371,25 @@ async def generate_new_verification_token(email: str) -> Tuple[bool, str, Option
     if user["is_verified"]:
         return False, "Email is already verified.", None
     
+    if STATELESS_EMAIL_TOKENS:
+        token = tokens.issue(tokens.VERIFY_EMAIL, user, timedelta(hours=VERIFICATION_TOKEN_EXPIRE_HOURS))
+        return True, "New verification token generated.", token
+    
+    # Resend the current token while it is fresh; links in earlier emails keep working
+    if _reusable(user["verification_token"], user["verification_token_expires"]):
+        return True, "Verification token is still valid.", user["verification_token"]
+    
     # Generate new token
     new_token = secrets.token_urlsafe(32)
     token_expires = datetime.utcnow() + timedelta(hours=VERIFICATION_TOKEN_EXPIRE_HOURS)
     
     # Update user with new token
-    update_query = users.update().where(users.c.id == user["id"]).values(
-        verification_token=new_token,
-        verification_token_expires=token_expires
+    update_query = VERIFICATION_TOKEN_UPDATE.bind(
+        user_id=user["id"], new_token=new_token, new_expires=token_expires, changed_at=datetime.utcnow()
     )
-    await database.execute(update_query)
+    with span("db.verification_token.update", DB_QUERY_SECONDS.labels(query="verification_token.update")):
+        await database.execute(update_query)
+    user_cache.invalidate(user["id"])
     
     return True, "New verification token generated.", new_token
 
@@ -165,33 +403,43 @@ async def generate_password_reset_token(email: str) -> Tuple[bool, str, Optional
     Returns:
         Tuple[bool, str, Optional[str]]: (success, message, token)
     """
-    logger.info(f"Generating password reset token for email: {email}")
+    logger.debug("Generating password reset token for email: %s", email)
     
     user = await get_user_by_email(email)
     
     if not user:
-        logger.warning(f"Password reset requested for non-existent email: {email}")
+        logger.warning("Password reset requested for non-existent email: %s", email)
         return False, "If your email exists in our system, you will receive a password reset link.", None
     
     if not user["is_verified"]:
-        logger.warning(f"Password reset requested for unverified email: {email}")
+        logger.warning("Password reset requested for unverified email: %s", email)
         return False, "This account has not been verified. Please verify your email first.", None
     
+    if STATELESS_EMAIL_TOKENS:
+        token = tokens.issue(tokens.RESET_PASSWORD, user, timedelta(hours=RESET_PASSWORD_TOKEN_EXPIRE_HOURS))
+        return True, "Password reset link has been sent to your email.", token
+    
+    # Resend the current token while it is fresh; links in earlier emails keep working
+    if _reusable(user["reset_password_token"], user["reset_password_token_expires"]):
+        logger.debug("Reusing password reset token for user: %s", email)
+        return True, "Password reset link has been sent to your email.", user["reset_password_token"]
+    
     # Generate new token
     reset_token = secrets.token_urlsafe(32)
     token_expires = datetime.utcnow() + timedelta(hours=RESET_PASSWORD_TOKEN_EXPIRE_HOURS)
     
     # Update user with new token
-    update_query = users.update().where(users.c.id == user["id"]).values(
-        reset_password_token=reset_token,
-        reset_password_token_expires=token_expires
+    update_query = RESET_TOKEN_UPDATE.bind(
+        user_id=user["id"], new_token=reset_token, new_expires=token_expires, changed_at=datetime.utcnow()
     )
-    await database.execute(update_query)
-    logger.info(f"Password reset token generated for user: {email}")
+    with span("db.reset_token.update", DB_QUERY_SECONDS.labels(query="reset_token.update")):
+        await database.execute(update_query)
+    user_cache.invalidate(user["id"])
+    logger.debug("Password reset token generated for user: %s", email)
     
     return True, "Password reset link has been sent to your email.", reset_token
 
-async def reset_password(token: str, new_password: str) -> Tuple[bool, str]:
+async def reset_password(token: str, new_password: str) -> Tuple[bool, str, Optional[dict]]:
     """
     Reset a user's password using the reset token.
     
@@ -200,34 +448,52 @@ async def reset_password(token: str, new_password: str) -> Tuple[bool, str]:
         new_password: New password to set
         
     Returns:
-        Tuple[bool, str]: (success, message)
+        Tuple[bool, str, Optional[dict]]: (success, message, user the token
+            belongs to, if it belongs to one)
     """
-    logger.info(f"Resetting password with token: {token[:10]}...")
-    
-    # Find user with this token
-    query = users.select().where(users.c.reset_password_token == token)
-    user = await database.fetch_one(query)
-    
-    if not user:
-        logger.warning(f"Invalid password reset token: {token[:10]}... - No matching user found")
-        return False, "Invalid password reset token."
-    
-    # Check if token is expired
-    current_time = datetime.utcnow()
-    if user["reset_password_token_expires"] < current_time:
-        logger.warning(f"Password reset token expired for user {user['email']}. Expired at: {user['reset_password_token_expires']}, Current time: {current_time}")
-        return False, "Password reset token has expired."
+    logger.debug("Resetting password with token: %s...", token[:10])
+    
+    if tokens.is_signed(token):
+        # The token covers the current password hash, so it stops working once used
+        try:
+            claims = tokens.read(token, tokens.RESET_PASSWORD)
+        except tokens.ExpiredToken as e:
+            logger.warning("Signed password reset token expired: %s...", token[:10])
+            return False, "Password reset token has expired.", await _signed_token_user(e.claims)
+        except tokens.InvalidToken:
+            logger.warning("Invalid signed password reset token: %s...", token[:10])
+            return False, "Invalid password reset token.", None
+        
+        user = await _signed_token_user(claims)
+        if not user:
+            logger.warning("Signed password reset token %s... does not match a current user", token[:10])
+            return False, "Invalid password reset token.", None
+    else:
+        # Find user with this token
+        query = RESET_PASSWORD_LOOKUP.bind(token=token)
+        with span("db.reset_password.lookup", DB_QUERY_SECONDS.labels(query="reset_password.lookup")):
+            user = await database.fetch_one(query)
+        
+        if not user:
+            logger.warning("Invalid password reset token: %s... - No matching user found", token[:10])
+            return False, "Invalid password reset token.", None
+        
+        # Check if token is expired
+        current_time = datetime.utcnow()
+        if user["reset_password_token_expires"] < current_time:
+            logger.warning("Password reset token expired for user %s. Expired at: %s, Current time: %s", user["email"], user["reset_password_token_expires"], current_time)
+            return False, "Password reset token has expired.", user
     
     # Hash the new password
-    hashed_password = get_password_hash(new_password)
+    hashed_password = await get_password_hash_async(new_password)
     
     # Update user's password and clear token
-    update_query = users.update().where(users.c.id == user["id"]).values(
-        hashed_password=hashed_password,
-        reset_password_token=None,
-        reset_password_token_expires=None
+    update_query = RESET_PASSWORD_UPDATE.bind(
+        user_id=user["id"], new_hashed_password=hashed_password, changed_at=datetime.utcnow()
     )
-    await database.execute(update_query)
-    logger.info(f"Successfully reset password for user {user['email']}")
+    with span("db.reset_password.update", DB_QUERY_SECONDS.labels(query="reset_password.update")):
+        await database.execute(update_query)
+    user_cache.invalidate(user["id"])
+    logger.info("Successfully reset password for user %s", user["email"])
     
-    return True, "Password has been reset successfully. You can now log in with your new password."
+    return True, "Password has been reset successfully. You can now log in with your new password.", user
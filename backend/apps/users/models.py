@@ -1,5 +1,5 @@
 import sqlalchemy
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, func
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Index, func
 from sqlalchemy.sql import functions
 
 from config.database import Base, metadata
@@ -17,6 +17,14 @@ users = sqlalchemy.Table(
     sqlalchemy.Column("verification_token_expires", sqlalchemy.DateTime, nullable=True),
     sqlalchemy.Column("reset_password_token", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("reset_password_token_expires", sqlalchemy.DateTime, nullable=True),
+    sqlalchemy.Column("updated_at", sqlalchemy.DateTime, default=func.now()),
+    sqlalchemy.Column("version", sqlalchemy.Integer, index=True),
+    # Written behind by apps.users.activity, without bumping version
+    sqlalchemy.Column("last_login_at", sqlalchemy.DateTime, nullable=True),
+    sqlalchemy.Column("last_seen_at", sqlalchemy.DateTime, nullable=True),
+    # Keyset pagination for admin listing and export
+    sqlalchemy.Index("ix_users_created_at_id", "created_at", "id"),
+    sqlalchemy.Index("ix_users_is_verified_created_at_id", "is_verified", "created_at", "id"),
 )
 
 # SQLAlchemy ORM model
@@ -32,3 +40,71 @@ class User(Base):
     verification_token_expires = Column(DateTime, nullable=True)
     reset_password_token = Column(String, nullable=True)
     reset_password_token_expires = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=functions.now())
+    # Table-wide counter bumped on every write, for change detection
+    version = Column(Integer, index=True)
+    # Written behind by apps.users.activity, without bumping version
+    last_login_at = Column(DateTime, nullable=True)
+    last_seen_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Keyset pagination for admin listing and export
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_is_verified_created_at_id", "is_verified", "created_at", "id"),
+    )
+
+# Email cooldown table, used when EMAIL_COOLDOWN_PERSIST is enabled
+email_cooldowns = sqlalchemy.Table(
+    "email_cooldowns",
+    metadata,
+    sqlalchemy.Column("key", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("expires_at", sqlalchemy.Float, index=True),
+)
+
+# SQLAlchemy ORM model
+class EmailCooldown(Base):
+    __tablename__ = "email_cooldowns"
+    
+    # "<kind>:<recipient>"
+    key = Column(String, primary_key=True)
+    # Unix time the cooldown ends
+    expires_at = Column(Float, index=True)
+
+# Audit trail of authentication events, written in batches by apps.users.audit
+auth_audit_events = sqlalchemy.Table(
+    "auth_audit_events",
+    metadata,
+    sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True),
+    sqlalchemy.Column("created_at", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("event", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("user_id", sqlalchemy.Integer, nullable=True),
+    sqlalchemy.Column("email", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column("ip_address", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column("detail", sqlalchemy.String, nullable=True),
+    # Time-range queries, overall and narrowed by event, user or email
+    sqlalchemy.Index("ix_auth_audit_events_created_at_id", "created_at", "id"),
+    sqlalchemy.Index("ix_auth_audit_events_event_created_at", "event", "created_at"),
+    sqlalchemy.Index("ix_auth_audit_events_user_id_created_at", "user_id", "created_at"),
+    sqlalchemy.Index("ix_auth_audit_events_email_created_at", "email", "created_at"),
+)
+
+# SQLAlchemy ORM model
+class AuthAuditEvent(Base):
+    __tablename__ = "auth_audit_events"
+    
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+    # login, login_failed, register, email_verified, ...
+    event = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    email = Column(String, nullable=True)
+    ip_address = Column(String, nullable=True)
+    detail = Column(String, nullable=True)
+    
+    __table_args__ = (
+        # Time-range queries, overall and narrowed by event, user or email
+        Index("ix_auth_audit_events_created_at_id", "created_at", "id"),
+        Index("ix_auth_audit_events_event_created_at", "event", "created_at"),
+        Index("ix_auth_audit_events_user_id_created_at", "user_id", "created_at"),
+        Index("ix_auth_audit_events_email_created_at", "email", "created_at"),
+    )
@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from apps.users.views import router as user_router
+from apps.users.views import router as user_router, sync_router
 
 # Create a router for user routes
 router = APIRouter()
 
 # Include user endpoints
 router.include_router(user_router, prefix="/auth", tags=["auth"])
+router.include_router(sync_router, prefix="/users", tags=["users"])
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -108,3 +108,35 @@ class ResetPasswordRequest(BaseModel):
             }
         }
     }
+
+# Changed User Schema
+class UserChange(User):
+    version: int = Field(..., description="Row version; increases on every change to any user")
+    updated_at: datetime = Field(..., description="Timestamp of the last change")
+    last_login_at: Optional[datetime] = Field(None, description="Last login; written with a delay and without changing `version`")
+    last_seen_at: Optional[datetime] = Field(None, description="Last authenticated request or connection; written with a delay and without changing `version`")
+
+# User Changes Response Schema
+class UserChanges(BaseModel):
+    changes: List[UserChange] = Field(..., description="Users changed after `since`, oldest change first")
+    next_since: int = Field(..., description="Pass as `since` to fetch the following changes")
+    has_more: bool = Field(..., description="Whether more changes are waiting beyond this page")
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "changes": [
+                    {
+                        "id": 1,
+                        "email": "user@example.com",
+                        "created_at": "2023-06-01T12:00:00",
+                        "is_verified": True,
+                        "version": 42,
+                        "updated_at": "2023-06-01T12:05:00"
+                    }
+                ],
+                "next_since": 42,
+                "has_more": False
+            }
+        }
+    }
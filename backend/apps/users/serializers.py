@@ -0,0 +1,12 @@
+from apps.users import schemas
+from common.responses import FastJSONResponse, RowSerializer
+
+# Response serializers, compiled once at import
+user = RowSerializer(schemas.User)
+user_change = RowSerializer(schemas.UserChange)
+token = RowSerializer(schemas.Token)
+verification = RowSerializer(schemas.VerificationResponse)
+
+def verification_response(success: bool, message: str) -> FastJSONResponse:
+    """Build a `VerificationResponse` without validating it."""
+    return FastJSONResponse(verification({"success": success, "message": message}))
@@ -13,8 +13,8 @@ from config.settings import SECRET_KEY, JWT_ALGORITHM
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
-    """Get current user from JWT token."""
+def decode_user_id(token: str) -> int:
+    """Get the user id from a JWT token without touching the database."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -30,14 +30,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
             raise credentials_exception
         
         token_data = TokenPayload(sub=user_id)
-    except JWTError:
+        return int(token_data.sub)
+    except (JWTError, ValueError):
         raise credentials_exception
-    
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """Get current user id from JWT token."""
+    return decode_user_id(token)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    """Get current user from JWT token."""
     # Get user from database
-    user = await crud.get_user(int(token_data.sub))
+    user = await crud.get_user(decode_user_id(token))
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
@@ -0,0 +1,100 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import time
+from datetime import timedelta
+from typing import Mapping, NamedTuple
+
+from config.settings import SECRET_KEY
+
+# Token purposes; a token only works for the purpose it was issued for
+VERIFY_EMAIL = 1
+RESET_PASSWORD = 2
+
+# version, purpose, user id, expiry (Unix seconds), user fingerprint
+_PAYLOAD = struct.Struct(">BBQI8s")
+_VERSION = 1
+_SIGNATURE_BYTES = 16
+
+# Separate key from the one signing JWTs, derived from the same secret
+_SIGNING_KEY = hmac.new(SECRET_KEY.encode(), b"email-token-signing", hashlib.sha256).digest()
+
+class InvalidToken(Exception):
+    """Raised when a signed token is malformed, forged or issued for another purpose."""
+
+class ExpiredToken(InvalidToken):
+    """Raised when a signed token is genuine but past its expiry."""
+
+    def __init__(self, claims: "SignedToken"):
+        super().__init__()
+        self.claims = claims
+
+class SignedToken(NamedTuple):
+    """Claims of a verified token."""
+
+    purpose: int
+    user_id: int
+    expires: int
+    fingerprint: bytes
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_SIGNING_KEY, payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+def fingerprint(user: Mapping) -> bytes:
+    """
+    Short keyed digest of the user's email and password hash.
+
+    Resetting the password changes it, so a reset token works only once, and
+    tokens never outlive a change of email.
+    """
+    material = "{}\0{}".format(user["email"], user["hashed_password"]).encode()
+    return hmac.new(_SIGNING_KEY, material, hashlib.sha256).digest()[:8]
+
+def is_signed(token: str) -> bool:
+    """Whether a token is a signed one rather than a random token stored on the user row."""
+    return "." in token
+
+def issue(purpose: int, user: Mapping, lifetime: timedelta) -> str:
+    """Issue a signed token for `purpose` that expires after `lifetime`."""
+    expires = int(time.time() + lifetime.total_seconds())
+    payload = _PAYLOAD.pack(_VERSION, purpose, user["id"], expires, fingerprint(user))
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+def read(token: str, purpose: int) -> SignedToken:
+    """
+    Check a token's signature, purpose and expiry without touching the database.
+
+    The caller must still compare `fingerprint` with the user's current one.
+
+    Raises:
+        InvalidToken: If the token is malformed, forged or for another purpose
+        ExpiredToken: If the token is genuine but expired; carries its claims
+    """
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+        version, token_purpose, user_id, expires, user_fingerprint = _PAYLOAD.unpack(payload)
+    except (ValueError, binascii.Error, struct.error):
+        raise InvalidToken()
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidToken()
+    if version != _VERSION or token_purpose != purpose:
+        raise InvalidToken()
+    claims = SignedToken(token_purpose, user_id, expires, user_fingerprint)
+    if expires < time.time():
+        raise ExpiredToken(claims)
+    return claims
+
+def matches(claims: SignedToken, user: Mapping) -> bool:
+    """Whether a token was issued for the user's current email and password."""
+    return hmac.compare_digest(claims.fingerprint, fingerprint(user))
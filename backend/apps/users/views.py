@@ -1,16 +1,32 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Awaitable, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status, Query
 from fastapi.security import OAuth2PasswordRequestForm
 
 from apps.notifications.websocket import broadcast_new_user
-from apps.users import crud, schemas, services
+from apps.users import audit, crud, schemas, serializers, services
+from apps.users.activity import activity_tracker
+from apps.users.audit import audit_log, client_ip
+from apps.users.cooldown import PASSWORD_RESET, VERIFICATION, email_cooldown
+from apps.users.cache import etag_matches, user_cache
+from common.dependencies import get_current_admin
+from common.idempotency import idempotency_store
+from common.responses import FastJSONResponse
 from config.database import database
-from services.email import send_verification_email, send_password_reset_email
+from services.email import email_dispatcher, send_verification_email, send_password_reset_email
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+sync_router = APIRouter()
+
+# Idempotency-Key header accepted by endpoints that are expensive to repeat
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    description="Unique value per attempt; retries with the same key replay the first response instead of running again",
+)
 
 @router.post(
     "/register", 
@@ -24,44 +40,59 @@ router = APIRouter()
     - The password must be at least 8 characters long.
     - An email verification link will be sent to the provided email.
     - When a user is registered, a notification is sent to all connected users.
+    - Send an `Idempotency-Key` header so a retried request returns the first response.
     """
 )
-async def register_user(user_data: schemas.UserCreate):
+async def register_user(
+    request: Request, user_data: schemas.UserCreate, idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
+):
     """Register a new user."""
-    logger.info(f"Registration request received for email: {user_data.email}")
+    return await idempotency_store.run(
+        idempotency_key, "register", user_data.model_dump_json(), lambda: _register_user(user_data, client_ip(request))
+    )
+
+async def _send_claimed(kind: str, email: str, send: Awaitable[bool]) -> bool:
+    """Finish a send claimed from the cooldown, giving the claim back if nothing was sent."""
+    email_sent = False
+    try:
+        email_sent = await send
+        return email_sent
+    finally:
+        # Nothing was sent, so the next request may try again
+        if not email_sent:
+            await email_cooldown.release(kind, email)
+
+async def _register_user(user_data: schemas.UserCreate, ip_address: Optional[str]) -> Response:
+    logger.debug("Registration request received for email: %s", user_data.email)
     
     # Check if user already exists
     db_user = await crud.get_user_by_email(user_data.email)
     if db_user:
-        logger.warning(f"Registration failed - email already registered: {user_data.email}")
+        logger.warning("Registration failed - email already registered: %s", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Create new user (not verified)
-    logger.info(f"Creating new user with email: {user_data.email}")
     user = await crud.create_user(user_data.email, user_data.password, is_verified=False)
-    logger.info(f"User created successfully: {user['email']} (ID: {user['id']})")
+    logger.info("User created successfully: %s (ID: %s)", user["email"], user["id"])
+    await audit_log.record(audit.REGISTER, user_id=user["id"], email=user["email"], ip_address=ip_address)
     
-    # Send verification email
-    if user["verification_token"]:
-        logger.info(f"Sending verification email to: {user['email']}")
-        email_sent = await send_verification_email(user["email"], user["verification_token"])
-        if email_sent:
-            logger.info(f"Verification email sent successfully to: {user['email']}")
-        else:
-            logger.warning(f"Failed to send verification email to: {user['email']}")
+    # Send verification email in the background; failures are logged by the sender
+    token = crud.verification_token(user)
+    if token and await email_cooldown.claim(VERIFICATION, user["email"]):
+        email_dispatcher.submit(
+            _send_claimed(VERIFICATION, user["email"], send_verification_email(user["email"], token))
+        )
     
     # Broadcast new user notification to all connected clients
-    logger.info(f"Broadcasting new user notification for: {user['email']}")
     try:
         await broadcast_new_user(user["email"])
-        logger.info("Notification broadcast completed successfully")
     except Exception as e:
-        logger.error(f"Error broadcasting notification: {str(e)}")
+        logger.error("Error broadcasting notification: %s", e)
     
-    return user
+    return FastJSONResponse(serializers.user(user), status_code=status.HTTP_201_CREATED)
 
 @router.post(
     "/login", 
@@ -76,36 +107,61 @@ async def register_user(user_data: schemas.UserCreate):
     - Format: `Bearer {token}`
     """
 )
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """Login user and get access token."""
     # Authenticate user
     user = await crud.authenticate_user(form_data.username, form_data.password)
     if not user:
+        await audit_log.record(audit.LOGIN_FAILED, email=form_data.username, ip_address=client_ip(request))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password, or email not verified",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    await audit_log.record(audit.LOGIN, user_id=user["id"], email=user["email"], ip_address=client_ip(request))
+    activity_tracker.login(user["id"])
+    
     # Create access token
     access_token = await services.create_user_token(user["id"])
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return FastJSONResponse(serializers.token({"access_token": access_token, "token_type": "bearer"}))
 
 @router.get(
     "/me", 
     response_model=schemas.User,
+    responses={304: {"description": "User has not changed since the given ETag"}},
     summary="Get current user information",
     description="""
     Retrieve information about the currently authenticated user.
     
     - Requires authentication via Bearer token.
     - Returns user details excluding the password.
+    - The response carries an `ETag`; send it back in `If-None-Match` to get a 304 when nothing changed.
     """
 )
-async def get_user_me(current_user: dict = Depends(services.get_current_user)):
+async def get_user_me(
+    user_id: int = Depends(services.get_current_user_id),
+    if_none_match: Optional[str] = Header(None),
+):
     """Get current authenticated user."""
-    return current_user
+    activity_tracker.seen(user_id)
+    cached = user_cache.get(user_id)
+    if cached is None:
+        user = await crud.get_user(user_id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        cached = user_cache.set(user)
+    
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return FastJSONResponse(cached.body, headers=headers)
 
 @router.get(
     "/verify-email", 
@@ -118,19 +174,24 @@ async def get_user_me(current_user: dict = Depends(services.get_current_user)):
     - Once verified, the user can log in.
     """
 )
-async def verify_email(token: str = Query(..., description="Email verification token")):
+async def verify_email(request: Request, token: str = Query(..., description="Email verification token")):
     """Verify email address using token."""
-    logger.info(f"Email verification request received with token length: {len(token)}")
-    logger.info(f"Email verification token preview: {token[:10]}...")
+    logger.debug("Email verification request received with token: %s...", token[:10])
     
-    success, message = await crud.verify_email(token)
+    success, message, user = await crud.verify_email(token)
+    await audit_log.record(
+        audit.EMAIL_VERIFIED if success else audit.EMAIL_VERIFICATION_FAILED,
+        user_id=user["id"] if user else None,
+        email=user["email"] if user else None,
+        ip_address=client_ip(request),
+        detail=message,
+    )
     
     if not success:
-        logger.warning(f"Email verification failed: {message}")
-        return {"success": False, "message": message}
+        logger.warning("Email verification failed: %s", message)
+        return serializers.verification_response(False, message)
     
-    logger.info(f"Email verification successful: {message}")
-    return {"success": True, "message": message}
+    return serializers.verification_response(True, message)
 
 @router.post(
     "/resend-verification", 
@@ -141,30 +202,46 @@ async def verify_email(token: str = Query(..., description="Email verification t
     
     - A new verification token will be generated.
     - The email must exist and not be already verified.
+    - Requests within `EMAIL_COOLDOWN_SECONDS` of the last email to the address send nothing.
+    - The current token is reused while it stays valid for long enough.
+    - Send an `Idempotency-Key` header so a retried request returns the first response.
     """
 )
-async def resend_verification(email_data: schemas.UserBase):
+async def resend_verification(email_data: schemas.UserBase, idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER):
     """Resend verification email."""
-    logger.info(f"Resend verification request received for email: {email_data.email}")
+    return await idempotency_store.run(
+        idempotency_key, "resend-verification", email_data.model_dump_json(), lambda: _resend_verification(email_data)
+    )
+
+async def _resend_verification(email_data: schemas.UserBase) -> Response:
+    logger.debug("Resend verification request received for email: %s", email_data.email)
     
-    success, message, token = await crud.generate_new_verification_token(email_data.email)
+    # An email sent moments ago is not repeated; this costs no database access
+    if not await email_cooldown.claim(VERIFICATION, email_data.email):
+        return serializers.verification_response(True, "A verification email was sent recently. Please check your inbox.")
     
-    if not success:
-        logger.warning(f"Resend verification failed: {message}")
-        return {"success": False, "message": message}
-    
-    # Send verification email
-    if token:
-        logger.info(f"Sending verification email to: {email_data.email}")
-        email_sent = await send_verification_email(email_data.email, token)
-        if email_sent:
-            logger.info(f"Verification email resent successfully to: {email_data.email}")
-            return {"success": True, "message": "Verification email sent successfully."}
-        else:
-            logger.warning(f"Failed to resend verification email to: {email_data.email}")
-            return {"success": False, "message": "Failed to send verification email. Please try again later."}
-    
-    return {"success": False, "message": "Failed to generate verification token."}
+    email_sent = False
+    try:
+        success, message, token = await crud.generate_new_verification_token(email_data.email)
+        
+        if not success:
+            logger.warning("Resend verification failed: %s", message)
+            return serializers.verification_response(False, message)
+        
+        # Send verification email
+        if token:
+            email_sent = await send_verification_email(email_data.email, token)
+            if email_sent:
+                return serializers.verification_response(True, "Verification email sent successfully.")
+            else:
+                logger.warning("Failed to resend verification email to: %s", email_data.email)
+                return serializers.verification_response(False, "Failed to send verification email. Please try again later.")
+        
+        return serializers.verification_response(False, "Failed to generate verification token.")
+    finally:
+        # Nothing was sent, so the next request may try again
+        if not email_sent:
+            await email_cooldown.release(VERIFICATION, email_data.email)
 
 @router.post(
     "/forgot-password",
@@ -175,30 +252,49 @@ async def resend_verification(email_data: schemas.UserBase):
     
     - A reset link will be sent to the provided email if it exists and is verified.
     - For security reasons, a success message is always returned regardless of whether the email exists.
+    - Requests within `EMAIL_COOLDOWN_SECONDS` of the last email to the address send nothing.
+    - Send an `Idempotency-Key` header so a retried request returns the first response.
     """
 )
-async def forgot_password(email_data: schemas.ForgotPasswordRequest):
+async def forgot_password(
+    request: Request, email_data: schemas.ForgotPasswordRequest, idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
+):
     """Request password reset."""
-    logger.info(f"Password reset request received for email: {email_data.email}")
+    return await idempotency_store.run(
+        idempotency_key, "forgot-password", email_data.model_dump_json(),
+        lambda: _forgot_password(email_data, client_ip(request)),
+    )
+
+async def _forgot_password(email_data: schemas.ForgotPasswordRequest, ip_address: Optional[str]) -> Response:
+    logger.debug("Password reset request received for email: %s", email_data.email)
+    await audit_log.record(audit.PASSWORD_RESET_REQUESTED, email=email_data.email, ip_address=ip_address)
     
-    success, message, token = await crud.generate_password_reset_token(email_data.email)
+    # An email sent moments ago is not repeated; this costs no database access
+    if not await email_cooldown.claim(PASSWORD_RESET, email_data.email):
+        return serializers.verification_response(True, "Password reset link has been sent to your email.")
     
-    if not success:
-        logger.warning(f"Password reset generation failed: {message}")
-        return {"success": False, "message": message}
-    
-    # Send password reset email
-    if token:
-        logger.info(f"Sending password reset email to: {email_data.email}")
-        email_sent = await send_password_reset_email(email_data.email, token)
-        if email_sent:
-            logger.info(f"Password reset email sent successfully to: {email_data.email}")
-            return {"success": True, "message": "Password reset link has been sent to your email."}
-        else:
-            logger.warning(f"Failed to send password reset email to: {email_data.email}")
-            return {"success": False, "message": "Failed to send password reset email. Please try again later."}
-    
-    return {"success": False, "message": "Failed to generate password reset token."}
+    email_sent = False
+    try:
+        success, message, token = await crud.generate_password_reset_token(email_data.email)
+        
+        if not success:
+            logger.warning("Password reset generation failed: %s", message)
+            return serializers.verification_response(False, message)
+        
+        # Send password reset email
+        if token:
+            email_sent = await send_password_reset_email(email_data.email, token)
+            if email_sent:
+                return serializers.verification_response(True, "Password reset link has been sent to your email.")
+            else:
+                logger.warning("Failed to send password reset email to: %s", email_data.email)
+                return serializers.verification_response(False, "Failed to send password reset email. Please try again later.")
+        
+        return serializers.verification_response(False, "Failed to generate password reset token.")
+    finally:
+        # Nothing was sent, so the next request may try again
+        if not email_sent:
+            await email_cooldown.release(PASSWORD_RESET, email_data.email)
 
 @router.post(
     "/reset-password",
@@ -212,16 +308,49 @@ async def forgot_password(email_data: schemas.ForgotPasswordRequest):
     - Once the password is reset, the user can log in with the new password.
     """
 )
-async def reset_password(reset_data: schemas.ResetPasswordRequest):
+async def reset_password(request: Request, reset_data: schemas.ResetPasswordRequest):
     """Reset password with token."""
-    logger.info(f"Password reset request received with token length: {len(reset_data.token)}")
-    logger.info(f"Password reset token preview: {reset_data.token[:10]}...")
+    logger.debug("Password reset request received with token: %s...", reset_data.token[:10])
     
-    success, message = await crud.reset_password(reset_data.token, reset_data.password)
+    success, message, user = await crud.reset_password(reset_data.token, reset_data.password)
+    await audit_log.record(
+        audit.PASSWORD_RESET if success else audit.PASSWORD_RESET_FAILED,
+        user_id=user["id"] if user else None,
+        email=user["email"] if user else None,
+        ip_address=client_ip(request),
+        detail=message,
+    )
     
     if not success:
-        logger.warning(f"Password reset failed: {message}")
-        return {"success": False, "message": message}
+        logger.warning("Password reset failed: %s", message)
+        return serializers.verification_response(False, message)
+    
+    return serializers.verification_response(True, message)
+
+@sync_router.get(
+    "/changes",
+    response_model=schemas.UserChanges,
+    summary="List user changes since a version",
+    description="""
+    Incremental sync: return users created or updated after the given row version.
+    
+    - Requires an admin account (listed in `ADMIN_EMAILS`).
+    - Start with `since=0`, then pass the returned `next_since` until `has_more` is false.
+    - A user changed several times appears once, at its latest version.
+    """
+)
+async def get_user_changes(
+    since: int = Query(0, ge=0, description="Last version already seen"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of changes to return"),
+    admin: dict = Depends(get_current_admin),
+):
+    """List user changes since a version."""
+    # Fetch one extra row to tell whether another page follows
+    rows = await crud.get_user_changes(since, limit + 1)
+    changes = rows[:limit]
     
-    logger.info("Password reset successful")
-    return {"success": True, "message": message}
+    return FastJSONResponse({
+        "changes": [serializers.user_change.fields(change) for change in changes],
+        "next_since": changes[-1]["version"] if changes else since,
+        "has_more": len(rows) > limit,
+    })
@@ -0,0 +1,442 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from common.metrics import Counter, Gauge
+from config.settings import (
+    CONCURRENCY_LIMIT_ENABLED,
+    CONCURRENCY_ALGORITHM,
+    CONCURRENCY_INITIAL_LIMIT,
+    CONCURRENCY_MIN_LIMIT,
+    CONCURRENCY_MAX_LIMIT,
+    CONCURRENCY_GLOBAL_INITIAL_LIMIT,
+    CONCURRENCY_GLOBAL_MAX_LIMIT,
+    CONCURRENCY_LATENCY_TOLERANCE,
+    CONCURRENCY_QUEUE_SIZE,
+    CONCURRENCY_QUEUE_TIMEOUT_MS,
+    CONCURRENCY_RETRY_AFTER_SECONDS,
+    CONCURRENCY_ROUTE_PRIORITIES,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Priority classes, most important first
+CRITICAL = "critical"
+HIGH = "high"
+NORMAL = "normal"
+LOW = "low"
+PRIORITIES = (CRITICAL, HIGH, NORMAL, LOW)
+
+# Share of the global limit each class may fill; critical requests are never limited
+GLOBAL_SHARES = {HIGH: 1.0, NORMAL: 0.8, LOW: 0.5}
+
+# Limit algorithms
+GRADIENT = "gradient"
+AIMD = "aimd"
+
+# Route key of paths that match no route
+OTHER_ROUTE = "other"
+# Route key of the limit over all routes
+GLOBAL_ROUTE = "_global"
+
+# Priority by exact path, then by prefix; everything else is normal
+ROUTE_PRIORITIES = {
+    "/": CRITICAL,
+    "/metrics": CRITICAL,
+    "/api/auth/login": HIGH,
+    "/api/auth/me": HIGH,
+    "/api/auth/verify-email": HIGH,
+    "/api/auth/reset-password": HIGH,
+    "/api/notifications/ws": HIGH,
+    "/api/users/changes": LOW,
+}
+PREFIX_PRIORITIES = [("/api/admin/", LOW)]
+
+# Long-lived routes: admitted by priority but not held against a limit, since
+# their duration says nothing about load
+UNMETERED_ROUTES = {
+    "/api/notifications/ws",
+    "/api/notifications/stream",
+    "/api/notifications/poll",
+    "/api/admin/users/export",
+}
+
+# Concurrency limiter state, by route (GLOBAL_ROUTE for the overall limit)
+CONCURRENCY_LIMIT = Gauge("concurrency_limit", "Current adaptive concurrency limit", ["route"])
+CONCURRENCY_IN_FLIGHT = Gauge("concurrency_in_flight", "Requests holding a concurrency slot", ["route"])
+CONCURRENCY_QUEUED = Gauge("concurrency_queued", "Requests waiting for a concurrency slot", ["route"])
+# Requests by route, priority and result (admitted, queued, shed)
+CONCURRENCY_REQUESTS = Counter("concurrency_requests", "Requests seen by the concurrency limiter", ["route", "priority", "result"])
+
+def parse_priorities(spec: str) -> Dict[str, str]:
+    """
+    Parse "path=class" pairs separated by commas.
+
+    Raises:
+        ValueError: If a pair is malformed or names an unknown class
+    """
+    priorities = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        path, _, priority = pair.partition("=")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid route priority {pair!r}; use path=class with a class of {', '.join(PRIORITIES)}")
+        priorities[path] = priority
+    return priorities
+
+class GradientLimit:
+    """
+    Limit that follows the ratio of long-term to recent latency.
+
+    While latency stays near its long-term average the limit grows by about
+    its square root per window; as requests queue and latency rises past
+    `tolerance` times the average, the limit shrinks in proportion, by at
+    most half per update.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = CONCURRENCY_LATENCY_TOLERANCE,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.long_window = long_window
+        self.long_rtt: Optional[float] = None
+
+    def update(self, rtt: float, in_flight: int):
+        if self.long_rtt is None:
+            self.long_rtt = rtt
+        else:
+            self.long_rtt += (rtt - self.long_rtt) / self.long_window
+            # Let the average come back down quickly once a long overload ends
+            if self.long_rtt > 2 * rtt:
+                self.long_rtt *= 0.95
+
+        # With the limit far from reached, latency says nothing about it
+        if in_flight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / max(rtt, 1e-9)))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+class AIMDLimit:
+    """
+    Additive increase, multiplicative decrease.
+
+    Grows by one while the route is busy and latency stays within `tolerance`
+    times its long-term average; cuts by `backoff` as soon as it does not.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = CONCURRENCY_LATENCY_TOLERANCE,
+        backoff: float = 0.9,
+        long_window: int = 600,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.long_window = long_window
+        self.long_rtt: Optional[float] = None
+
+    def update(self, rtt: float, in_flight: int):
+        if self.long_rtt is None:
+            self.long_rtt = rtt
+        else:
+            self.long_rtt += (rtt - self.long_rtt) / self.long_window
+
+        if rtt > self.tolerance * self.long_rtt:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+
+def build_limit(algorithm: str, initial: float, min_limit: int, max_limit: int):
+    """
+    Create a limit algorithm by name.
+
+    Raises:
+        ValueError: If the algorithm is unknown
+    """
+    if algorithm == GRADIENT:
+        return GradientLimit(initial, min_limit, max_limit)
+    if algorithm == AIMD:
+        return AIMDLimit(initial, min_limit, max_limit)
+    raise ValueError(f"Unknown concurrency algorithm {algorithm!r}; use {GRADIENT} or {AIMD}")
+
+class RouteLimiter:
+    """
+    Adaptive concurrency limit of one route, with a bounded priority queue.
+
+    Requests over the limit wait, more important ones first, until a slot
+    frees up or their wait runs out. Every completed request feeds its latency
+    to the limit algorithm.
+    """
+
+    def __init__(self, route: str, algorithm, queue_size: int):
+        self.route = route
+        self.algorithm = algorithm
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.queued = 0
+        # (priority rank, arrival, future); futures of expired waits stay until popped
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._export()
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self.algorithm.limit))
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free and nobody is waiting."""
+        if self.in_flight < self.limit and not self.queued:
+            self.in_flight += 1
+            self._export()
+            return True
+        return False
+
+    async def acquire(self, priority: str, timeout: float) -> bool:
+        """
+        Take a slot, waiting up to `timeout` seconds for one.
+
+        Returns:
+            bool: False if the queue is full or the wait ran out
+        """
+        if self.try_acquire():
+            return True
+        if timeout <= 0 or self.queued >= self.queue_size:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.index(priority), next(self._arrivals), waiter))
+        self.queued += 1
+        self._export()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self.queued -= 1
+            self._export()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the client went away
+                self.release(None)
+            else:
+                self.queued -= 1
+                self._export()
+            raise
+        return True
+
+    def release(self, rtt: Optional[float]):
+        """Free a slot, recording the request's latency unless it is None."""
+        if rtt is not None:
+            self.algorithm.update(rtt, self.in_flight)
+        self.in_flight -= 1
+        # Hand freed slots straight to the most important waiters
+        while self._waiters and self.in_flight < self.limit:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self.queued -= 1
+            self.in_flight += 1
+            waiter.set_result(None)
+        self._export()
+
+    def _export(self):
+        CONCURRENCY_LIMIT.labels(route=self.route).set(self.limit)
+        CONCURRENCY_IN_FLIGHT.labels(route=self.route).set(self.in_flight)
+        CONCURRENCY_QUEUED.labels(route=self.route).set(self.queued)
+
+class ConcurrencyLimiter:
+    """
+    Per-route adaptive concurrency limits under a global, priority-aware limit.
+
+    Each route gets its own limit, so a slow route such as bcrypt-bound login
+    is held to the concurrency its latency supports and cannot crowd out
+    cheap ones. The global limit counts every metered request and adapts to
+    how much slower than usual requests are running overall; lower priority
+    classes may only fill part of it, so they are shed first as load rises.
+    Critical routes are never limited.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = CONCURRENCY_ALGORITHM,
+        initial_limit: int = CONCURRENCY_INITIAL_LIMIT,
+        min_limit: int = CONCURRENCY_MIN_LIMIT,
+        max_limit: int = CONCURRENCY_MAX_LIMIT,
+        global_initial_limit: int = CONCURRENCY_GLOBAL_INITIAL_LIMIT,
+        global_max_limit: int = CONCURRENCY_GLOBAL_MAX_LIMIT,
+        queue_size: int = CONCURRENCY_QUEUE_SIZE,
+        queue_timeout_ms: int = CONCURRENCY_QUEUE_TIMEOUT_MS,
+        route_priorities: str = CONCURRENCY_ROUTE_PRIORITIES,
+    ):
+        self.algorithm = algorithm
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.priorities = dict(ROUTE_PRIORITIES, **parse_priorities(route_priorities))
+        self.global_limiter = RouteLimiter(
+            GLOBAL_ROUTE, build_limit(algorithm, global_initial_limit, min_limit, global_max_limit), 0
+        )
+        self._routes: Dict[str, RouteLimiter] = {}
+
+    def priority(self, path: str) -> str:
+        """Priority class of a path."""
+        priority = self.priorities.get(path)
+        if priority is not None:
+            return priority
+        for prefix, priority in PREFIX_PRIORITIES:
+            if path.startswith(prefix):
+                return priority
+        return NORMAL
+
+    def route(self, route: str) -> RouteLimiter:
+        """Limiter of a route, created on first use."""
+        limiter = self._routes.get(route)
+        if limiter is None:
+            algorithm = build_limit(self.algorithm, self.initial_limit, self.min_limit, self.max_limit)
+            limiter = RouteLimiter(route, algorithm, self.queue_size)
+            self._routes[route] = limiter
+        return limiter
+
+    def admit_global(self, priority: str) -> bool:
+        """Whether the overall load leaves room for a request of `priority`."""
+        if priority == CRITICAL:
+            return True
+        return self.global_limiter.in_flight < self.global_limiter.limit * GLOBAL_SHARES[priority]
+
+    async def acquire(self, route: str, priority: str) -> Optional[str]:
+        """
+        Take a route slot, then a global one, for a metered request.
+
+        Low priority requests never wait; the others may queue for their
+        route. Requests only count against the global limit once they run, so
+        a route with a long queue does not crowd out the others.
+
+        Returns:
+            Optional[str]: "admitted", "queued" if the request had to wait, or
+                None if it should be shed
+        """
+        limiter = self.route(route)
+        if limiter.try_acquire():
+            result = "admitted"
+        elif priority != LOW and await limiter.acquire(priority, self.queue_timeout):
+            result = "queued"
+        else:
+            return None
+
+        if not self.admit_global(priority):
+            limiter.release(None)
+            return None
+        self.global_limiter.in_flight += 1
+        self.global_limiter._export()
+        return result
+
+    def release(self, route: str, rtt: float):
+        """Free a request's slots and feed its latency to both limits."""
+        limiter = self._routes[route]
+        long_rtt = limiter.algorithm.long_rtt
+        limiter.release(rtt)
+        # The global limit sees latency relative to each route's usual latency,
+        # so routes of very different speeds can share it
+        self.global_limiter.release(rtt / long_rtt if long_rtt else 1.0)
+
+class ConcurrencyLimitMiddleware:
+    """
+    ASGI middleware applying the concurrency limiter and shedding load.
+
+    Shed HTTP requests get 503 with Retry-After; shed WebSocket handshakes
+    are closed with code 1013 (try again later). Paths that match no route
+    share one limit.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: ConcurrencyLimiter,
+        enabled: bool = CONCURRENCY_LIMIT_ENABLED,
+        retry_after_seconds: int = CONCURRENCY_RETRY_AFTER_SECONDS,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.enabled = enabled
+        self.retry_after = str(retry_after_seconds)
+        self._paths: Optional[Set[str]] = None
+
+    def _route(self, scope) -> str:
+        if self._paths is None:
+            self._paths = {route.path for route in scope["app"].routes if hasattr(route, "path")}
+        path = scope["path"]
+        return path if path in self._paths else OTHER_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        priority = self.limiter.priority(scope["path"])
+        if priority == CRITICAL:
+            await self.app(scope, receive, send)
+            return
+
+        if route in UNMETERED_ROUTES or scope["type"] == "websocket":
+            if not self.limiter.admit_global(priority):
+                CONCURRENCY_REQUESTS.labels(route=route, priority=priority, result="shed").inc()
+                await self._shed(scope, send)
+                return
+            CONCURRENCY_REQUESTS.labels(route=route, priority=priority, result="admitted").inc()
+            await self.app(scope, receive, send)
+            return
+
+        result = await self.limiter.acquire(route, priority)
+        CONCURRENCY_REQUESTS.labels(route=route, priority=priority, result=result or "shed").inc()
+        if result is None:
+            await self._shed(scope, send)
+            return
+
+        # Latency is measured from admission: time queued here is the
+        # limiter's doing, not a sign of load behind it
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(route, time.perf_counter() - start)
+
+    async def _shed(self, scope, send):
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1013, "reason": "Server overloaded"})
+            return
+        body = b'{"detail":"Server is overloaded, please retry later"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
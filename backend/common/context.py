@@ -0,0 +1,214 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+import databases
+
+from config.hashing import HashingPolicy, build_context
+from config.settings import (
+    DATABASE_URL, PASSWORD_HASH_WORKERS, SHUTDOWN_DRAIN_SECONDS,
+    PASSWORD_HASH_AUTOTUNE, PASSWORD_HASH_SCHEME, PASSWORD_HASH_TARGET_MS,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class AppContext:
+    """
+    Resources owned by one running application.
+
+    Holds the database, the password hashing policy and worker pool, the
+    serialized user cache, the email dispatcher and cooldowns, the idempotency
+    store, the auth audit log, the user activity tracker, the concurrency
+    limiter and the notification manager, batcher and event log.
+    `start` opens and pre-warms them from the app's lifespan; `stop` drains and
+    closes them in dependency order. Each app built by `main.create_app` gets
+    its own context, so several apps can run side by side in one process.
+    """
+
+    def __init__(self, database_url: str = DATABASE_URL, hash_workers: int = PASSWORD_HASH_WORKERS):
+        # Imported here because these modules look up the active context themselves
+        from apps.notifications.batching import NotificationBatcher
+        from apps.notifications.event_log import EventLog
+        from apps.notifications.websocket import ConnectionManager
+        from apps.users.activity import ActivityTracker
+        from apps.users.audit import AuditLog
+        from apps.users.cache import UserResponseCache
+        from apps.users.cooldown import RecipientCooldown
+        from common.concurrency import ConcurrencyLimiter
+        from common.idempotency import IdempotencyStore
+        from services.email import EmailDispatcher
+
+        self.database_url = database_url
+        self.database = databases.Database(database_url)
+        self.hash_workers = hash_workers
+        self.hash_executor = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="password-hash")
+        # Replaced by configure_password_hashing when tuned at startup
+        self.pwd_context = build_context(HashingPolicy())
+        self.user_cache = UserResponseCache()
+        self.email = EmailDispatcher()
+        self.idempotency = IdempotencyStore()
+        self.email_cooldown = RecipientCooldown()
+        self.audit = AuditLog()
+        self.activity = ActivityTracker()
+        self.concurrency = ConcurrencyLimiter()
+        self.event_log = EventLog()
+        self.manager = ConnectionManager(self.event_log)
+        self.batcher = NotificationBatcher(self.manager)
+        self._previous_handlers: Dict[int, Callable] = {}
+        self._drain_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Connect and pre-warm resources before the first request."""
+        await self.database.connect()
+        await self.database.fetch_val("SELECT 1")
+        await self.event_log.load()
+        self.audit.start()
+        self.activity.start()
+
+        # Start every hashing thread now rather than on the first logins
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self.hash_executor, lambda: None) for _ in range(self.hash_workers)
+        ))
+        if PASSWORD_HASH_AUTOTUNE:
+            await self.tune_password_hashing()
+        self._install_drain_handlers()
+        logger.debug("Application context started")
+
+    async def stop(self, timeout: float = SHUTDOWN_DRAIN_SECONDS):
+        """Drain in-flight work and release resources."""
+        self._restore_signal_handlers()
+        await self.batcher.flush()
+        await self.manager.close_all()
+
+        pending = await self.email.drain(timeout)
+        if pending:
+            logger.warning("Shutting down with %d emails still being sent", pending)
+        self.email.close()
+
+        await self.audit.stop()
+        await self.activity.stop()
+        self.hash_executor.shutdown(wait=True)
+        await self.database.disconnect()
+        logger.debug("Application context stopped")
+
+    def _install_drain_handlers(self):
+        """
+        Drain notification clients before the server's own shutdown starts.
+
+        Uvicorn closes every WebSocket as soon as it receives SIGTERM or SIGINT,
+        so its handlers are wrapped: the first signal starts `manager.drain` and
+        passes the signal on once the drain finishes; a second signal is passed
+        on at once. Signals can only be handled in the main thread, so servers
+        running in other threads (tests, in-process load tests) shut down as before.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+            self._previous_handlers[sig] = previous
+            signal.signal(sig, functools.partial(self._handle_exit, loop, previous))
+
+    def _restore_signal_handlers(self):
+        for sig, previous in self._previous_handlers.items():
+            signal.signal(sig, previous)
+        self._previous_handlers.clear()
+
+    def _handle_exit(self, loop: asyncio.AbstractEventLoop, previous: Callable, signum, frame):
+        if self._drain_task is not None:
+            previous(signum, frame)
+            return
+
+        async def drain_then_exit():
+            try:
+                await self.manager.drain()
+            finally:
+                previous(signum, frame)
+
+        def start_drain():
+            self._drain_task = loop.create_task(drain_then_exit())
+
+        loop.call_soon_threadsafe(start_drain)
+
+    async def tune_password_hashing(self, scheme: str = PASSWORD_HASH_SCHEME, target_ms: float = PASSWORD_HASH_TARGET_MS):
+        """Benchmark this machine and hash new passwords at the strongest cost within `target_ms`."""
+        from config.hashing import tune
+        from config.security import configure_password_hashing
+
+        policy, _ = await self.run_hash(tune, scheme, target_ms)
+        configure_password_hashing(policy)
+        logger.info("Password hashing tuned to %s for a %d ms budget", policy.describe(), target_ms)
+
+    async def run_hash(self, func: Callable, *args) -> Any:
+        """Run a password hashing function on the worker pool, keeping the request's trace."""
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        return await asyncio.get_running_loop().run_in_executor(self.hash_executor, call)
+
+# Context of the app handling the current request or lifespan
+current_context: ContextVar[Optional[AppContext]] = ContextVar("current_context", default=None)
+
+# Used outside any app, e.g. by maintenance scripts; created on first use
+_default_context: Optional[AppContext] = None
+
+def get_context() -> AppContext:
+    """Return the active application context."""
+    context = current_context.get()
+    if context is not None:
+        return context
+
+    global _default_context
+    if _default_context is None:
+        _default_context = AppContext()
+    return _default_context
+
+def set_default_context(context: AppContext):
+    """Use `context` wherever no app has set one, unless a default already exists."""
+    global _default_context
+    if _default_context is None:
+        _default_context = context
+
+class ContextProxy:
+    """
+    Module-level stand-in for an attribute of the active context.
+
+    Lets existing imports such as `from config.database import database` keep
+    working while the object they reach belongs to the running app.
+    """
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str):
+        return getattr(getattr(get_context(), self._name), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(getattr(get_context(), self._name), attr, value)
+
+    def __repr__(self) -> str:
+        return f"<ContextProxy {self._name}>"
+
+class AppContextMiddleware:
+    """ASGI middleware making the app's context active while it handles a connection."""
+
+    def __init__(self, app, context: AppContext):
+        self.app = app
+        self.context = context
+
+    async def __call__(self, scope, receive, send):
+        token = current_context.set(self.context)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_context.reset(token)
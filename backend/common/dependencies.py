@@ -1,4 +1,15 @@
+from fastapi import Depends
+
 from apps.users.services import get_current_user
+from common.exceptions import PermissionDeniedException
+from config.settings import ADMIN_EMAILS
+
+async def get_current_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    """Get current user, requiring them to be listed in ADMIN_EMAILS."""
+    if current_user["email"].lower() not in ADMIN_EMAILS:
+        raise PermissionDeniedException
+    
+    return current_user
 
 # Export common dependencies
-__all__ = ["get_current_user"]
+__all__ = ["get_current_user", "get_current_admin"]
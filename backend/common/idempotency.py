@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Tuple, Union
+
+from fastapi import HTTPException, Response, status
+
+from common.context import ContextProxy
+from common.metrics import Counter
+from common.responses import FastJSONResponse
+from config.settings import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_WAIT_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Requests carrying an Idempotency-Key, by outcome (new, replayed, waited, mismatch)
+IDEMPOTENCY_REQUESTS = Counter("idempotency_requests", "Requests with an Idempotency-Key", ["result"])
+
+# Longest key accepted, like common API gateways
+MAX_KEY_LENGTH = 255
+
+# Header added to replayed responses
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+class StoredResponse(NamedTuple):
+    """Response of a completed request, kept for replay."""
+
+    status_code: int
+    body: bytes
+    headers: List[Tuple[str, str]]
+
+class _Entry(NamedTuple):
+    fingerprint: str
+    result: Union["asyncio.Future[Optional[StoredResponse]]", StoredResponse]
+    expires: float
+
+class IdempotencyStore:
+    """
+    TTL store of responses by Idempotency-Key.
+
+    The first request with a key runs and its response is stored. Duplicates
+    arriving while it runs wait for it, and later retries get the stored
+    response back, so retried requests never redo their work. Responses with
+    status 500 and above are not stored: the key is released and the next
+    retry runs again. Entries live in this process only.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+        wait_seconds: int = IDEMPOTENCY_WAIT_SECONDS,
+    ):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+
+    async def run(
+        self,
+        key: Optional[str],
+        scope: str,
+        request_body: str,
+        handler: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        """
+        Run `handler` at most once per key, replaying its response to retries.
+
+        Args:
+            key: Idempotency-Key header value; without one the handler just runs
+            scope: Endpoint the key belongs to, so keys can repeat across endpoints
+            request_body: Serialized request, to reject a key reused for a different request
+            handler: Produces the response; it must return a Response with a body
+
+        Returns:
+            Response: The handler's response, or a replay of the stored one
+
+        Raises:
+            HTTPException: 400 for an invalid key, 422 when the key was used
+                with a different request, 409 when the original request is
+                still running after the wait
+        """
+        if key is None:
+            return await handler()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters",
+            )
+
+        entry_key = (scope, key)
+        fingerprint = hashlib.sha256(request_body.encode()).hexdigest()
+        entry = self._get(entry_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                IDEMPOTENCY_REQUESTS.labels(result="mismatch").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            if isinstance(entry.result, StoredResponse):
+                IDEMPOTENCY_REQUESTS.labels(result="replayed").inc()
+                return self._replay(entry.result)
+
+            IDEMPOTENCY_REQUESTS.labels(result="waited").inc()
+            try:
+                stored = await asyncio.wait_for(asyncio.shield(entry.result), self.wait_seconds)
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed",
+                    headers={"Retry-After": "1"},
+                )
+            if stored is None:
+                # The original request failed without a response worth keeping; run it again
+                return await self.run(key, scope, request_body, handler)
+            return self._replay(stored)
+
+        IDEMPOTENCY_REQUESTS.labels(result="new").inc()
+        in_flight: "asyncio.Future[Optional[StoredResponse]]" = asyncio.get_running_loop().create_future()
+        self._set(entry_key, _Entry(fingerprint, in_flight, time.monotonic() + self.ttl))
+
+        stored = None
+        try:
+            try:
+                response = await handler()
+            except HTTPException as exc:
+                # Client errors are as final as successes
+                if exc.status_code < 500:
+                    stored = StoredResponse(
+                        exc.status_code,
+                        FastJSONResponse({"detail": exc.detail}).body,
+                        [("content-type", "application/json")] + list((exc.headers or {}).items()),
+                    )
+                raise
+            if response.status_code < 500:
+                stored = StoredResponse(
+                    response.status_code,
+                    response.body,
+                    [(name, value) for name, value in response.headers.items() if name != "content-length"],
+                )
+            return response
+        finally:
+            if stored is None:
+                self._entries.pop(entry_key, None)
+            else:
+                self._set(entry_key, _Entry(fingerprint, stored, time.monotonic() + self.ttl))
+            in_flight.set_result(stored)
+
+    def _get(self, entry_key: Tuple[str, str]) -> Optional[_Entry]:
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        if entry.expires < time.monotonic() and isinstance(entry.result, StoredResponse):
+            del self._entries[entry_key]
+            return None
+        return entry
+
+    def _set(self, entry_key: Tuple[str, str], entry: _Entry):
+        self._entries[entry_key] = entry
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            if not isinstance(oldest.result, StoredResponse):
+                # Never evict a request that is still running
+                self._entries.move_to_end(oldest_key)
+                break
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _replay(stored: StoredResponse) -> Response:
+        response = Response(stored.body, status_code=stored.status_code)
+        for name, value in stored.headers:
+            response.headers.append(name, value)
+        response.headers[REPLAYED_HEADER] = "true"
+        return response
+
+    def clear(self):
+        """Drop every completed entry."""
+        for entry_key, entry in list(self._entries.items()):
+            if isinstance(entry.result, StoredResponse):
+                del self._entries[entry_key]
+
+# Store of the active app context
+idempotency_store = ContextProxy("idempotency")
@@ -0,0 +1,116 @@
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config.settings import LOG_LEVEL, LOG_FORMAT
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+# `color_message` is the terminal-colored copy uvicorn and databases attach.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "color_message"}
+
+_listener: Optional[QueueListener] = None
+# Process the listener was started in; its thread does not survive a fork
+_listener_pid: Optional[int] = None
+
+class StructuredFormatter(logging.Formatter):
+    """Text formatter that appends `extra` fields as key=value pairs."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+        if fields:
+            message += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return message
+
+class JsonFormatter(logging.Formatter):
+    """Formatter emitting one JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+
+    The stock QueueHandler renders the message in the calling thread so the
+    record can cross process boundaries. Our queue is in-process, so the record
+    is passed as-is and message interpolation happens off the event loop.
+    Log arguments must therefore not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class Sampler:
+    """Lets through one in every `every` calls, for logs emitted per client or per event."""
+
+    def __init__(self, every: int):
+        self.every = max(every, 1)
+        self._calls = itertools.count()
+
+    def allow(self) -> bool:
+        """Return True for the first call and every `every`-th one after it."""
+        return next(self._calls) % self.every == 0
+
+def log_sampled(logger: logging.Logger, level: int, sampler: Sampler, msg: str, *args, **kwargs):
+    """Log through a sampler, skipping all work when the level is filtered out."""
+    if logger.isEnabledFor(level) and sampler.allow():
+        logger.log(level, msg, *args, **kwargs)
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """
+    Route all logging through a background thread.
+
+    Handlers on the root logger are replaced by a queue handler, so emitting a
+    record costs an enqueue on the hot path; formatting and I/O happen in a
+    QueueListener thread. Does nothing if this process already set it up, so
+    it is safe to call more than once; a forked child starts its own listener.
+    """
+    global _listener, _listener_pid
+
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = StructuredFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+    root = logging.getLogger()
+    root.handlers = [DeferredQueueHandler(log_queue)]
+    root.setLevel(level)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,208 @@
+"""
+Low-overhead, Prometheus-compatible application metrics.
+
+Metrics are plain Python objects updated without locks: every update is a
+handful of attribute increments that run on the event loop thread, which is
+cheap enough to leave on under load. A rare lost increment when the same
+metric is updated from worker threads is an accepted trade-off.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds, from 1ms to 10s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# All registered metrics, in registration order
+_registry: List["Metric"] = []
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    """Base class for a metric family, optionally split by labels."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "Metric"] = {}
+        self._labels: Dict[str, str] = {}
+        _registry.append(self)
+
+    def labels(self, **labels: str) -> "Metric":
+        """Return the child metric for a set of label values, creating it on first use."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._new_child()
+            child._labels = dict(zip(self.labelnames, key))
+            self._children[key] = child
+        return child
+
+    def _new_child(self) -> "Metric":
+        child = object.__new__(type(self))
+        child._init_value()
+        return child
+
+    def _init_value(self):
+        raise NotImplementedError
+
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def collect(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Return `(sample name, labels, value)` for this family."""
+        if self.labelnames:
+            samples = []
+            for child in list(self._children.values()):
+                samples.extend(child._samples())
+            return samples
+        return self._samples()
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._init_value()
+
+    def _init_value(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        """Increment the counter."""
+        self.value += amount
+
+    def _samples(self):
+        return [("_total", self._labels, self.value)]
+
+class Gauge(Metric):
+    """Value that goes up and down, or is read from a callback at scrape time."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._init_value()
+        self.function = function
+
+    def _init_value(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float):
+        """Set the gauge."""
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        """Increment the gauge."""
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        """Decrement the gauge."""
+        self.value -= amount
+
+    def _samples(self):
+        value = self.function() if self.function is not None else self.value
+        return [("", self._labels, value)]
+
+class _Timer:
+    """Context manager observing the elapsed time into a histogram."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+        self._init_value()
+
+    def _new_child(self) -> "Histogram":
+        child = object.__new__(Histogram)
+        child.buckets = self.buckets
+        child._init_value()
+        return child
+
+    def _init_value(self):
+        # One slot per bucket plus the +Inf overflow slot
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def time(self) -> _Timer:
+        """Time a block of code: `with histogram.time(): ...`."""
+        return _Timer(self)
+
+    def _samples(self):
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            samples.append(("_bucket", dict(self._labels, le=_format_value(bound)), cumulative))
+        samples.append(("_sum", self._labels, self.sum))
+        samples.append(("_count", self._labels, cumulative))
+        return samples
+
+def generate_latest() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for suffix, labels, value in metric.collect():
+            lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+# Content type of the text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,88 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from config.settings import PROFILE_DIR
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the stacks of all threads.
+
+    A background thread wakes every `interval` seconds, walks
+    `sys._current_frames()` and counts identical stacks. The result is written
+    in the collapsed-stack format (`frame;frame;frame count`) understood by
+    flamegraph.pl and speedscope. Only one profile runs at a time, and nothing
+    runs between profiles, so it is safe to trigger in production.
+    """
+
+    def __init__(self, output_dir: str = PROFILE_DIR):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether a profile is being captured."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float = 0.005) -> str:
+        """
+        Capture stacks for `seconds` in the background.
+
+        Returns:
+            str: Path of the file the profile will be written to
+
+        Raises:
+            ProfilerBusy: If a profile is already running
+        """
+        with self._lock:
+            if self.running:
+                raise ProfilerBusy()
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(
+                self.output_dir, f"profile-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.txt"
+            )
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds, interval, path), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return path
+
+    def _run(self, seconds: float, interval: float, path: str):
+        own_id = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stacks[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("Wrote profile with %d samples to %s", samples, path)
+
+# Create profiler instance
+profiler = SamplingProfiler()
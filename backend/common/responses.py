@@ -0,0 +1,63 @@
+import json
+import operator
+from datetime import date, datetime
+from typing import Any, Callable, Mapping, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# orjson is optional; without it the standard json module is used
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact JSON bytes, with datetimes in ISO 8601 like pydantic."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed.
+
+    Content that is already serialized (bytes from a `RowSerializer`) is sent
+    as-is, so endpoints can skip response model validation entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class RowSerializer:
+    """
+    Serializer for one response model, compiled once from its fields.
+
+    Converts database rows (or dicts) straight to the JSON the model would
+    produce, without building a model instance or validating the row. Only use
+    it for rows whose columns already have the model's types, i.e. rows read
+    from the table the model describes.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.names = tuple(model.model_fields)
+        self._getter: Callable[[Mapping], Any] = operator.itemgetter(*self.names)
+        if len(self.names) == 1:
+            getter = self._getter
+            self._getter = lambda row: (getter(row),)
+
+    def fields(self, row: Mapping) -> dict:
+        """Return the model's fields of a row as a dict for `dumps`."""
+        return dict(zip(self.names, self._getter(row)))
+
+    def __call__(self, row: Mapping) -> bytes:
+        """Serialize a row to JSON bytes."""
+        return dumps(self.fields(row))
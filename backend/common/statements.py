@@ -0,0 +1,98 @@
+from typing import Any, Dict, Hashable, Tuple
+
+from sqlalchemy.engine.interfaces import Compiled, Dialect
+from sqlalchemy.sql import ClauseElement
+
+from common.metrics import Counter
+
+# Statement compilations, by statement; stays flat once every statement ran
+SQL_STATEMENT_COMPILES = Counter("sql_statement_compiles", "Statements compiled to SQL", ["statement"])
+
+# Every registered statement, by name
+statements: Dict[str, "Statement"] = {}
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable form of compile arguments, e.g. `compile_kwargs={"render_postcompile": True}`."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+class _BoundCompiled:
+    """A cached compiled statement that hands out new bound values."""
+
+    __slots__ = ("_compiled", "_values")
+
+    def __init__(self, compiled: Compiled, values: Dict[str, Any]):
+        self._compiled = compiled
+        self._values = values
+
+    def __getattr__(self, name: str):
+        return getattr(self._compiled, name)
+
+    def construct_params(self, params: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
+        """Bound values, overridden by any `params` the caller passes."""
+        values = {**self._values, **params} if params else self._values
+        return self._compiled.construct_params(values, **kwargs)
+
+class BoundStatement:
+    """A registered statement with the values for one execution."""
+
+    __slots__ = ("statement", "values")
+
+    def __init__(self, statement: "Statement", values: Dict[str, Any]):
+        self.statement = statement
+        self.values = values
+
+    def compile(self, dialect: Dialect = None, **kwargs) -> _BoundCompiled:
+        """Called by the database backend in place of ClauseElement.compile."""
+        return _BoundCompiled(self.statement.compiled(dialect, **kwargs), self.values)
+
+class Statement:
+    """
+    A parameterized Core statement compiled to SQL once per dialect.
+
+    SQLAlchemy Core expressions passed to `databases` are compiled on every
+    execution. A Statement is built once, with `bindparam` placeholders for
+    everything that varies, and `bind` returns an object the database accepts
+    in place of a query: the first execution compiles it for the connection's
+    dialect and later ones only supply new values.
+
+    Statements must not use expanding parameters (`in_` with a list), whose
+    SQL changes with the number of values.
+    """
+
+    def __init__(self, name: str, statement: ClauseElement):
+        self.name = name
+        self.statement = statement
+        # Keyed by dialect name and compile arguments
+        self._compiled: Dict[Tuple[str, Hashable], Compiled] = {}
+
+    def bind(self, **values) -> BoundStatement:
+        """Return the statement with values for its bind parameters."""
+        return BoundStatement(self, values)
+
+    def compiled(self, dialect: Dialect, **kwargs) -> Compiled:
+        """Return the statement compiled for `dialect` and `kwargs`, compiling it on first use."""
+        key = (dialect.name, _freeze(kwargs))
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self.statement.compile(dialect=dialect, **kwargs)
+            self._compiled[key] = compiled
+            SQL_STATEMENT_COMPILES.labels(statement=self.name).inc()
+        return compiled
+
+def register(name: str, statement: ClauseElement) -> Statement:
+    """
+    Register a statement for reuse.
+
+    Raises:
+        ValueError: If the name is already taken
+    """
+    if name in statements:
+        raise ValueError(f"Statement {name} is already registered")
+    statements[name] = Statement(name, statement)
+    return statements[name]
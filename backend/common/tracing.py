@@ -0,0 +1,148 @@
+import logging
+import re
+import secrets
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import TRACING_ENABLED, TRACE_SLOW_REQUEST_MS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# W3C trace context header: version-trace_id-parent_id-flags
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Routes that hold back their response by design, never reported as slow
+LONG_POLL_ROUTES = {"/api/notifications/poll"}
+
+class Trace:
+    """Span timings recorded for one request."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "flags", "start", "spans")
+
+    def __init__(self, trace_id: Optional[str] = None, parent_id: Optional[str] = None, flags: str = "01"):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.flags = flags
+        self.start = time.perf_counter()
+        # (name, start offset, duration) in seconds
+        self.spans: List[Tuple[str, float, float]] = []
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> "Trace":
+        """Continue the caller's trace if it sent a valid `traceparent` header."""
+        if header:
+            match = TRACEPARENT_RE.match(header.strip().lower())
+            if match and match.group(2) != "0" * 32:
+                return cls(trace_id=match.group(2), parent_id=match.group(3), flags=match.group(4))
+        return cls()
+
+    @property
+    def traceparent(self) -> str:
+        """`traceparent` header value identifying this request's span."""
+        return f"00-{self.trace_id}-{self.span_id}-{self.flags}"
+
+    def totals(self) -> Dict[str, float]:
+        """Total time per span name, in seconds."""
+        totals: Dict[str, float] = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def server_timing(self, total: float) -> str:
+        """Render span totals as a `Server-Timing` header value."""
+        metrics = [
+            f"{name.replace('.', '-')};dur={duration * 1000:.2f}"
+            for name, duration in self.totals().items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+# Trace of the request being handled, if any
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+class span:
+    """
+    Time a stage of request handling.
+
+    Records the duration on the current request's trace, and into a metrics
+    histogram when one is given, so one `with` block feeds both:
+
+        with span("db.get_user", DB_QUERY_SECONDS.labels(query="get_user")):
+            ...
+    """
+
+    __slots__ = ("name", "histogram", "start")
+
+    def __init__(self, name: str, histogram=None):
+        self.name = name
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        if self.histogram is not None:
+            self.histogram.observe(duration)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.spans.append((self.name, self.start - trace.start, duration))
+        return False
+
+class TracingMiddleware:
+    """
+    ASGI middleware that records span timings per request.
+
+    Honors an incoming W3C `traceparent` header, returns `traceparent` and a
+    `Server-Timing` breakdown of the recorded spans, and logs the breakdown
+    of requests whose response started more than TRACE_SLOW_REQUEST_MS after
+    they arrived. Streamed bodies (SSE, exports) are not counted, and
+    long-poll routes are never reported.
+    """
+
+    def __init__(self, app, enabled: bool = TRACING_ENABLED, slow_request_ms: int = TRACE_SLOW_REQUEST_MS):
+        self.app = app
+        self.enabled = enabled
+        self.slow_request = slow_request_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                header = value.decode("latin-1")
+                break
+
+        trace = Trace.from_traceparent(header)
+        token = current_trace.set(trace)
+        # Time until the response started, once it has
+        started: Optional[float] = None
+
+        async def send_with_trace(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                total = started = time.perf_counter() - trace.start
+                headers = list(message.get("headers", []))
+                headers.append((b"traceparent", trace.traceparent.encode("latin-1")))
+                headers.append((b"server-timing", trace.server_timing(total).encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace if scope["type"] == "http" else send)
+        finally:
+            current_trace.reset(token)
+            total = started if started is not None else time.perf_counter() - trace.start
+            if scope["type"] == "http" and total >= self.slow_request and scope.get("path") not in LONG_POLL_ROUTES:
+                logger.warning(
+                    "Slow request %s %s took %.1fms to respond: %s",
+                    scope.get("method"), scope.get("path"), total * 1000, trace.server_timing(total),
+                    extra={"trace_id": trace.trace_id},
+                )
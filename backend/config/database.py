@@ -1,17 +1,17 @@
-import databases
 import sqlalchemy
 from sqlalchemy.ext.declarative import declarative_base
 
+from common.context import ContextProxy
 from config.settings import DATABASE_URL
 
-# SQLAlchemy setup
-database = databases.Database(DATABASE_URL)
+# SQLAlchemy setup; `database` is the active application context's database
+database = ContextProxy("database")
 metadata = sqlalchemy.MetaData()
 
 # Base class for all models
 Base = declarative_base()
 
 # Function to create all database tables
-def create_tables():
-    engine = sqlalchemy.create_engine(DATABASE_URL)
+def create_tables(database_url: str = DATABASE_URL):
+    engine = sqlalchemy.create_engine(database_url)
     Base.metadata.create_all(engine)
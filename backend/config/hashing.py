@@ -0,0 +1,129 @@
+import logging
+import statistics
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+from passlib.context import CryptContext
+from passlib.hash import argon2
+
+from config.settings import (
+    PASSWORD_HASH_SCHEME, BCRYPT_ROUNDS, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Supported password hashing schemes
+BCRYPT = "bcrypt"
+ARGON2 = "argon2"
+
+# Weakest parameters tuning may pick, whatever the hardware
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+MIN_ARGON2_TIME_COST = 2
+MAX_ARGON2_TIME_COST = 20
+
+# Password hashed while benchmarking
+BENCHMARK_PASSWORD = "correct horse battery staple"
+
+class HashingPolicy(NamedTuple):
+    """Password hashing scheme and cost parameters."""
+    scheme: str = PASSWORD_HASH_SCHEME
+    bcrypt_rounds: int = BCRYPT_ROUNDS
+    argon2_time_cost: int = ARGON2_TIME_COST
+    argon2_memory_cost: int = ARGON2_MEMORY_COST
+    argon2_parallelism: int = ARGON2_PARALLELISM
+
+    def describe(self) -> str:
+        if self.scheme == ARGON2:
+            return f"argon2id t={self.argon2_time_cost} m={self.argon2_memory_cost}KiB p={self.argon2_parallelism}"
+        return f"bcrypt rounds={self.bcrypt_rounds}"
+
+def available_schemes() -> Tuple[str, ...]:
+    """Return the hashing schemes this server can use; argon2 needs the optional `argon2-cffi` package."""
+    if argon2.has_backend():
+        return (BCRYPT, ARGON2)
+    return (BCRYPT,)
+
+def build_context(policy: HashingPolicy) -> CryptContext:
+    """
+    Build a CryptContext for the policy.
+
+    The policy's scheme hashes new passwords. Hashes made with the other scheme,
+    or with weaker parameters, still verify but are reported by `needs_update`,
+    so they are replaced the next time the user logs in.
+
+    Args:
+        policy: Hashing scheme and cost parameters
+
+    Returns:
+        CryptContext: Context for hashing and verifying passwords
+
+    Raises:
+        ValueError: If the scheme is unknown or its backend is not installed
+    """
+    if policy.scheme not in (BCRYPT, ARGON2):
+        raise ValueError(f"Unknown password hashing scheme: {policy.scheme}")
+    if policy.scheme not in available_schemes():
+        raise ValueError(f"Password hashing scheme {policy.scheme} needs the argon2-cffi package")
+
+    schemes = [policy.scheme] + [scheme for scheme in available_schemes() if scheme != policy.scheme]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=policy.bcrypt_rounds,
+        bcrypt__min_rounds=policy.bcrypt_rounds,
+        argon2__type="ID",
+        argon2__time_cost=policy.argon2_time_cost,
+        argon2__memory_cost=policy.argon2_memory_cost,
+        argon2__parallelism=policy.argon2_parallelism,
+    )
+
+def benchmark(policy: HashingPolicy, samples: int = 3) -> float:
+    """Return the median time in milliseconds to hash one password with the policy."""
+    context = build_context(policy)
+    timings: List[float] = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(BENCHMARK_PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def tune(scheme: str, target_ms: float, samples: int = 3) -> Tuple[HashingPolicy, Dict[int, float]]:
+    """
+    Pick the strongest cost parameter whose hash time stays within `target_ms` on this machine.
+
+    Only the cheapest setting is measured; the cost of the others is derived from
+    it, since bcrypt time doubles with each round and argon2 time grows linearly
+    with the time cost. The result never drops below the MIN_* floors, even on
+    hardware too slow to meet the target.
+
+    Args:
+        scheme: `bcrypt` or `argon2`
+        target_ms: Hashing latency budget per password
+        samples: Hashes to time; the median is used
+
+    Returns:
+        Tuple[HashingPolicy, Dict[int, float]]: Tuned policy, and the estimated
+            milliseconds per cost value that was considered
+    """
+    if scheme == ARGON2:
+        base_ms = benchmark(HashingPolicy(scheme=ARGON2, argon2_time_cost=1), samples)
+        estimates = {cost: base_ms * cost for cost in range(MIN_ARGON2_TIME_COST, MAX_ARGON2_TIME_COST + 1)}
+    else:
+        base_ms = benchmark(HashingPolicy(scheme=BCRYPT, bcrypt_rounds=MIN_BCRYPT_ROUNDS), samples)
+        estimates = {
+            rounds: base_ms * 2 ** (rounds - MIN_BCRYPT_ROUNDS)
+            for rounds in range(MIN_BCRYPT_ROUNDS, MAX_BCRYPT_ROUNDS + 1)
+        }
+
+    within_budget = [cost for cost, estimate in estimates.items() if estimate <= target_ms]
+    cost = max(within_budget) if within_budget else min(estimates)
+    if not within_budget:
+        logger.warning("No %s cost fits a %.0f ms budget on this machine, using the minimum", scheme, target_ms)
+
+    if scheme == ARGON2:
+        policy = HashingPolicy(scheme=ARGON2, argon2_time_cost=cost)
+    else:
+        policy = HashingPolicy(scheme=BCRYPT, bcrypt_rounds=cost)
+    return policy, estimates
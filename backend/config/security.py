@@ -1,21 +1,58 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
+from common.context import ContextProxy, get_context
+from common.metrics import Histogram
+from common.tracing import span
+from config.hashing import HashingPolicy, build_context
 from config.settings import SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing of the active app context
+pwd_context = ContextProxy("pwd_context")
+
+# Password hashing latency
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent hashing and verifying passwords", ["operation"]
+)
 
 def verify_password(plain_password, hashed_password):
     """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("password.verify", PASSWORD_HASH_SECONDS.labels(operation="verify")):
+        return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if its hash is outdated.
+
+    Returns:
+        Tuple[bool, Optional[str]]: (valid, new hash to store, or None if the
+            stored hash already matches the current policy)
+    """
+    with span("password.verify", PASSWORD_HASH_SECONDS.labels(operation="verify")):
+        return pwd_context.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
     """Generate a password hash."""
-    return pwd_context.hash(password)
+    with span("password.hash", PASSWORD_HASH_SECONDS.labels(operation="hash")):
+        return pwd_context.hash(password)
+
+async def verify_password_async(plain_password, hashed_password):
+    """Verify a password on the hashing worker pool, off the event loop."""
+    return await get_context().run_hash(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Verify and, if needed, rehash a password on the hashing worker pool."""
+    return await get_context().run_hash(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """Generate a password hash on the hashing worker pool, off the event loop."""
+    return await get_context().run_hash(get_password_hash, password)
+
+def configure_password_hashing(policy: HashingPolicy):
+    """Hash new passwords with `policy`; existing hashes are upgraded as users log in."""
+    get_context().pwd_context = build_context(policy)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
@@ -40,3 +40,112 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 # Token expiration settings
 VERIFICATION_TOKEN_EXPIRE_HOURS = 24
 RESET_PASSWORD_TOKEN_EXPIRE_HOURS = 24
+
+# Notification event log settings
+NOTIFICATION_LOG_SIZE = int(os.getenv("NOTIFICATION_LOG_SIZE", "1000"))
+NOTIFICATION_LOG_PERSIST = os.getenv("NOTIFICATION_LOG_PERSIST", "False").lower() in ("true", "1", "t")
+NOTIFICATION_LOG_RETENTION = int(os.getenv("NOTIFICATION_LOG_RETENTION", "100000"))
+NOTIFICATION_REPLAY_BATCH_SIZE = int(os.getenv("NOTIFICATION_REPLAY_BATCH_SIZE", "100"))
+
+# Notification batching settings
+NOTIFICATION_BATCH_ENABLED = os.getenv("NOTIFICATION_BATCH_ENABLED", "False").lower() in ("true", "1", "t")
+NOTIFICATION_BATCH_WINDOW_MS = int(os.getenv("NOTIFICATION_BATCH_WINDOW_MS", "100"))
+NOTIFICATION_BATCH_MAX_EVENTS = int(os.getenv("NOTIFICATION_BATCH_MAX_EVENTS", "50"))
+
+# Server-Sent Events and long-poll settings
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))
+NOTIFICATION_STREAM_KEEPALIVE_SECONDS = int(os.getenv("NOTIFICATION_STREAM_KEEPALIVE_SECONDS", "15"))
+NOTIFICATION_POLL_TIMEOUT_SECONDS = int(os.getenv("NOTIFICATION_POLL_TIMEOUT_SECONDS", "25"))
+
+# Logging settings
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+# Tracing and profiling settings
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "True").lower() in ("true", "1", "t")
+TRACE_SLOW_REQUEST_MS = int(os.getenv("TRACE_SLOW_REQUEST_MS", "1000"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# Admin settings (comma-separated list of admin email addresses)
+ADMIN_EMAILS = [email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()]
+
+# Serialized /auth/me response cache settings
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Application context settings
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "2"))
+SHUTDOWN_DRAIN_SECONDS = int(os.getenv("SHUTDOWN_DRAIN_SECONDS", "10"))
+
+# Graceful notification drain settings
+NOTIFICATION_DRAIN_SECONDS = int(os.getenv("NOTIFICATION_DRAIN_SECONDS", "10"))
+NOTIFICATION_RECONNECT_MIN_MS = int(os.getenv("NOTIFICATION_RECONNECT_MIN_MS", "500"))
+NOTIFICATION_RECONNECT_MAX_MS = int(os.getenv("NOTIFICATION_RECONNECT_MAX_MS", "10000"))
+
+# Password hashing settings (argon2 needs the optional argon2-cffi package)
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt").lower()
+PASSWORD_HASH_TARGET_MS = int(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+PASSWORD_HASH_AUTOTUNE = os.getenv("PASSWORD_HASH_AUTOTUNE", "False").lower() in ("true", "1", "t")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Production server settings (serve.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))  # 0 means one per CPU
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "True").lower() in ("true", "1", "t")
+SERVER_WS_MAX_SIZE = int(os.getenv("SERVER_WS_MAX_SIZE", "65536"))
+SERVER_WS_MAX_QUEUE = int(os.getenv("SERVER_WS_MAX_QUEUE", "32"))
+SERVER_WS_PING_INTERVAL = float(os.getenv("SERVER_WS_PING_INTERVAL", "20"))
+SERVER_WS_PING_TIMEOUT = float(os.getenv("SERVER_WS_PING_TIMEOUT", "20"))
+
+# Idempotency-Key settings
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_WAIT_SECONDS = int(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+# Per-recipient email cooldown settings
+EMAIL_COOLDOWN_SECONDS = int(os.getenv("EMAIL_COOLDOWN_SECONDS", "60"))
+EMAIL_COOLDOWN_MAX_ENTRIES = int(os.getenv("EMAIL_COOLDOWN_MAX_ENTRIES", "100000"))
+# Persisting writes cooldowns with a SQLite-only upsert
+EMAIL_COOLDOWN_PERSIST = os.getenv("EMAIL_COOLDOWN_PERSIST", "False").lower() in ("true", "1", "t")
+EMAIL_TOKEN_REUSE_MIN_SECONDS = int(os.getenv("EMAIL_TOKEN_REUSE_MIN_SECONDS", "3600"))
+
+# Email token settings; stateless tokens are signed and never stored
+STATELESS_EMAIL_TOKENS = os.getenv("STATELESS_EMAIL_TOKENS", "False").lower() in ("true", "1", "t")
+
+# Auth audit log settings; overflow policy is drop_oldest, drop_newest or block
+AUDIT_LOG_ENABLED = os.getenv("AUDIT_LOG_ENABLED", "True").lower() in ("true", "1", "t")
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "drop_oldest")
+AUDIT_BLOCK_TIMEOUT_MS = int(os.getenv("AUDIT_BLOCK_TIMEOUT_MS", "1000"))
+
+# Last login / last seen tracking; longer flush intervals mean fewer writes but staler values
+ACTIVITY_TRACKING_ENABLED = os.getenv("ACTIVITY_TRACKING_ENABLED", "True").lower() in ("true", "1", "t")
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "30"))
+ACTIVITY_SEEN_RESOLUTION_SECONDS = float(os.getenv("ACTIVITY_SEEN_RESOLUTION_SECONDS", "60"))
+ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "10000"))
+
+# Adaptive concurrency limiting; algorithm is gradient or aimd
+CONCURRENCY_LIMIT_ENABLED = os.getenv("CONCURRENCY_LIMIT_ENABLED", "True").lower() in ("true", "1", "t")
+CONCURRENCY_ALGORITHM = os.getenv("CONCURRENCY_ALGORITHM", "gradient")
+CONCURRENCY_INITIAL_LIMIT = int(os.getenv("CONCURRENCY_INITIAL_LIMIT", "20"))
+CONCURRENCY_MIN_LIMIT = int(os.getenv("CONCURRENCY_MIN_LIMIT", "2"))
+CONCURRENCY_MAX_LIMIT = int(os.getenv("CONCURRENCY_MAX_LIMIT", "200"))
+CONCURRENCY_GLOBAL_INITIAL_LIMIT = int(os.getenv("CONCURRENCY_GLOBAL_INITIAL_LIMIT", "100"))
+CONCURRENCY_GLOBAL_MAX_LIMIT = int(os.getenv("CONCURRENCY_GLOBAL_MAX_LIMIT", "1000"))
+CONCURRENCY_LATENCY_TOLERANCE = float(os.getenv("CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+CONCURRENCY_QUEUE_SIZE = int(os.getenv("CONCURRENCY_QUEUE_SIZE", "50"))
+CONCURRENCY_QUEUE_TIMEOUT_MS = int(os.getenv("CONCURRENCY_QUEUE_TIMEOUT_MS", "500"))
+CONCURRENCY_RETRY_AFTER_SECONDS = int(os.getenv("CONCURRENCY_RETRY_AFTER_SECONDS", "1"))
+# Route priority overrides as "path=class" pairs, e.g. "/api/auth/register=high"
+CONCURRENCY_ROUTE_PRIORITIES = os.getenv("CONCURRENCY_ROUTE_PRIORITIES", "")
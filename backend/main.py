@@ -1,15 +1,22 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 
-from config.database import database, create_tables
+from common.concurrency import ConcurrencyLimitMiddleware
+from common.context import AppContext, AppContextMiddleware, set_default_context
+from common.log import setup_logging
+from common.metrics import CONTENT_TYPE_LATEST, generate_latest
+from common.responses import FastJSONResponse
+from common.tracing import TracingMiddleware
+from config.database import create_tables
 from config.settings import ORIGINS
 from routers import api_router
 
-# Create FastAPI application with enhanced documentation
-app = FastAPI(
-    title="Auth Notification App API",
-    description="""
+# Overview shown at the top of the API documentation
+API_DESCRIPTION = """
     API for Authentication and Real-time Notifications.
     
     ## Features
@@ -22,50 +29,98 @@ app = FastAPI(
     JWT-based authentication is used. To access protected endpoints:
     1. Log in using the `/api/auth/login` endpoint
     2. Use the returned token in the Authorization header: `Bearer {token}`
-    """,
-    version="1.0.0",
-    openapi_tags=[
-        {
-            "name": "auth",
-            "description": "Authentication operations including register, login, and user info",
-        },
-        {
-            "name": "notifications",
-            "description": "Real-time notification endpoints using WebSockets",
+    """
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the application context on startup and drain it on shutdown."""
+    # Route logging through a background thread in the process serving the app
+    setup_logging()
+    context: AppContext = app.state.context
+    await context.start()
+    try:
+        yield
+    finally:
+        await context.stop()
+
+def create_app(context: Optional[AppContext] = None) -> FastAPI:
+    """
+    Build the application around its own context.
+    
+    Args:
+        context: Resources for the app; a new context from settings by default
+    """
+    context = context or AppContext()
+    set_default_context(context)
+    
+    # Create FastAPI application with enhanced documentation
+    app = FastAPI(
+        title="Auth Notification App API",
+        description=API_DESCRIPTION,
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+        openapi_tags=[
+            {
+                "name": "auth",
+                "description": "Authentication operations including register, login, and user info",
+            },
+            {
+                "name": "users",
+                "description": "Incremental sync of user changes",
+            },
+            {
+                "name": "notifications",
+                "description": "Real-time notification endpoints using WebSockets",
+            },
+            {
+                "name": "admin",
+                "description": "Operational endpoints restricted to admin accounts",
+            },
+        ],
+        contact={
+            "name": "API Support",
+            "email": "support@example.com",
         },
-    ],
-    contact={
-        "name": "API Support",
-        "email": "support@example.com",
-    },
-)
+    )
 
-# Setup CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Shed load per route and priority; inside CORS so 503s carry CORS headers
+    app.add_middleware(ConcurrencyLimitMiddleware, limiter=context.concurrency)
 
-# Include API router
-app.include_router(api_router)
+    # Setup CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-# Create database tables on startup
-create_tables()
+    # Record per-stage span timings for every request
+    app.add_middleware(TracingMiddleware)
 
-@app.on_event("startup")
-async def startup():
-    """Connect to database on application startup."""
-    await database.connect()
+    # Make this app's context active for everything it handles
+    app.state.context = context
+    app.add_middleware(AppContextMiddleware, context=context)
+
+    # Include API router
+    app.include_router(api_router)
+
+    @app.get("/", tags=["status"])
+    async def root():
+        """Redirect to the API documentation."""
+        return RedirectResponse(url="/docs")
+
+    @app.get("/metrics", tags=["status"])
+    async def metrics():
+        """Expose application metrics in the Prometheus text format."""
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    # Create database tables
+    create_tables(context.database_url)
+    
+    return app
 
-@app.on_event("shutdown")
-async def shutdown():
-    """Disconnect from database on application shutdown."""
-    await database.disconnect()
+# Application served by uvicorn (main:app)
+app = create_app()
 
-@app.get("/", tags=["status"])
-async def root():
-    """Redirect to the API documentation."""
-    return RedirectResponse(url="/docs")
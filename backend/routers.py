@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from apps.admin.routes import router as admin_router
 from apps.notifications.routes import router as notification_router
 from apps.users.routes import router as user_router
 
@@ -9,3 +10,4 @@ api_router = APIRouter()
 # Include all application routers
 api_router.include_router(user_router, prefix="/api")
 api_router.include_router(notification_router, prefix="/api/notifications")
+api_router.include_router(admin_router, prefix="/api/admin")
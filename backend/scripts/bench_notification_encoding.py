@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark notification wire formats: bytes on the wire and CPU per 10k deliveries.
+Run this script from the backend container with: python /app/scripts/bench_notification_encoding.py [--json]
+
+For every available encoding it reports:
+- payload bytes per delivery, raw and with permessage-deflate (with and without
+  context takeover, as negotiated by browsers and by `websockets` respectively)
+- CPU to encode per delivery (the old send_json path) vs once per broadcast
+- CPU spent compressing, which permessage-deflate pays per connection
+"""
+
+import argparse
+import json
+import sys
+import time
+import zlib
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+from apps.notifications.encoding import MSGPACK, available_encodings, encode_notification
+from apps.notifications.schemas import Notification
+
+DELIVERIES = 10_000
+
+def sample_notifications():
+    """Build a single-user and a batched notification of realistic size."""
+    single = Notification(
+        type="NEW_USER",
+        message="A new user has registered",
+        data={"email": "someone.new@example.com"},
+        seq=1_700_000_000_000_001,
+    )
+    batch = Notification(
+        type="NEW_USERS",
+        message="50 new users have registered",
+        data={
+            "users": [
+                {"email": f"user{i}@example.com", "seq": 1_700_000_000_000_001 + i}
+                for i in range(50)
+            ],
+            "count": 50,
+        },
+        seq=1_700_000_000_000_050,
+    )
+    return {"NEW_USER": single, "NEW_USERS": batch}
+
+def deflate_message(compressor, payload: bytes) -> bytes:
+    """Compress one message the way permessage-deflate frames it (RFC 7692)."""
+    data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return data[:-4] if data.endswith(b"\x00\x00\xff\xff") else data
+
+def to_bytes(payload) -> bytes:
+    return payload if isinstance(payload, bytes) else payload.encode("utf-8")
+
+def bench(notification: Notification, encoding: str, clients: int) -> dict:
+    """Measure one notification shape in one wire format."""
+    broadcasts = DELIVERIES // clients
+
+    # Old path: every delivery re-encodes the notification
+    start = time.process_time()
+    for _ in range(DELIVERIES):
+        notification._encoded.clear()
+        encode_notification(notification, encoding)
+    per_delivery_cpu = time.process_time() - start
+
+    # Shared path: one encoding per broadcast, reused for every client
+    start = time.process_time()
+    for _ in range(broadcasts):
+        notification._encoded.clear()
+        for _ in range(clients):
+            encode_notification(notification, encoding)
+    shared_cpu = time.process_time() - start
+
+    payload = to_bytes(encode_notification(notification, encoding))
+
+    # permessage-deflate without context takeover: every message compressed alone
+    start = time.process_time()
+    for _ in range(DELIVERIES):
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        no_takeover = deflate_message(compressor, payload)
+    no_takeover_cpu = time.process_time() - start
+
+    # permessage-deflate with context takeover: one stream per connection
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    start = time.process_time()
+    takeover_total = 0
+    for _ in range(DELIVERIES):
+        takeover_total += len(deflate_message(compressor, payload))
+    takeover_cpu = time.process_time() - start
+
+    return {
+        "notification": notification.type,
+        "encoding": encoding,
+        "deliveries": DELIVERIES,
+        "clients": clients,
+        "bytes_per_delivery": len(payload),
+        "bytes_per_delivery_deflate": len(no_takeover),
+        "bytes_per_delivery_deflate_takeover": round(takeover_total / DELIVERIES, 1),
+        "encode_cpu_ms_per_delivery_path": round(per_delivery_cpu * 1000, 2),
+        "encode_cpu_ms_shared_path": round(shared_cpu * 1000, 2),
+        "deflate_cpu_ms": round(no_takeover_cpu * 1000, 2),
+        "deflate_takeover_cpu_ms": round(takeover_cpu * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="Connected clients per broadcast")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+    if not 1 <= args.clients <= DELIVERIES:
+        parser.error(f"--clients must be between 1 and {DELIVERIES}")
+    if MSGPACK not in available_encodings():
+        print("msgpack is not installed; only measuring JSON", file=sys.stderr)
+
+    results = [
+        bench(notification, encoding, args.clients)
+        for notification in sample_notifications().values()
+        for encoding in available_encodings()
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Per {DELIVERIES} deliveries to {args.clients} clients per broadcast")
+    header = f"{'frame':<10} {'format':<8} {'bytes':>7} {'deflate':>8} {'takeover':>9} {'enc/deliv ms':>13} {'enc shared ms':>14} {'deflate ms':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['notification']:<10} {r['encoding']:<8} {r['bytes_per_delivery']:>7} "
+            f"{r['bytes_per_delivery_deflate']:>8} {r['bytes_per_delivery_deflate_takeover']:>9} "
+            f"{r['encode_cpu_ms_per_delivery_path']:>13} {r['encode_cpu_ms_shared_path']:>14} "
+            f"{r['deflate_cpu_ms']:>11}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark CPU per response for the auth endpoints: response_model validation vs precompiled serializers.
+Run this script from the backend container with: python /app/scripts/bench_responses.py [--iterations 20000] [--json]
+
+For `User` (a real database row), `Token` and `VerificationResponse` it times:
+- model: what FastAPI does for an endpoint returning the row or a dict with
+  `response_model` set: validate into the model, dump it to JSON-compatible
+  Python, then render a JSONResponse
+- serializer: the endpoint returns a FastJSONResponse holding the bytes from
+  the model's RowSerializer (orjson when installed)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+# Throwaway database for the sample row; must happen before app imports
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-responses-'), 'bench.db')}"
+
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from apps.users import schemas, serializers
+from apps.users.models import users
+from common import responses
+from common.responses import FastJSONResponse
+from config.database import create_tables, database
+
+async def sample_user():
+    """Insert a user and read it back as the databases Record the endpoints get."""
+    create_tables()
+    await database.connect()
+    try:
+        user_id = await database.execute(users.insert().values(
+            email="someone.new@example.com",
+            hashed_password="$2b$12$" + "x" * 53,
+            is_verified=True,
+            created_at=datetime(2024, 5, 17, 9, 30, 12, 345678),
+            verification_token="a" * 43,
+        ))
+        return await database.fetch_one(users.select().where(users.c.id == user_id))
+    finally:
+        await database.disconnect()
+
+async def time_model_path(model, content, iterations: int) -> float:
+    field = create_model_field(name="Response_bench", type_=model, mode="serialization")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = await serialize_response(field=field, response_content=content)
+        JSONResponse(body).body
+    return time.perf_counter() - start
+
+async def time_serializer_path(serializer, content, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        FastJSONResponse(serializer(content)).body
+    return time.perf_counter() - start
+
+async def run(iterations: int) -> dict:
+    user = await sample_user()
+    cases = {
+        "User": (schemas.User, serializers.user, user),
+        "Token": (schemas.Token, serializers.token, {"access_token": "eyJhbGciOiJIUzI1NiJ9." + "x" * 120, "token_type": "bearer"}),
+        "VerificationResponse": (
+            schemas.VerificationResponse,
+            serializers.verification,
+            {"success": True, "message": "Email verification successful. You can now log in."},
+        ),
+    }
+
+    results = {}
+    for name, (model, serializer, content) in cases.items():
+        # Both paths must produce the same document
+        expected = json.loads(JSONResponse(await serialize_response(
+            field=create_model_field(name="Response_check", type_=model, mode="serialization"),
+            response_content=content,
+        )).body)
+        if json.loads(serializer(content)) != expected:
+            raise SystemExit(f"Serializer output for {name} differs from the response model")
+
+        model_s = await time_model_path(model, content, iterations)
+        serializer_s = await time_serializer_path(serializer, content, iterations)
+        results[name] = {
+            "model_us": round(model_s / iterations * 1e6, 2),
+            "serializer_us": round(serializer_s / iterations * 1e6, 2),
+            "saved_us": round((model_s - serializer_s) / iterations * 1e6, 2),
+            "speedup": round(model_s / serializer_s, 1),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response model validation with precompiled serializers")
+    parser.add_argument("--iterations", type=int, default=20000, help="Responses per measurement")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.iterations))
+    if args.json:
+        print(json.dumps({"orjson": responses.orjson is not None, "results": results}, indent=2))
+        return
+
+    print(f"JSON backend: {'orjson' if responses.orjson is not None else 'json'}\n")
+    print(f"{'response':<22}{'model (us)':>12}{'serializer (us)':>17}{'saved (us)':>12}{'speedup':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<22}{result['model_us']:>12}{result['serializer_us']:>17}"
+            f"{result['saved_us']:>12}{result['speedup']:>8}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark requests/sec of the production entry point against the development launch mode.
+Run this script from the backend container with: python /app/scripts/bench_server.py [--duration 15] [--workers N]
+
+Each mode is started as its own process on a throwaway SQLite database shared
+by both runs, and driven with the load test client (scripts/loadtest.py) for
+the same duration and operation mix:
+
+- reload: `uvicorn main:app --reload`, the Dockerfile's previous CMD
+- serve:  `python serve.py`, pre-forked workers with uvloop/httptools when installed
+
+Prints a JSON report with throughput and latency percentiles per mode and the
+speedup of serve over reload. Worker processes only help on machines with
+more than one CPU.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only /me by default, so password hashing does not hide the server overhead
+DEFAULT_MIX = "me=1"
+
+def launch_command(mode: str, port: int, workers: int):
+    if mode == "reload":
+        return [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--reload"]
+    return [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode} before becoming ready")
+        try:
+            with urllib.request.urlopen(f"{url}/docs", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not become ready within {timeout}s")
+
+def run_mode(mode: str, args, emails, verification_tokens) -> dict:
+    """Start the server in the given mode, load it and stop it."""
+    from scripts.loadtest import LoadTest, free_port, parse_args as loadtest_args
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    process = subprocess.Popen(
+        launch_command(mode, port, args.workers),
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(url, process)
+        load_args = loadtest_args([
+            "--url", url,
+            "--duration", str(args.duration),
+            "--concurrency", str(args.concurrency),
+            "--subscribers", "0",
+            "--mix", args.mix,
+            "--seed", "1",
+        ])
+        print(f"Benchmarking {mode} for {args.duration:.0f}s...", file=sys.stderr)
+        return asyncio.run(LoadTest(load_args, url, uuid.uuid4().hex[:8], emails, verification_tokens).run())
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serve.py with the uvicorn --reload launch mode")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds of load per mode")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent request workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes for serve.py")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=20, help="Verified users to seed")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    # Both servers and the seeding share one throwaway database; must happen before app imports
+    db_dir = tempfile.mkdtemp(prefix="bench-server-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+
+    from scripts.loadtest import seed_users
+
+    emails, verification_tokens = asyncio.run(seed_users(uuid.uuid4().hex[:8], args.users, 0))
+
+    results = {}
+    for mode in ("reload", "serve"):
+        report = run_mode(mode, args, emails, verification_tokens)
+        results[mode] = {
+            "throughput_rps": report["throughput_rps"],
+            "operations": report["operations"],
+        }
+
+    baseline = results["reload"]["throughput_rps"]
+    report = {
+        "config": {
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "cpus": os.cpu_count(),
+            "mix": args.mix,
+        },
+        "modes": results,
+        "speedup": round(results["serve"]["throughput_rps"] / baseline, 2) if baseline else None,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    print(f"✅ serve.py: {results['serve']['throughput_rps']} rps, uvicorn --reload: {baseline} rps", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQL compile overhead per request: Core expressions built per call vs registered statements.
+Run this script from the backend container with: python /app/scripts/bench_statements.py [--iterations 5000] [--json]
+
+Times what the SQLite backend of `databases` does before sending a query:
+building the expression (old crud code) and turning it into SQL and arguments,
+against binding values to a statement from apps/users/crud.py that was
+compiled once. Results are per statement and per request, for the
+statements each endpoint runs. No database is touched.
+"""
+
+import argparse
+import json
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+import sqlalchemy
+from databases import DatabaseURL
+from databases.backends.sqlite import SQLiteBackend, SQLiteConnection
+from sqlalchemy import func
+
+from apps.users import crud
+from apps.users.models import users
+
+# Statements run by each endpoint (cache misses for /me)
+REQUESTS = {
+    "login": ["get_user_by_email"],
+    "me": ["get_user"],
+    "register": ["get_user_by_email", "create_user", "get_user"],
+    "verify-email": ["verify_email.lookup", "verify_email.update"],
+    "reset-password": ["reset_password.lookup", "reset_password.update"],
+}
+
+def bump_version() -> dict:
+    next_version = sqlalchemy.select([func.coalesce(func.max(users.c.version), 0) + 1]).scalar_subquery()
+    return {"version": next_version, "updated_at": datetime.utcnow()}
+
+def cases():
+    """Old expression builder and registered statement per query, with sample values."""
+    email = "someone.new@example.com"
+    token = secrets.token_urlsafe(32)
+    hashed = "$2b$12$" + "x" * 53
+    expires = datetime.utcnow() + timedelta(hours=24)
+    return {
+        "get_user_by_email": (
+            lambda: users.select().where(users.c.email == email),
+            lambda: crud.GET_USER_BY_EMAIL.bind(email=email),
+        ),
+        "get_user": (
+            lambda: users.select().where(users.c.id == 42),
+            lambda: crud.GET_USER.bind(user_id=42),
+        ),
+        "create_user": (
+            lambda: users.insert().values(
+                email=email, created_at=datetime.utcnow(), hashed_password=hashed, is_verified=False,
+                verification_token=token, verification_token_expires=expires, **bump_version()
+            ),
+            lambda: crud.CREATE_USER.bind(
+                new_email=email, new_created_at=datetime.utcnow(), new_hashed_password=hashed, new_is_verified=False,
+                new_verification_token=token, new_verification_token_expires=expires, changed_at=datetime.utcnow(),
+            ),
+        ),
+        "verify_email.lookup": (
+            lambda: users.select().where(users.c.verification_token == token),
+            lambda: crud.VERIFY_EMAIL_LOOKUP.bind(token=token),
+        ),
+        "verify_email.update": (
+            lambda: users.update().where(users.c.id == 42).values(
+                is_verified=True, verification_token=None, verification_token_expires=None, **bump_version()
+            ),
+            lambda: crud.VERIFY_EMAIL_UPDATE.bind(user_id=42, changed_at=datetime.utcnow()),
+        ),
+        "reset_password.lookup": (
+            lambda: users.select().where(users.c.reset_password_token == token),
+            lambda: crud.RESET_PASSWORD_LOOKUP.bind(token=token),
+        ),
+        "reset_password.update": (
+            lambda: users.update().where(users.c.id == 42).values(
+                hashed_password=hashed, reset_password_token=None, reset_password_token_expires=None, **bump_version()
+            ),
+            lambda: crud.RESET_PASSWORD_UPDATE.bind(user_id=42, new_hashed_password=hashed, changed_at=datetime.utcnow()),
+        ),
+    }
+
+def time_path(connection: SQLiteConnection, build, iterations: int) -> float:
+    """Seconds per query to build it and compile it the way the backend does."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        connection._compile(build())
+    return (time.perf_counter() - start) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-call SQL compilation with registered statements")
+    parser.add_argument("--iterations", type=int, default=5000, help="Compilations per measurement")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    # Same dialect settings as the app's database backend
+    backend = SQLiteBackend(DatabaseURL("sqlite:///:memory:"))
+    connection = SQLiteConnection(None, backend._dialect)
+
+    statements = {}
+    for name, (old, new) in cases().items():
+        # Both must render the same SQL apart from bind parameter names
+        old_sql, old_args, _ = connection._compile(old())
+        new_sql, new_args, _ = connection._compile(new())
+        if old_sql.count("?") != new_sql.count("?") or len(old_args) != len(new_args):
+            raise SystemExit(f"Registered statement {name} does not match the old query")
+
+        old_s = time_path(connection, old, args.iterations)
+        new_s = time_path(connection, new, args.iterations)
+        statements[name] = {"before_us": round(old_s * 1e6, 1), "after_us": round(new_s * 1e6, 1)}
+
+    requests = {}
+    for request, names in REQUESTS.items():
+        before = sum(statements[name]["before_us"] for name in names)
+        after = sum(statements[name]["after_us"] for name in names)
+        requests[request] = {"before_us": round(before, 1), "after_us": round(after, 1), "saved_us": round(before - after, 1)}
+
+    if args.json:
+        print(json.dumps({"statements": statements, "requests": requests}, indent=2))
+        return
+
+    print(f"{'statement':<24}{'before (us)':>13}{'after (us)':>12}")
+    for name, result in statements.items():
+        print(f"{name:<24}{result['before_us']:>13}{result['after_us']:>12}")
+    print(f"\n{'request':<24}{'before (us)':>13}{'after (us)':>12}{'saved (us)':>12}")
+    for name, result in requests.items():
+        print(f"{name:<24}{result['before_us']:>13}{result['after_us']:>12}{result['saved_us']:>12}")
+
+if __name__ == "__main__":
+    main()
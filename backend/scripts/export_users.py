@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script to export users to NDJSON or CSV without loading the table into memory.
+Run this script from the backend container with: python /app/scripts/export_users.py [options]
+
+Examples:
+    python /app/scripts/export_users.py --format csv --output /app/users.csv
+    python /app/scripts/export_users.py --gzip --verified --output /app/verified.ndjson.gz
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+from apps.admin.export import CSV, NDJSON, export_users
+from config.database import database
+
+async def run_export(args):
+    """Write the export to a file, or stdout."""
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        await database.connect()
+        
+        async for data in export_users(
+            args.format,
+            gzip=args.gzip,
+            chunk_size=args.chunk_size,
+            verified=args.verified,
+            created_from=args.created_from,
+            created_to=args.created_to,
+            email_prefix=args.email_prefix,
+        ):
+            out.write(data)
+            written += len(data)
+        
+        print(f"✅ Exported {written} bytes", file=sys.stderr)
+        
+    except Exception as e:
+        print(f"❌ Error exporting users: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output:
+            out.close()
+        # Close the database connection
+        await database.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export users to NDJSON or CSV")
+    parser.add_argument("--format", choices=[NDJSON, CSV], default=NDJSON, help="Output format")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows read per query")
+    verified = parser.add_mutually_exclusive_group()
+    verified.add_argument("--verified", dest="verified", action="store_true", default=None, help="Only verified users")
+    verified.add_argument("--unverified", dest="verified", action="store_false", help="Only unverified users")
+    parser.add_argument("--created-from", type=datetime.fromisoformat, help="Only users created at or after this time (UTC)")
+    parser.add_argument("--created-to", type=datetime.fromisoformat, help="Only users created before this time (UTC)")
+    parser.add_argument("--email-prefix", help="Only users whose email starts with this")
+    
+    asyncio.run(run_export(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Load-test the auth and notification endpoints and report machine-readable results.
+Run this script from the backend container with: python /app/scripts/loadtest.py [options]
+
+By default the app is started in-process on a throwaway SQLite database; pass
+--url to drive a local uvicorn instead (seed users are then written through
+DATABASE_URL, so point it at the same database the server uses).
+
+Workers pick operations from a weighted mix (register, login, me, verify) for
+--duration seconds while --subscribers WebSocket clients listen for the
+NEW_USER notifications triggered by registrations. The JSON report holds
+throughput and p50/p95/p99 latency per operation and the broadcast delivery
+lag (register request sent -> notification received by each subscriber).
+
+Use --baseline to compare against an earlier report; the script exits with
+status 1 when throughput drops or p95 latency grows by more than
+--max-regression.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import aiohttp
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+DEFAULT_MIX = "register=1,login=2,me=10,verify=1"
+PASSWORD = "password123"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server; omit to run the app in-process")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to generate load for")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent request workers")
+    parser.add_argument("--subscribers", type=int, default=10, help="WebSocket subscribers listening for broadcasts")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=20, help="Verified users to seed for login and me")
+    parser.add_argument("--verify-pool", type=int, default=50, help="Unverified users to seed for verify")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Allowed relative regression (default 0.10)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for a reproducible operation sequence")
+    return parser.parse_args(argv)
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse `op=weight,...` into a weight per operation."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("register", "login", "me", "verify"):
+            raise SystemExit(f"Unknown operation in mix: {name}")
+        weights[name] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Summarize latencies (seconds) as milliseconds."""
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class InProcessServer:
+    """Run the app with uvicorn in a background thread."""
+
+    def __init__(self):
+        import uvicorn
+        from main import app
+
+        self.port = free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="loadtest-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise SystemExit("In-process server failed to start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+async def seed_users(run_id: str, users: int, verify_pool: int):
+    """Create verified users for login/me and unverified ones for verify."""
+    from apps.users import crud
+    from config.database import database, create_tables
+
+    create_tables()
+    await database.connect()
+    try:
+        verified = []
+        for i in range(users):
+            email = f"lt-{run_id}-u{i}@example.com"
+            await crud.create_user(email, PASSWORD, is_verified=True)
+            verified.append(email)
+        verification_tokens = []
+        for i in range(verify_pool):
+            user = await crud.create_user(f"lt-{run_id}-v{i}@example.com", PASSWORD, is_verified=False)
+            verification_tokens.append(crud.verification_token(user))
+        return verified, verification_tokens
+    finally:
+        await database.disconnect()
+
+class LoadTest:
+    """Drive the configured mix against a server and collect measurements."""
+
+    def __init__(self, args, base_url: str, run_id: str, emails: List[str], verification_tokens: List[str]):
+        self.args = args
+        self.base_url = base_url.rstrip("/")
+        self.run_id = run_id
+        self.emails = emails
+        self.verification_tokens = verification_tokens
+        self.mix = parse_mix(args.mix)
+        self.random = random.Random(args.seed)
+        self.tokens: List[str] = []
+        self.latencies: Dict[str, List[float]] = {op: [] for op in self.mix}
+        self.errors: Dict[str, int] = {op: 0 for op in self.mix}
+        self.register_sent: Dict[str, float] = {}
+        self.delivery_lags: List[float] = []
+        self.registered = 0
+        self.subscribers_connected = 0
+
+    async def login(self, session: aiohttp.ClientSession, email: str) -> Optional[str]:
+        data = {"username": email, "password": PASSWORD}
+        async with session.post(f"{self.base_url}/api/auth/login", data=data) as response:
+            if response.status != 200:
+                return None
+            return (await response.json())["access_token"]
+
+    async def op_register(self, session):
+        self.registered += 1
+        email = f"lt-{self.run_id}-r{self.registered}-{uuid.uuid4().hex[:6]}@example.com"
+        self.register_sent[email] = time.perf_counter()
+        async with session.post(f"{self.base_url}/api/auth/register", json={"email": email, "password": PASSWORD}) as response:
+            await response.read()
+            return response.status == 201
+
+    async def op_login(self, session):
+        return await self.login(session, self.random.choice(self.emails)) is not None
+
+    async def op_me(self, session):
+        headers = {"Authorization": f"Bearer {self.random.choice(self.tokens)}"}
+        async with session.get(f"{self.base_url}/api/auth/me", headers=headers) as response:
+            await response.read()
+            return response.status == 200
+
+    async def op_verify(self, session):
+        token = self.random.choice(self.verification_tokens)
+        async with session.get(f"{self.base_url}/api/auth/verify-email", params={"token": token}) as response:
+            await response.read()
+            return response.status == 200
+
+    async def worker(self, session, deadline: float):
+        ops = list(self.mix)
+        weights = [self.mix[op] for op in ops]
+        while time.perf_counter() < deadline:
+            op = self.random.choices(ops, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = await getattr(self, f"op_{op}")(session)
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                self.latencies[op].append(time.perf_counter() - start)
+            else:
+                self.errors[op] += 1
+
+    def record_delivery(self, notification: dict, received: float):
+        if notification.get("type") == "NEW_USER":
+            emails = [notification["data"].get("email")]
+        elif notification.get("type") == "NEW_USERS":
+            emails = [user.get("email") for user in notification["data"].get("users", [])]
+        else:
+            return
+        for email in emails:
+            sent = self.register_sent.get(email)
+            if sent is not None:
+                self.delivery_lags.append(received - sent)
+
+    async def subscriber(self, session, token: str, ready: asyncio.Event, stop: asyncio.Event):
+        ws_url = self.base_url.replace("http", "ws", 1) + f"/api/notifications/ws?token={token}"
+        async with session.ws_connect(ws_url) as ws:
+            self.subscribers_connected += 1
+            if self.subscribers_connected >= self.args.subscribers:
+                ready.set()
+            while not stop.is_set():
+                try:
+                    message = await ws.receive(timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                self.record_delivery(json.loads(message.data), time.perf_counter())
+
+    async def run(self) -> dict:
+        connector = aiohttp.TCPConnector(limit=self.args.concurrency + self.args.subscribers + 10)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for email in self.emails:
+                token = await self.login(session, email)
+                if token is None:
+                    raise SystemExit(f"Could not log in seeded user {email}")
+                self.tokens.append(token)
+
+            ready, stop = asyncio.Event(), asyncio.Event()
+            subscribers = [
+                asyncio.create_task(self.subscriber(session, self.tokens[i % len(self.tokens)], ready, stop))
+                for i in range(self.args.subscribers)
+            ]
+            if subscribers:
+                await asyncio.wait_for(ready.wait(), timeout=30)
+
+            start = time.perf_counter()
+            deadline = start + self.args.duration
+            await asyncio.gather(*(self.worker(session, deadline) for _ in range(self.args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+            # Give in-flight notifications a moment to arrive
+            await asyncio.sleep(0.5)
+            stop.set()
+            await asyncio.gather(*subscribers, return_exceptions=True)
+
+        operations = {op: summarize(self.latencies[op], self.errors[op], elapsed) for op in self.mix}
+        total = sum(len(values) for values in self.latencies.values())
+        expected = len(self.latencies.get("register", [])) * self.args.subscribers
+        broadcast = summarize(self.delivery_lags, 0, elapsed)
+        for key in ("errors", "throughput_rps"):
+            broadcast.pop(key)
+        broadcast["expected"] = expected
+        broadcast["missed"] = max(0, expected - len(self.delivery_lags))
+        return {
+            "config": {
+                "target": "in-process" if not self.args.url else self.base_url,
+                "duration_s": self.args.duration,
+                "concurrency": self.args.concurrency,
+                "subscribers": self.args.subscribers,
+                "mix": self.mix,
+            },
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+            "operations": operations,
+            "broadcast_lag": broadcast,
+        }
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """List the metrics that regressed beyond the allowed ratio."""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - max_regression):
+        regressions.append(f"throughput {baseline['throughput_rps']} -> {report['throughput_rps']} rps")
+    sections = dict(report["operations"], broadcast_lag=report["broadcast_lag"])
+    base_sections = dict(baseline["operations"], broadcast_lag=baseline["broadcast_lag"])
+    for name, stats in sections.items():
+        base = base_sections.get(name)
+        if not base or base.get("p95_ms") is None or stats.get("p95_ms") is None:
+            continue
+        if stats["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name} p95 {base['p95_ms']} -> {stats['p95_ms']} ms")
+    return regressions
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # The in-process app gets its own database; must happen before app imports
+    if not args.url:
+        db_dir = tempfile.mkdtemp(prefix="loadtest-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'loadtest.db')}"
+
+    run_id = uuid.uuid4().hex[:8]
+
+    # Seed before the in-process server starts so they don't share a connection
+    emails, verification_tokens = asyncio.run(seed_users(run_id, args.users, args.verify_pool))
+
+    server = None
+    if not args.url:
+        server = InProcessServer()
+        server.start()
+    base_url = args.url or server.url
+
+    try:
+        report = asyncio.run(LoadTest(args, base_url, run_id, emails, verification_tokens).run())
+    finally:
+        if server:
+            server.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Script to delete or archive users in small chunks without blocking live traffic.
+Run this script from the backend container with: python /app/scripts/maintenance.py <command> [options]
+
+Commands:
+    delete   Delete users matching the filters
+    archive  Append users matching the filters to a gzipped NDJSON file, then delete them
+    vacuum   Reclaim space and refresh query planner statistics
+
+Each chunk is its own short write transaction, followed by a pause, so the app
+keeps getting the SQLite write lock between chunks. Progress is checkpointed to
+a JSON file after every chunk; rerun with --resume to continue an interrupted
+run. Archiving is at-least-once: a chunk interrupted between the archive write
+and the delete is archived again on resume.
+
+Examples:
+    python /app/scripts/maintenance.py delete --unverified --created-before 2024-01-01 --dry-run
+    python /app/scripts/maintenance.py archive --created-before 2023-01-01 --archive /app/archive.ndjson.gz
+    python /app/scripts/maintenance.py delete --resume
+    python /app/scripts/maintenance.py vacuum --full
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+from apps.admin.export import ndjson_lines
+from apps.users import crud
+from config.database import database
+from config.settings import DATABASE_URL
+
+DEFAULT_CHECKPOINT = "maintenance-checkpoint.json"
+
+def load_checkpoint(path: str) -> dict:
+    """Read a checkpoint written by a previous run."""
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Write the checkpoint atomically, so a crash never leaves a torn file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def build_filters(args) -> dict:
+    """Filters for crud.get_user_chunk, in a JSON-serializable form."""
+    return {
+        "verified": args.verified,
+        "created_to": args.created_before,
+        "email_prefix": args.email_prefix,
+    }
+
+def parse_filters(filters: dict) -> dict:
+    """Convert checkpointed filters back into crud arguments."""
+    parsed = dict(filters)
+    if parsed.get("created_to"):
+        parsed["created_to"] = datetime.fromisoformat(parsed["created_to"])
+    return parsed
+
+def sqlite_path() -> str:
+    if not DATABASE_URL.startswith("sqlite:///"):
+        raise ValueError(f"Unsupported database type: {DATABASE_URL}")
+    return DATABASE_URL.replace("sqlite:///", "")
+
+def vacuum(full: bool = False):
+    """
+    Refresh planner statistics and reclaim free pages.
+
+    A full VACUUM rewrites the whole file and blocks writers while it runs, so
+    it only happens when asked for. Otherwise free pages are released with
+    incremental_vacuum when the database was created with auto_vacuum=INCREMENTAL.
+    """
+    conn = sqlite3.connect(sqlite_path(), isolation_level=None)
+    try:
+        logger.info("Running ANALYZE...")
+        conn.execute("ANALYZE")
+        if full:
+            logger.info("Running VACUUM (blocks writers until it finishes)...")
+            conn.execute("VACUUM")
+        else:
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if auto_vacuum == 2:
+                logger.info(f"Running incremental_vacuum ({free_pages} free pages)...")
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+            elif free_pages:
+                logger.info(f"{free_pages} free pages left; run 'vacuum --full' off-peak to reclaim them")
+        conn.execute("PRAGMA optimize")
+        logger.info("✅ Maintenance finished")
+    finally:
+        conn.close()
+
+async def process_users(args):
+    """Delete or archive matching users chunk by chunk."""
+    if args.resume:
+        checkpoint = load_checkpoint(args.checkpoint)
+        if checkpoint["command"] != args.command:
+            raise SystemExit(f"Checkpoint is for '{checkpoint['command']}', not '{args.command}'")
+        if checkpoint.get("completed"):
+            logger.info("Checkpoint says the run already completed, nothing to resume")
+            return
+        logger.info(f"Resuming {checkpoint['command']} after user id {checkpoint['last_id']}")
+    else:
+        filters = build_filters(args)
+        if not any(value is not None for value in filters.values()) and not args.all:
+            raise SystemExit("Refusing to touch every user; add filters or pass --all")
+        checkpoint = {
+            "command": args.command,
+            "filters": {key: value.isoformat() if isinstance(value, datetime) else value for key, value in filters.items()},
+            "archive": getattr(args, "archive", None),
+            "last_id": 0,
+            "processed": 0,
+            "started_at": datetime.utcnow().isoformat(),
+            "completed": False,
+        }
+
+    filters = parse_filters(checkpoint["filters"])
+    archive_path = checkpoint.get("archive")
+
+    await database.connect()
+    try:
+        while True:
+            rows = await crud.get_user_chunk(args.chunk_size, checkpoint["last_id"], **filters)
+            if not rows:
+                break
+
+            if args.dry_run:
+                checkpoint["processed"] += len(rows)
+                checkpoint["last_id"] = rows[-1]["id"]
+                continue
+
+            if archive_path:
+                # One gzip member per chunk; concatenated members are a valid gzip file
+                with gzip.open(archive_path, "ab") as f:
+                    f.write(ndjson_lines(rows).encode())
+                    f.flush()
+                    os.fsync(f.fileobj.fileno())
+
+            await crud.delete_users([row["id"] for row in rows])
+
+            checkpoint["last_id"] = rows[-1]["id"]
+            checkpoint["processed"] += len(rows)
+            save_checkpoint(args.checkpoint, checkpoint)
+            logger.info(f"{checkpoint['command']}: {checkpoint['processed']} users so far (last id {checkpoint['last_id']})")
+
+            # Let live traffic take the write lock between chunks
+            await asyncio.sleep(args.pause)
+    finally:
+        await database.disconnect()
+
+    if args.dry_run:
+        logger.info(f"Dry run: {checkpoint['processed']} users would be affected by {checkpoint['command']}")
+        return
+
+    checkpoint["completed"] = True
+    checkpoint["finished_at"] = datetime.utcnow().isoformat()
+    save_checkpoint(args.checkpoint, checkpoint)
+    logger.info(f"✅ {checkpoint['command']} finished: {checkpoint['processed']} users")
+
+    if not args.no_vacuum:
+        vacuum(full=args.vacuum)
+
+def add_chunk_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--chunk-size", type=int, default=500, help="Users per chunk (one short transaction each)")
+    parser.add_argument("--pause", type=float, default=0.2, help="Seconds to sleep between chunks")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file for resuming")
+    parser.add_argument("--resume", action="store_true", help="Continue the run recorded in the checkpoint file")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the users that would be affected")
+    parser.add_argument("--all", action="store_true", help="Allow running without filters")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip ANALYZE/incremental_vacuum afterwards")
+    parser.add_argument("--vacuum", action="store_true", help="Run a full VACUUM afterwards")
+    verified = parser.add_mutually_exclusive_group()
+    verified.add_argument("--verified", dest="verified", action="store_true", default=None, help="Only verified users")
+    verified.add_argument("--unverified", dest="verified", action="store_false", help="Only unverified users")
+    parser.add_argument("--created-before", type=datetime.fromisoformat, help="Only users created before this time (UTC)")
+    parser.add_argument("--email-prefix", help="Only users whose email starts with this")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked, resumable user maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_chunk_arguments(commands.add_parser("delete", help="Delete matching users"))
+
+    archive = commands.add_parser("archive", help="Archive matching users to gzipped NDJSON, then delete them")
+    add_chunk_arguments(archive)
+    archive.add_argument("--archive", help="Archive file to append to (required unless resuming)")
+
+    vacuum_parser = commands.add_parser("vacuum", help="Run ANALYZE and reclaim free pages")
+    vacuum_parser.add_argument("--full", action="store_true", help="Run a full VACUUM (blocks writers)")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "vacuum":
+            vacuum(full=args.full)
+        else:
+            if args.command == "archive" and not args.archive and not args.resume:
+                parser.error("archive requires --archive")
+            asyncio.run(process_users(args))
+    except Exception as e:
+        logger.error(f"❌ Maintenance failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -11,15 +11,15 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, "/app")
 
-from apps.notifications.websocket import manager, connected_clients
+from apps.notifications.websocket import manager
 from apps.notifications.schemas import Notification
 
 async def test_websocket_broadcast():
     """Test websocket broadcast functionality."""
     try:
-        print(f"Current number of connected clients: {len(connected_clients)}")
+        print(f"Current number of connected clients: {len(manager.clients)}")
         
-        for i, client in enumerate(connected_clients):
+        for i, client in enumerate(manager.clients):
             print(f"Client {i+1}: {client}")
         
         # Create a test notification
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to pick password hashing costs for this machine's latency budget.
+Run this script from the backend container with: python /app/scripts/tune_password_hashing.py [--scheme argon2] [--target-ms 250]
+
+It times the cheapest cost setting, estimates the others, verifies the chosen
+one with a real measurement and prints the environment variables to set. Run it
+on the production hardware: a cost tuned on a laptop can be far too slow (or
+too weak) on the server. Set PASSWORD_HASH_AUTOTUNE=true instead to tune at
+every startup. Existing hashes are upgraded to the new cost on the user's next login.
+"""
+
+import argparse
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+from config.hashing import ARGON2, BCRYPT, available_schemes, benchmark, tune
+from config.settings import PASSWORD_HASH_SCHEME, PASSWORD_HASH_TARGET_MS
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune password hashing cost to a latency budget")
+    parser.add_argument("--scheme", choices=(BCRYPT, ARGON2), default=PASSWORD_HASH_SCHEME, help="Hashing scheme to tune")
+    parser.add_argument("--target-ms", type=float, default=PASSWORD_HASH_TARGET_MS, help="Hashing latency budget per password")
+    parser.add_argument("--samples", type=int, default=3, help="Hashes to time per measurement")
+    args = parser.parse_args()
+
+    if args.scheme not in available_schemes():
+        print(f"❌ {args.scheme} is not available; install argon2-cffi to use it")
+        sys.exit(1)
+
+    policy, estimates = tune(args.scheme, args.target_ms, args.samples)
+    cost_name = "time cost" if args.scheme == ARGON2 else "rounds"
+    chosen = policy.argon2_time_cost if args.scheme == ARGON2 else policy.bcrypt_rounds
+
+    print(f"Estimated {args.scheme} hash time per {cost_name}:")
+    for cost, estimate in estimates.items():
+        marker = "  <- chosen" if cost == chosen else ""
+        print(f"  {cost:>3}: {estimate:8.1f} ms{marker}")
+
+    measured = benchmark(policy, args.samples)
+    print(f"\nMeasured {policy.describe()}: {measured:.1f} ms (budget {args.target_ms:.0f} ms)")
+    if measured > args.target_ms * 1.25:
+        print("⚠️  Over budget; the machine may be busy, consider rerunning")
+
+    print("\n✅ Set these environment variables:")
+    print(f"PASSWORD_HASH_SCHEME={policy.scheme}")
+    if args.scheme == ARGON2:
+        print(f"ARGON2_TIME_COST={policy.argon2_time_cost}")
+        print(f"ARGON2_MEMORY_COST={policy.argon2_memory_cost}")
+        print(f"ARGON2_PARALLELISM={policy.argon2_parallelism}")
+    else:
+        print(f"BCRYPT_ROUNDS={policy.bcrypt_rounds}")
+
+if __name__ == "__main__":
+    main()
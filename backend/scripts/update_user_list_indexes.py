@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Script to add the keyset pagination indexes used by the admin user listing and export.
+Run this script from the backend container with: python /app/scripts/update_user_list_indexes.py
+"""
+
+import asyncio
+import sys
+import os
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+from config.settings import DATABASE_URL
+
+async def update_user_list_indexes():
+    """Add composite (created_at, id) indexes to users table."""
+    try:
+        logger.info("Connecting to database...")
+        
+        # Get the SQLite file path from DATABASE_URL
+        if DATABASE_URL.startswith('sqlite:///'):
+            db_path = DATABASE_URL.replace('sqlite:///', '')
+            logger.info(f"Using SQLite database at {db_path}")
+        else:
+            raise ValueError(f"Unsupported database type: {DATABASE_URL}")
+        
+        # Connect directly to SQLite for schema changes
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        try:
+            # Rows created by the database default lack microseconds; give them the
+            # format the application writes so keyset comparisons order correctly
+            cursor.execute(
+                "UPDATE users SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+            )
+            logger.info(f"Normalized created_at on {cursor.rowcount} rows")
+            
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_users_created_at_id ON users (created_at, id)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS ix_users_is_verified_created_at_id ON users (is_verified, created_at, id)"
+            )
+            cursor.execute("ANALYZE users")
+            
+            # Commit the changes
+            conn.commit()
+            logger.info("✅ Successfully added user listing indexes")
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error: {e}")
+            conn.rollback()
+        
+        # Close the connection
+        conn.close()
+        
+    except Exception as e:
+        logger.error(f"❌ Error updating database schema: {e}")
+
+if __name__ == "__main__":
+    # Run the async function
+    asyncio.run(update_user_list_indexes()) 
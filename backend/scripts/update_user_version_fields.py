@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Script to update the database schema to add row version fields to the users table.
+Run this script from the backend container with: python /app/scripts/update_user_version_fields.py
+"""
+
+import asyncio
+import sys
+import os
+import logging
+import sqlite3
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add parent directory to path for imports
+sys.path.insert(0, "/app")
+
+from config.settings import DATABASE_URL
+
+async def update_user_version_fields():
+    """Add version and updated_at fields to users table."""
+    try:
+        logger.info("Connecting to database...")
+        
+        # Get the SQLite file path from DATABASE_URL
+        if DATABASE_URL.startswith('sqlite:///'):
+            db_path = DATABASE_URL.replace('sqlite:///', '')
+            logger.info(f"Using SQLite database at {db_path}")
+        else:
+            raise ValueError(f"Unsupported database type: {DATABASE_URL}")
+        
+        # Connect directly to SQLite for schema changes
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        logger.info("Checking if version column exists...")
+        cursor.execute("PRAGMA table_info(users)")
+        columns = cursor.fetchall()
+        column_names = [column[1] for column in columns]
+        
+        if 'version' in column_names:
+            logger.info("Version columns already exist, skipping")
+            conn.close()
+            return
+        
+        logger.info("Adding version columns to users table...")
+        
+        try:
+            cursor.execute("ALTER TABLE users ADD COLUMN updated_at TIMESTAMP")
+            cursor.execute("ALTER TABLE users ADD COLUMN version INTEGER")
+            
+            # Existing rows get distinct versions in id order
+            cursor.execute("UPDATE users SET version = id, updated_at = created_at")
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_users_version ON users (version)")
+            
+            # Commit the changes
+            conn.commit()
+            logger.info("✅ Successfully updated database schema with version fields")
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error: {e}")
+            conn.rollback()
+        
+        # Close the connection
+        conn.close()
+        
+    except Exception as e:
+        logger.error(f"❌ Error updating database schema: {e}")
+
+if __name__ == "__main__":
+    # Run the async function
+    asyncio.run(update_user_version_fields()) 
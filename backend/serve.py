@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Production server entry point.
+Run with: python serve.py [--workers N] [--host HOST] [--port PORT]
+
+The app is imported once in this process, then the listening socket is shared
+with forked worker processes (SERVER_WORKERS or --workers, 0 for one per CPU),
+so startup work such as table creation happens once and the workers share the
+imported code pages. uvloop and httptools are used when
+installed. The supervisor restarts workers that die and, on SIGTERM or SIGINT,
+passes the signal on so every worker drains its notification clients before exiting.
+
+Each worker has its own notification manager, event log, caches and metrics,
+so a broadcast only reaches the WebSocket and SSE clients connected to the
+worker that sent it, and a client resuming from a sequence number must reach
+the same worker. A single worker is therefore the default; more are refused
+with NOTIFICATION_LOG_PERSIST, where workers would write the same sequence
+numbers to the shared event table.
+
+For development, keep using `uvicorn main:app --reload`.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
+import uvicorn
+
+# Import the app before forking so every worker inherits it
+from main import app
+from common.log import setup_logging, shutdown_logging
+from config.settings import (
+    SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_BACKLOG, SERVER_KEEPALIVE_SECONDS,
+    SERVER_ACCESS_LOG, SERVER_WS_MAX_SIZE, SERVER_WS_MAX_QUEUE, SERVER_WS_PING_INTERVAL,
+    SERVER_WS_PING_TIMEOUT, SHUTDOWN_DRAIN_SECONDS, NOTIFICATION_DRAIN_SECONDS, NOTIFICATION_LOG_PERSIST,
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Workers that exit sooner than this after starting are restarted with a delay
+MIN_WORKER_UPTIME_SECONDS = 5
+
+def default_workers() -> int:
+    """Return the configured worker count, or one per CPU if set to 0."""
+    return SERVER_WORKERS or os.cpu_count() or 1
+
+def event_loop() -> str:
+    """Use uvloop when it is installed."""
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        return "asyncio"
+    return "uvloop"
+
+def http_protocol() -> str:
+    """Use the httptools parser when it is installed."""
+    try:
+        import httptools  # noqa: F401
+    except ImportError:
+        return "h11"
+    return "httptools"
+
+def build_config(host: str = SERVER_HOST, port: int = SERVER_PORT) -> uvicorn.Config:
+    """Uvicorn settings for production."""
+    return uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        loop=event_loop(),
+        http=http_protocol(),
+        lifespan="on",
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        # Notification drain first, then in-flight requests
+        timeout_graceful_shutdown=NOTIFICATION_DRAIN_SECONDS + SHUTDOWN_DRAIN_SECONDS,
+        ws_max_size=SERVER_WS_MAX_SIZE,
+        ws_max_queue=SERVER_WS_MAX_QUEUE,
+        ws_ping_interval=SERVER_WS_PING_INTERVAL,
+        ws_ping_timeout=SERVER_WS_PING_TIMEOUT,
+        access_log=SERVER_ACCESS_LOG,
+        server_header=False,
+        # Keep the logging set up by setup_logging instead of uvicorn's defaults
+        log_config=None,
+    )
+
+def run_worker(config: uvicorn.Config, sock: socket.socket):
+    """Serve on the shared socket in a forked worker; never returns."""
+    exit_code = 0
+    try:
+        # Signals from the terminal go to the supervisor only, which passes them on once
+        os.setpgrp()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        # The supervisor's logging thread does not survive the fork
+        setup_logging()
+        uvicorn.Server(config).run(sockets=[sock])
+    except Exception:
+        logger.exception("Worker %d crashed", os.getpid())
+        exit_code = 1
+    finally:
+        shutdown_logging()
+        os._exit(exit_code)
+
+class Supervisor:
+    """Forks workers sharing one listening socket and keeps them running."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.config, self.sock)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def stop(self, signum, frame):
+        # A second signal is passed on too, so workers stop draining and exit at once
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        for _ in range(self.workers):
+            self.spawn()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, time.monotonic())
+            if self.stopping:
+                continue
+
+            logger.warning("Worker %d exited with code %d, restarting", pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+                time.sleep(1)
+            if not self.stopping:
+                self.spawn()
+        logger.info("All workers stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with production settings")
+    parser.add_argument("--host", default=SERVER_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Worker processes, 0 for one per CPU (default: SERVER_WORKERS)")
+    args = parser.parse_args()
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    if args.workers < 1:
+        parser.error("--workers cannot be negative")
+    if args.workers > 1 and NOTIFICATION_LOG_PERSIST:
+        parser.error("NOTIFICATION_LOG_PERSIST needs a single worker: each worker numbers events on its own")
+
+    setup_logging()
+
+    config = build_config(args.host, args.port)
+    sock = config.bind_socket()
+    logger.info(
+        "Serving on %s:%d with %d worker(s), %s loop, %s parser",
+        args.host, args.port, args.workers, config.loop, config.http,
+    )
+
+    try:
+        if args.workers == 1:
+            uvicorn.Server(config).run(sockets=[sock])
+        else:
+            Supervisor(config, sock, args.workers).run()
+    finally:
+        sock.close()
+
+if __name__ == "__main__":
+    main()
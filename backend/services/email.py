@@ -1,11 +1,21 @@
+import asyncio
+import contextvars
+import functools
 import logging
 import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from pathlib import Path
+from typing import Awaitable, Set
 
+from common.context import ContextProxy
+from common.metrics import Histogram
+from common.tracing import span
 from config.settings import (
     EMAIL_ENABLED, 
+    EMAIL_WORKERS,
     EMAIL_HOST, 
     EMAIL_PORT, 
     EMAIL_USERNAME, 
@@ -18,6 +28,70 @@ from config.settings import (
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Only warn about disabled email once instead of on every send
+_disabled_warning_logged = False
+
+# SMTP send latency
+EMAIL_SEND_SECONDS = Histogram("email_send_seconds", "Time spent sending email over SMTP", ["result"])
+
+class EmailDispatcher:
+    """
+    Sends email on worker threads and keeps track of sends in flight.
+    
+    SMTP is blocking, so it runs on a small thread pool instead of the event
+    loop. Sends can be awaited, or submitted to finish in the background;
+    either way `drain` waits for them at shutdown so no email is cut off.
+    """
+    
+    def __init__(self, workers: int = EMAIL_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email")
+        self._in_flight: Set[asyncio.Future] = set()
+    
+    def _track(self, future: asyncio.Future) -> asyncio.Future:
+        self._in_flight.add(future)
+        future.add_done_callback(self._in_flight.discard)
+        return future
+    
+    async def run(self, func, *args):
+        """Run a blocking send function on the email worker pool."""
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        return await self._track(asyncio.get_running_loop().run_in_executor(self.executor, call))
+    
+    def submit(self, send: Awaitable[bool]) -> asyncio.Task:
+        """Finish a send in the background, without holding up the request."""
+        return self._track(asyncio.ensure_future(send))
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of sends that have not finished."""
+        return len(self._in_flight)
+    
+    async def drain(self, timeout: float) -> int:
+        """
+        Wait for sends in flight to finish.
+        
+        Returns:
+            int: Number of sends still running when the timeout expired
+        """
+        if self._in_flight:
+            await asyncio.wait(set(self._in_flight), timeout=timeout)
+        return len(self._in_flight)
+    
+    def close(self):
+        """Stop the worker threads."""
+        self.executor.shutdown(wait=False)
+
+# Email dispatcher of the running app
+email_dispatcher = ContextProxy("email")
+
+def _deliver(message: MIMEMultipart):
+    """Send a message over SMTP (blocking)."""
+    with span("email.smtp"), smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
+        server.ehlo()
+        server.starttls()
+        server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
+        server.send_message(message)
+
 async def send_email(to_email: str, subject: str, html_content: str) -> bool:
     """
     Send an email using SMTP.
@@ -30,12 +104,16 @@ async def send_email(to_email: str, subject: str, html_content: str) -> bool:
     Returns:
         bool: True if email was sent successfully, False otherwise
     """
+    global _disabled_warning_logged
+    
     if not EMAIL_ENABLED:
-        logger.warning("Email sending is disabled. Set EMAIL_ENABLED=True to enable.")
-        logger.info(f"Would have sent email to: {to_email}, Subject: {subject}")
-        logger.debug(f"Email content: {html_content}")
+        if not _disabled_warning_logged:
+            logger.warning("Email sending is disabled. Set EMAIL_ENABLED=True to enable.")
+            _disabled_warning_logged = True
+        logger.debug("Would have sent email to: %s, Subject: %s", to_email, subject)
         return False
     
+    start = time.perf_counter()
     try:
         # Create message
         message = MIMEMultipart("alternative")
@@ -46,18 +124,16 @@ async def send_email(to_email: str, subject: str, html_content: str) -> bool:
         # Add HTML content
         message.attach(MIMEText(html_content, "html"))
         
-        # Connect to SMTP server and send email
-        with smtplib.SMTP(EMAIL_HOST, EMAIL_PORT) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
-            server.send_message(message)
+        # Connect to SMTP server and send email, off the event loop
+        await email_dispatcher.run(_deliver, message)
+        EMAIL_SEND_SECONDS.labels(result="sent").observe(time.perf_counter() - start)
             
-        logger.info(f"Email sent successfully to {to_email}")
+        logger.debug("Email sent successfully to %s", to_email)
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send email: {str(e)}")
+        EMAIL_SEND_SECONDS.labels(result="failed").observe(time.perf_counter() - start)
+        logger.error("Failed to send email: %s", e)
         return False
 
 async def send_verification_email(to_email: str, verification_token: str) -> bool:
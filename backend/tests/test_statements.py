@@ -0,0 +1,181 @@
+"""
+Run every registered statement through a real `databases` SQLite connection.
+
+Registered statements replace the compile step `databases` runs for Core
+expressions, so these tests catch a `databases` or SQLAlchemy upgrade that
+changes how statements are compiled or how their values are bound.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import databases
+import pytest
+import sqlalchemy
+from sqlalchemy.dialects import sqlite
+
+# Importing these registers their statements
+import apps.users.activity as activity
+import apps.users.cooldown as cooldown
+import apps.users.crud as crud
+from apps.users.models import users
+from common.statements import Statement, statements
+from config.database import Base
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'statements.db'}"
+    Base.metadata.create_all(sqlalchemy.create_engine(url))
+    return url
+
+def run(db_url, scenario):
+    """Run `scenario(db)` against a connected database."""
+    async def main():
+        db = databases.Database(db_url)
+        await db.connect()
+        try:
+            return await scenario(db)
+        finally:
+            await db.disconnect()
+    return asyncio.run(main())
+
+def create_user(db, email, **overrides):
+    values = {
+        "new_email": email,
+        "new_created_at": datetime(2024, 1, 1),
+        "new_hashed_password": "hash",
+        "new_is_verified": False,
+        "new_verification_token": None,
+        "new_verification_token_expires": None,
+        "changed_at": datetime(2024, 1, 1),
+    }
+    values.update(overrides)
+    return db.execute(crud.CREATE_USER.bind(**values))
+
+def test_every_statement_is_covered():
+    covered = {
+        "get_user_by_email", "get_user", "create_user", "get_user_changes", "update_password_hash",
+        "verify_email.lookup", "verify_email.recent", "verify_email.update", "verification_token.update",
+        "reset_token.update", "reset_password.lookup", "reset_password.update",
+        "email_cooldown.get", "email_cooldown.set", "email_cooldown.delete", "email_cooldown.purge",
+        "update_user_activity",
+    }
+    assert set(statements) == covered
+
+def test_user_lookups_and_changes(db_url):
+    async def scenario(db):
+        first = await create_user(db, "a@example.com")
+        second = await create_user(db, "b@example.com")
+
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=second))
+        assert row["email"] == "b@example.com"
+        assert row["version"] == 2
+        row = await db.fetch_one(crud.GET_USER_BY_EMAIL.bind(email="a@example.com"))
+        assert row["id"] == first and row["created_at"] == datetime(2024, 1, 1)
+        assert await db.fetch_one(crud.GET_USER_BY_EMAIL.bind(email="missing@example.com")) is None
+
+        changes = await db.fetch_all(crud.GET_USER_CHANGES.bind(since=0, limit=10))
+        assert [change["email"] for change in changes] == ["a@example.com", "b@example.com"]
+        changes = await db.fetch_all(crud.GET_USER_CHANGES.bind(since=1, limit=10))
+        assert [change["id"] for change in changes] == [second]
+        assert len(await db.fetch_all(crud.GET_USER_CHANGES.bind(since=0, limit=1))) == 1
+
+        await db.execute(crud.UPDATE_PASSWORD_HASH.bind(
+            user_id=first, new_hashed_password="rehashed", changed_at=datetime(2024, 2, 1)
+        ))
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=first))
+        assert (row["hashed_password"], row["version"], row["updated_at"]) == ("rehashed", 3, datetime(2024, 2, 1))
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=second))
+        assert (row["hashed_password"], row["version"]) == ("hash", 2)
+    run(db_url, scenario)
+
+def test_email_verification(db_url):
+    async def scenario(db):
+        expires = datetime(2030, 1, 1)
+        user_id = await create_user(db, "a@example.com", new_verification_token="abc", new_verification_token_expires=expires)
+        await create_user(db, "b@example.com", new_verification_token="other")
+
+        row = await db.fetch_one(crud.VERIFY_EMAIL_LOOKUP.bind(token="abc"))
+        assert (row["id"], row["verification_token_expires"]) == (user_id, expires)
+        assert await db.fetch_all(crud.VERIFY_EMAIL_RECENT.bind()) == []
+
+        await db.execute(crud.VERIFY_EMAIL_UPDATE.bind(user_id=user_id, changed_at=datetime(2024, 3, 1)))
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=user_id))
+        assert row["is_verified"] is True and row["verification_token"] is None
+        assert await db.fetch_one(crud.VERIFY_EMAIL_LOOKUP.bind(token="abc")) is None
+        assert [row["id"] for row in await db.fetch_all(crud.VERIFY_EMAIL_RECENT.bind())] == [user_id]
+
+        await db.execute(crud.VERIFICATION_TOKEN_UPDATE.bind(
+            user_id=user_id, new_token="def", new_expires=expires, changed_at=datetime(2024, 3, 2)
+        ))
+        row = await db.fetch_one(crud.VERIFY_EMAIL_LOOKUP.bind(token="def"))
+        assert (row["id"], row["version"]) == (user_id, 4)
+        row = await db.fetch_one(crud.VERIFY_EMAIL_LOOKUP.bind(token="other"))
+        assert row["email"] == "b@example.com"
+    run(db_url, scenario)
+
+def test_password_reset(db_url):
+    async def scenario(db):
+        user_id = await create_user(db, "a@example.com")
+        expires = datetime(2030, 1, 1)
+        await db.execute(crud.RESET_TOKEN_UPDATE.bind(
+            user_id=user_id, new_token="reset", new_expires=expires, changed_at=datetime(2024, 4, 1)
+        ))
+        row = await db.fetch_one(crud.RESET_PASSWORD_LOOKUP.bind(token="reset"))
+        assert (row["id"], row["reset_password_token_expires"]) == (user_id, expires)
+
+        await db.execute(crud.RESET_PASSWORD_UPDATE.bind(
+            user_id=user_id, new_hashed_password="new-hash", changed_at=datetime(2024, 4, 2)
+        ))
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=user_id))
+        assert (row["hashed_password"], row["reset_password_token"], row["version"]) == ("new-hash", None, 3)
+        assert await db.fetch_one(crud.RESET_PASSWORD_LOOKUP.bind(token="reset")) is None
+    run(db_url, scenario)
+
+def test_email_cooldowns(db_url):
+    async def scenario(db):
+        now = time.time()
+        await db.execute(cooldown.SET_COOLDOWN.bind(new_key="verification:a", new_expires_at=now + 60))
+        await db.execute(cooldown.SET_COOLDOWN.bind(new_key="verification:b", new_expires_at=now - 60))
+        # Upsert replaces the existing row
+        await db.execute(cooldown.SET_COOLDOWN.bind(new_key="verification:a", new_expires_at=now + 120))
+        row = await db.fetch_one(cooldown.GET_COOLDOWN.bind(key="verification:a"))
+        assert row["expires_at"] == pytest.approx(now + 120)
+
+        await db.execute(cooldown.PURGE_COOLDOWNS.bind(now=now))
+        assert await db.fetch_one(cooldown.GET_COOLDOWN.bind(key="verification:b")) is None
+        await db.execute(cooldown.DELETE_COOLDOWN.bind(key="verification:a"))
+        assert await db.fetch_one(cooldown.GET_COOLDOWN.bind(key="verification:a")) is None
+    run(db_url, scenario)
+
+def test_user_activity(db_url):
+    async def scenario(db):
+        user_id = await create_user(db, "a@example.com")
+        login = datetime(2024, 5, 1, 12)
+        await db.execute(activity.UPDATE_ACTIVITY.bind(user_id=user_id, login_at=login, seen_at=login))
+        await db.execute(activity.UPDATE_ACTIVITY.bind(
+            user_id=user_id, login_at=None, seen_at=login + timedelta(minutes=5)
+        ))
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=user_id))
+        assert (row["last_login_at"], row["last_seen_at"]) == (login, login + timedelta(minutes=5))
+
+        # Older values never move the timestamps back, and the version is untouched
+        await db.execute(activity.UPDATE_ACTIVITY.bind(
+            user_id=user_id, login_at=login - timedelta(days=1), seen_at=login - timedelta(days=1)
+        ))
+        row = await db.fetch_one(crud.GET_USER.bind(user_id=user_id))
+        assert (row["last_login_at"], row["last_seen_at"], row["version"]) == (login, login + timedelta(minutes=5), 1)
+    run(db_url, scenario)
+
+def test_compiled_once_per_dialect_and_arguments():
+    statement = Statement("test.compile_cache", users.select().where(users.c.id == sqlalchemy.bindparam("user_id")))
+    dialect = sqlite.dialect()
+    first = statement.compiled(dialect, compile_kwargs={"render_postcompile": True})
+    assert statement.compiled(dialect, compile_kwargs={"render_postcompile": True}) is first
+    assert statement.compiled(dialect) is not first
+
+def test_bound_values_and_caller_params():
+    compiled = crud.GET_USER.bind(user_id=7).compile(sqlite.dialect())
+    assert compiled.construct_params()["user_id"] == 7
+    assert compiled.construct_params({"user_id": 8})["user_id"] == 8